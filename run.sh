@@ -20,4 +20,5 @@ source venv/bin/activate
 python yolo_detect.py \
     --model my_model_ncnn_model \
     --source usb0 \
-    --resolution 416x416
\ No newline at end of file
+    --resolution 416x416 \
+    --headless
\ No newline at end of file
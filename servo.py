@@ -3,18 +3,22 @@ import sys
 import argparse
 import glob
 import time
-# Hapus import threading karena kita tidak menggunakannya lagi untuk sound
-# import threading 
+import queue
+# threading hanya untuk worker servo; sound tetap tanpa thread
+import threading
 
 import cv2
 import numpy as np
-# Pastikan Anda sudah menginstal ultralytics
-try:
-    from ultralytics import YOLO 
-    print("STATUS: Ultralytics YOLO berhasil dimuat.")
-except ImportError:
-    print("FATAL ERROR: Ultralytics YOLO tidak terinstal atau gagal dimuat.")
-    sys.exit(1)
+from yolo_postprocess import empty_detections, filter_detections, draw_detections
+from yolo_preprocess import parse_roi
+from yolo_tracker import VotingTracker
+from yolo_runtime import SignalControl
+from yolo_metrics import StageTimer, RingBuffer
+from yolo_writer import VideoRecorder, EventClipRecorder
+from yolo_motion import MotionGate
+from yolo_adaptive import AdaptiveController, imgsz_steps
+# Backend inference (ultralytics diimport di dalam backend 'ultralytics' saja)
+from yolo_backend import BACKENDS, CACHE_AUTO, load_backend, warmup_backend
 
 
 # ========== KONFIGURASI AUDIO (PYGAME) ==========
@@ -86,12 +90,62 @@ parser.add_argument('--source', help='Image source, can be image file ("test.jpg
                      image folder ("test_dir"), video file ("testvid.mp4"), or index of USB camera ("usb0")',
                      default='usb0')
 parser.add_argument('--thresh', help='Minimum confidence threshold for displaying detected objects (example: "0.4")',
-                     default=0.5)
+                     default=0.5, type=float)
 parser.add_argument('--resolution', help='Resolution in WxH to display inference results at (example: "640x480"), \
                      otherwise, match source resolution',
                      default='416x416')
+parser.add_argument('--vote-frames', help='Number of inferences an object must be tracked with a stable label before the servo fires (default: 3)',
+                     default=3, type=int)
+parser.add_argument('--headless', help='Run without a display: no imshow/waitKey, frames are only annotated when recording or on a SIGUSR1 snapshot. Stop with SIGINT/SIGTERM.',
+                     action='store_true')
+parser.add_argument('--metrics-interval', help='Print per-stage latency p50/p95/p99 every N seconds (default: 0 = off)',
+                     default=0, type=float)
+parser.add_argument('--metrics-json', help='Write per-stage latency summary to this JSON file at exit (example: "metrics.json")',
+                     default=None)
+parser.add_argument('--motion-gate', help='Only run the model when the scene changes (frame differencing), or on the heartbeat',
+                     action='store_true')
+parser.add_argument('--motion-thresh', help='Fraction of changed pixels that counts as motion for --motion-gate (default: 0.01)',
+                     default=0.01, type=float)
+parser.add_argument('--motion-heartbeat', help='Run the model at least every N seconds even without motion (default: 5.0)',
+                     default=5.0, type=float)
+parser.add_argument('--motion-hold', help='Keep running the model for N seconds after the last motion (default: 2.0)',
+                     default=2.0, type=float)
+parser.add_argument('--target-latency-ms', help='Inference latency the adaptive controller aims for; imgsz steps down above it (default: 150)',
+                     default=150.0, type=float)
+parser.add_argument('--cpu-budget', help='Share of all CPU cores this process may use before inference backs off while idle (default: 0.75)',
+                     default=0.75, type=float)
+parser.add_argument('--idle-interval', help='Seconds between inferences while no object is present (default: 0.5)',
+                     default=0.5, type=float)
+parser.add_argument('--min-imgsz', help='Smallest imgsz the controller may step down to, ultralytics backend only (default: 224)',
+                     default=224, type=int)
+parser.add_argument('--thermal-limit', help='CPU temperature in C at which the smallest imgsz is used and idle inference backs off (default: 75)',
+                     default=75.0, type=float)
+parser.add_argument('--roi', help='Region the model looks at, in display-frame pixels or 0-1 fractions: rectangle "x1,y1,x2,y2" or polygon "x1,y1;x2,y2;x3,y3;..."',
+                     default=None)
+parser.add_argument('--backend', help='Inference engine: ultralytics, onnx (.onnx file), ncnn or openvino (exported model folder), or server (--model is the yolo_server.py address, e.g. unix:///tmp/yolo.sock) (default: ultralytics)',
+                     default='ultralytics', choices=BACKENDS)
+parser.add_argument('--model-cache', help='Folder for the optimized ONNX graph / compiled OpenVINO blob, so the next start skips graph optimization / compilation. "auto" = a model_cache folder next to the model, empty string disables (default: auto)',
+                     default=CACHE_AUTO)
+parser.add_argument('--warmup', help='Dummy inferences at the model input size before the camera loop starts (default: 3)',
+                     default=3, type=int)
 parser.add_argument('--record', help='Record results from video or webcam and save it as "demo1.avi". Must specify --resolution argument to record.',
                      action='store_true')
+parser.add_argument('--record-fps', help='Frame rate of the recorded file; frames are placed by capture time so it plays at true speed (default: 15)',
+                     default=15.0, type=float)
+parser.add_argument('--record-segment-seconds', help='Start a new recording file every N seconds (default: 0 = one file)',
+                     default=0, type=float)
+parser.add_argument('--record-segment-mb', help='Start a new recording file once it reaches N megabytes (default: 0 = no limit)',
+                     default=0, type=float)
+parser.add_argument('--clips', help='Save short clips around every servo trigger (and low-confidence detections) to this folder, e.g. "clips"',
+                     default=None)
+parser.add_argument('--clip-pre', help='Seconds of footage kept before an event (default: 3.0)',
+                     default=3.0, type=float)
+parser.add_argument('--clip-post', help='Seconds of footage recorded after an event (default: 2.0)',
+                     default=2.0, type=float)
+parser.add_argument('--clip-fps', help='Frame rate of the clip ring and clip files (default: 10)',
+                     default=10.0, type=float)
+parser.add_argument('--clip-low-conf', help='Also save a clip when a detection is below this confidence (default: 0 = off)',
+                     default=0.0, type=float)
 
 args = parser.parse_args()
 
@@ -102,9 +156,19 @@ img_source = args.source
 min_thresh = args.thresh
 user_res = args.resolution
 record = args.record
+headless = args.headless
+
+# Region of interest (area di atas flap pemilah)
+roi = None
+if args.roi:
+    try:
+        roi = parse_roi(args.roi)
+    except ValueError as e:
+        print(f'ERROR: --roi tidak valid: {e}')
+        sys.exit(1)
 
 # Check if model file exists and is valid
-if (not os.path.exists(model_path)):
+if args.backend != 'server' and (not os.path.exists(model_path)):
     print('ERROR: Model path is invalid or model was not found. Make sure the model filename was entered correctly.')
     sys.exit(0)
 
@@ -124,10 +188,13 @@ except Exception as e:
 
 try:
     # Baris ini SANGAT KRITIS dan bisa menyebabkan Segmentation Fault/Memory Crash
-    print("STATUS: Loading YOLO model... (this may take 30-60 seconds on Pi 4)")
-    model = YOLO(model_path, task='detect', verbose=True)
+    print(f"STATUS: Loading YOLO model with '{args.backend}' backend... (this may take 30-60 seconds on Pi 4)")
+    t_load = time.perf_counter()
+    model = load_backend(args.backend, model_path, imgsz=416, cache_dir=args.model_cache or None)
     labels = model.names
-    print(f"STATUS: Model YOLO berhasil dimuat. Classes: {list(labels.values())}")
+    print(f"STATUS: Model YOLO berhasil dimuat dalam {time.perf_counter() - t_load:.1f}s. Classes: {list(labels.values())}")
+    if model.cache_path:
+        print(f"STATUS: Cache model {'dipakai' if model.cache_hit else 'dibuat'}: {model.cache_path}")
 except MemoryError as e:
     print(f"FATAL ERROR: Tidak cukup RAM untuk memuat model: {e}")
     print("SOLUSI: Gunakan model yang lebih kecil (YOLOv8n) atau tambah swap memory")
@@ -138,8 +205,12 @@ except Exception as e:
     traceback.print_exc()
     sys.exit(1)
 
-# Optimize model for inference speed
-#model.fuse()  # Fuse Conv2d + BatchNorm layers for faster inference
+# Warm-up: inference pertama jauh lebih lambat dari steady state
+if args.warmup > 0:
+    t_warm = time.perf_counter()
+    warmup_times = warmup_backend(model, args.warmup)
+    print(f"STATUS: Warm-up {args.warmup}x selesai dalam {time.perf_counter() - t_warm:.1f}s "
+          f"({', '.join(f'{t * 1000:.0f}' for t in warmup_times)} ms)")
 
 # ========== KONFIGURASI SERVO ==========
 SERVO_BIN_PIN = 11      # servo 1 (Pembagi Kategori) - BOARD PIN 11
@@ -325,6 +396,23 @@ else:
         finally:
             servo_sedang_jalan = False
             
+# Satu worker servo untuk seluruh program: loop kamera hanya memasukkan jenis sampah ke antrian,
+# jadi clip post-event, display dan recording tetap jalan selama servo bergerak. Objek yang stabil
+# saat servo masih sibuk menunggu giliran di antrian (tracker memicu setiap objek hanya sekali).
+servo_queue = queue.Queue()
+
+def servo_worker():
+    while True:
+        jenis_sampah = servo_queue.get()
+        if jenis_sampah is None:
+            break
+        try:
+            jalankan_servo(jenis_sampah)
+        except Exception as e:
+            print(f"ERROR servo: {e}")
+
+servo_thread = threading.Thread(target=servo_worker, name='servo', daemon=True)
+servo_thread.start()
             
 # Parse input to determine if image source is a file, folder, video, or USB camera
 img_ext_list = ['.jpg','.JPG','.jpeg','.JPEG','.png','.PNG','.bmp','.BMP']
@@ -369,9 +457,15 @@ if record:
         sys.exit(0)
     
     # Set up recording
+    # Background writer thread: frames are dropped (and counted) instead of stalling inference
     record_name = 'demo1.avi'
-    record_fps = 30
-    recorder = cv2.VideoWriter(record_name, cv2.VideoWriter_fourcc(*'MJPG'), record_fps, (resW,resH))
+    recorder = VideoRecorder(record_name, fps=args.record_fps, fourcc='MJPG', frame_size=(resW,resH),
+                             segment_seconds=args.record_segment_seconds, segment_mb=args.record_segment_mb)
+
+# Clip pre/post event: ring frame terkompresi, ditulis ke file saat servo jalan
+clips = None
+if args.clips:
+    clips = EventClipRecorder(args.clips, pre_seconds=args.clip_pre, post_seconds=args.clip_post, fps=args.clip_fps)
 
 # Load or initialize image source
 if source_type == 'image':
@@ -459,32 +553,61 @@ bbox_colors = [(164,120,87), (68,148,228), (93,97,209), (178,182,133), (88,159,1
 
 # Initialize control and status variables
 avg_frame_rate = 0
-frame_rate_buffer = []
 fps_avg_len = 200
+frame_rate_buffer = RingBuffer(fps_avg_len)
 img_count = 0
-last_detection_time = 0
-detection_interval =  0.5 # Process detection every 0.5 seconds for better performance
-last_detections = []  # Store last detection results to display continuously
-frame_count = 0
-skip_frames = 2  # Process every N frames (1 = every frame, 2 = every other frame)
+last_detections = empty_detections()  # Store last detection results to display continuously
+
+# Kontrol adaptif (pengganti skip_frames / detection_interval tetap): setiap frame selama ada objek
+# atau track yang di-vote, jarang saat chute kosong, CPU melewati budget atau Pi kepanasan
+controller = None
+if source_type in ['video', 'usb', 'picamera']:
+    controller = AdaptiveController(imgsz_steps(416, args.min_imgsz) if model.dynamic_imgsz else [416],
+                                    target_latency=args.target_latency_ms / 1000.0, cpu_budget=args.cpu_budget,
+                                    idle_interval=args.idle_interval, thermal_limit=args.thermal_limit)
+    # Ukuran yang lebih kecil juga di-warm-up, supaya inference pertama setelah turun imgsz tidak lambat
+    if args.warmup > 0 and len(controller.sizes) > 1:
+        t_warm = time.perf_counter()
+        for size in controller.sizes[1:]:
+            warmup_backend(model, 1, imgsz=size)
+        print(f"STATUS: Warm-up imgsz {', '.join(str(s) for s in controller.sizes[1:])} selesai dalam "
+              f"{time.perf_counter() - t_warm:.1f}s")
+
+# Tracker: servo hanya dipicu sekali per objek, setelah labelnya stabil
+tracker = VotingTracker(vote_frames=args.vote_frames)
+
+# Motion gate: lewati inference saat scene (chute kosong) tidak berubah
+motion_gate = None
+if args.motion_gate:
+    motion_gate = MotionGate(sensitivity=args.motion_thresh, heartbeat=args.motion_heartbeat, hold=args.motion_hold)
+
+# Quit (SIGINT/SIGTERM) dan snapshot (SIGUSR1) lewat signal, untuk mode tanpa display
+control = SignalControl().install()
 
 print("STATUS: Memulai loop inference...")
 print("=" * 60)
 print("KONTROL:")
-print("  Q - Quit (keluar)")
-print("  S - Pause (jeda)")
-print("  P - Capture screenshot")
+if headless:
+    print("  Ctrl+C / SIGTERM - Quit (keluar)")
+    print("  SIGUSR1          - Capture screenshot")
+else:
+    print("  Q - Quit (keluar)")
+    print("  S - Pause (jeda)")
+    print("  P - Capture screenshot")
 print("=" * 60)
 
 # Tambahkan error counter untuk recovery
 consecutive_errors = 0
 max_consecutive_errors = 10
 
+# Latensi per stage (capture, preprocess, inference, postprocess, actuation, render, record, display)
+metrics = StageTimer()
+
 # Begin inference loop
-while True:
+while not control.stop.is_set():
 
     t_start = time.perf_counter()
-    current_time = time.perf_counter()
+    t = t_start
 
     # Load frame from image source
     try:
@@ -539,136 +662,165 @@ while True:
             break
         time.sleep(0.1)
         continue
+    t = metrics.mark('capture', t)
 
     # Resize frame to desired display resolution
     if resize == True:
         frame = cv2.resize(frame,(resW,resH))
+    t = metrics.mark('preprocess', t)
+
+    # Only run inference when the adaptive controller says it is due
+    # Crop ke ROI (view, tanpa copy); model dan motion gate hanya melihat area ini
+    roi_frame = roi.crop(frame) if roi is not None else frame
 
-    # Increment frame counter
-    frame_count += 1
+    # Motion gate dulu (melihat setiap frame); controller hanya memakai slot jika model benar-benar jalan
+    motion = motion_gate is None or motion_gate.should_infer(roi_frame)
+    run_inference = controller.should_infer(gate=motion) if controller is not None else motion
 
-    # Only run inference at specified intervals and on selected frames
-    if (frame_count % skip_frames == 0) and (current_time - last_detection_time >= detection_interval):
-        last_detection_time = current_time
+    if run_inference:
 
         # Run inference on frame with optimizations
+        t_infer = t
         try:
-            results = model(frame, verbose=False, imgsz=416, half=False,conf=0.5, iou=0.45, max_det=1)
+            detections = model.infer(roi_frame, min_thresh, iou_thresh=0.45, max_det=1,
+                                     imgsz=controller.imgsz if controller is not None else None)
         except Exception as e:
             print(f"CRITICAL: Error saat menjalankan inference model: {e}")
             break # Hentikan loop jika inference crash
-
-        # Extract results
-        detections = results[0].boxes
-
-        # Clear previous detections and store new ones
-        last_detections = []
-
-        # Go through each detection and get bbox coords, confidence, and class
-        for i in range(len(detections)):
-
-            # Get bounding box coordinates
-            # Ultralytics returns results in Tensor format, which have to be converted to a regular Python array
-            xyxy_tensor = detections[i].xyxy.cpu() # Detections in Tensor format in CPU memory
-            xyxy = xyxy_tensor.numpy().squeeze() # Convert tensors to Numpy array
-            xmin, ymin, xmax, ymax = xyxy.astype(int) # Extract individual coordinates and convert to int
-
-            # Get bounding box class ID and name
-            classidx = int(detections[i].cls.item())
+        t = metrics.mark('inference', t)
+        infer_s = t - t_infer
+
+        # Simpan deteksi di atas threshold (array NumPy dari backend)
+        # (dipakai terus untuk display sampai interval inference berikutnya)
+        last_detections = detections
+        if roi is not None:
+            # Box kembali ke koordinat frame penuh, buang deteksi di luar ROI
+            roi_boxes = roi.to_frame(last_detections.boxes)
+            last_detections = filter_detections(last_detections._replace(boxes=roi_boxes), roi.contains(roi_boxes))
+        t = metrics.mark('postprocess', t)
+
+        # Deteksi ragu-ragu: simpan footage untuk dicek
+        if clips is not None and args.clip_low_conf > 0:
+            low = last_detections.confs < args.clip_low_conf
+            if low.any():
+                clips.trigger('lowconf_' + labels[int(last_detections.classes[low][0])])
+
+        # Proses servo HANYA untuk objek yang labelnya sudah stabil (sekali per objek)
+        for track_id, classidx in tracker.update(last_detections):
             classname = labels[classidx]
 
-            # Get bounding box confidence
-            conf = detections[i].conf.item()
-
-            # Store detection if confidence threshold is met
-            if conf > min_thresh:
-                last_detections.append({
-                    'bbox': (xmin, ymin, xmax, ymax),
-                    'class': classname,
-                    'classidx': classidx,
-                    'conf': conf
-                })
-
-        # Proses servo HANYA untuk deteksi terbaik (confidence tertinggi) pada interval ini
-        if last_detections and not servo_sedang_jalan:
-            # Urutkan deteksi berdasarkan confidence (tertinggi dulu)
-            sorted_detections = sorted(last_detections, key=lambda x: x['conf'], reverse=True)
-            best_detection = sorted_detections[0]
-            classname = best_detection['class']
-
-            # Jalankan servo hanya untuk sampah dengan confidence tinggi
+            # Jalankan servo hanya untuk sampah dengan kategori valid
             if classname in ['non-organic', 'organic', 'b3']:
-                print(f">>> SAMPAH {classname.upper()} TERDETEKSI! (conf: {best_detection['conf']:.2f}) <<<")
-                
-                # PANGGIL LANGSUNG (BLOCKING MODE)
-                jalankan_servo(classname) 
-                
+                waiting = servo_queue.qsize() + (1 if servo_sedang_jalan else 0)
+                print(f">>> SAMPAH {classname.upper()} TERDETEKSI! (track {track_id}) <<<"
+                      + (f" (menunggu {waiting} urutan servo)" if waiting else ""))
+
+                if clips is not None:
+                    clips.trigger(classname)
+
+                # Non-blocking: urutan servo dijalankan worker servo
+                servo_queue.put(classname)
+        t = metrics.mark('actuation', t)
+
+        # Ada objek / track yang masih di-vote -> controller tetap inference di setiap frame
+        if controller is not None:
+            controller.record(infer_s, len(last_detections.confs) > 0 or tracker.voting)
+
+    # Gambar anotasi hanya jika frame-nya dipakai (display, recording, atau snapshot)
+    snapshot = headless and control.take_snapshot()
+    if not headless or record or clips is not None or snapshot:
+
+        # Draw last detections on every frame for continuous display
+        object_count = draw_detections(frame, last_detections, labels, bbox_colors)
+        if roi is not None:
+            roi.draw(frame)
+
+        # Calculate and draw framerate (if using video, USB, or Picamera source)
+        if source_type == 'video' or source_type == 'usb' or source_type == 'picamera':
+            cv2.putText(frame, f'FPS: {avg_frame_rate:0.2f}', (10,20), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2) # Draw framerate
+        cv2.putText(frame, f'Number of objects: {object_count}', (10,40), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2) # Draw total number of detected objects
+        t = metrics.mark('render', t)
+
+        if record == True: recorder.write(frame, t_start)
+        if clips is not None: clips.add_frame(frame, t_start)
+        if snapshot:
+            cv2.imwrite('capture.png',frame)
+            print('Snapshot disimpan ke capture.png')
+        if record or clips is not None or snapshot:
+            t = metrics.mark('record', t)
+
+    if not headless:
+        # Display detection results
+        cv2.imshow('YOLO detection results',frame) # Display image
+
+        # If inferencing on individual images, wait for user keypress before moving to next image. Otherwise, wait 5ms before moving to next frame.
+        if source_type == 'image' or source_type == 'folder':
+            key = cv2.waitKey()
+        elif source_type == 'video' or source_type == 'usb' or source_type == 'picamera':
+            key = cv2.waitKey(5)
+
+        if key == ord('q') or key == ord('Q'): # Press 'q' to quit
+            break
+        elif key == ord('s') or key == ord('S'): # Press 's' to pause inference
+            cv2.waitKey()
+        elif key == ord('p') or key == ord('P'): # Press 'p' to save a picture of results on this frame
+            cv2.imwrite('capture.png',frame)
+        t = metrics.mark('display', t)
+
+    if metrics.maybe_log(args.metrics_interval) and controller is not None:
+        print(controller.log_line())
 
-    # Draw last detections on every frame for continuous display
-    object_count = 0
-    for det in last_detections:
-        xmin, ymin, xmax, ymax = det['bbox']
-        class_name = det['class']
-        class_idx = det['classidx']
-        conf = det['conf']
-
-        # Draw box
-        color = bbox_colors[class_idx % 10]
-        cv2.rectangle(frame, (xmin,ymin), (xmax,ymax), color, 2)
-
-        label = f'{class_name}: {int(conf*100)}%'
-        labelSize, baseLine = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1) # Get font size
-        label_ymin = max(ymin, labelSize[1] + 10) # Make sure not to draw label too close to top of window
-        cv2.rectangle(frame, (xmin, label_ymin-labelSize[1]-10), (xmin+labelSize[0], label_ymin+baseLine-10), color, cv2.FILLED) # Draw white box to put label text in
-        cv2.putText(frame, label, (xmin, label_ymin-7), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1) # Draw label text
-
-        object_count = object_count + 1
-
-    # Calculate and draw framerate (if using video, USB, or Picamera source)
-    if source_type == 'video' or source_type == 'usb' or source_type == 'picamera':
-        cv2.putText(frame, f'FPS: {avg_frame_rate:0.2f}', (10,20), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2) # Draw framerate
-    
-    # Display detection results
-    cv2.putText(frame, f'Number of objects: {object_count}', (10,40), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2) # Draw total number of detected objects
-    cv2.imshow('YOLO detection results',frame) # Display image
-    if record == True: recorder.write(frame)
-
-    # If inferencing on individual images, wait for user keypress before moving to next image. Otherwise, wait 5ms before moving to next frame.
-    if source_type == 'image' or source_type == 'folder':
-        key = cv2.waitKey()
-    elif source_type == 'video' or source_type == 'usb' or source_type == 'picamera':
-        key = cv2.waitKey(5)
-    
-    if key == ord('q') or key == ord('Q'): # Press 'q' to quit
-        break
-    elif key == ord('s') or key == ord('S'): # Press 's' to pause inference
-        cv2.waitKey()
-    elif key == ord('p') or key == ord('P'): # Press 'p' to save a picture of results on this frame
-        cv2.imwrite('capture.png',frame)
-    
     # Calculate FPS for this frame
     t_stop = time.perf_counter()
     frame_rate_calc = float(1/(t_stop - t_start))
 
-    # Append FPS result to frame_rate_buffer (for finding average FPS over multiple frames)
-    if len(frame_rate_buffer) >= fps_avg_len:
-        temp = frame_rate_buffer.pop(0)
-        frame_rate_buffer.append(frame_rate_calc)
-    else:
-        frame_rate_buffer.append(frame_rate_calc) # <-- SINTAKS TELAH DIPERBAIKI
-
-    # Calculate average FPS for past frames
-    avg_frame_rate = np.mean(frame_rate_buffer)
+    # Append FPS result to frame_rate_buffer and read the running average (O(1))
+    frame_rate_buffer.append(frame_rate_calc)
+    avg_frame_rate = frame_rate_buffer.mean()
 
 
 # Clean up
 print(f'Average pipeline FPS: {avg_frame_rate:.2f}')
+if motion_gate is not None:
+    print(f'Motion gate: {motion_gate.summary()}')
+if controller is not None:
+    print(f'Adaptive: {controller.summary()}')
+if args.metrics_interval > 0:
+    print(metrics.log_line())
+if args.metrics_json:
+    extra = {'avg_fps': round(float(avg_frame_rate), 3)}
+    if motion_gate is not None:
+        extra['motion_gate'] = motion_gate.stats()
+    if controller is not None:
+        extra['adaptive'] = controller.stats()
+    metrics.dump_json(args.metrics_json, extra)
 if source_type == 'video' or source_type == 'usb':
     cap.release()
 elif source_type == 'picamera':
     cap.stop()
-if record == True: recorder.release()
-cv2.destroyAllWindows()
+if record == True:
+    recorder.close()
+    print(f'Recording: {recorder.summary()}')
+if clips is not None:
+    clips.close()
+    print(f'Event clips: {clips.summary()}')
+if not headless:
+    cv2.destroyAllWindows()
+
+# Buang antrian servo yang belum mulai, tunggu urutan yang sedang berjalan sebelum PWM dimatikan
+skipped_servo = 0
+while True:
+    try:
+        servo_queue.get_nowait()
+        skipped_servo += 1
+    except queue.Empty:
+        break
+if skipped_servo:
+    print(f"WARNING: {skipped_servo} urutan servo di antrian tidak dijalankan")
+servo_queue.put(None)
+if servo_thread.is_alive():
+    print("Menunggu servo selesai...")
+    servo_thread.join(timeout=15.0)
 
 # Bersihkan GPIO
 if GPIO_AVAILABLE == True:
@@ -0,0 +1,51 @@
+import numpy as np
+
+from yolo_postprocess import Detections, empty_detections
+from yolo_tracker import VotingTracker
+
+BOX = [100.0, 100.0, 180.0, 180.0]
+
+
+def dets(classidx=1, box=BOX):
+    return Detections(np.array([box], dtype=np.float32),
+                      np.array([0.9], dtype=np.float32),
+                      np.array([classidx], dtype=np.int32))
+
+
+def vote(tracker, start, classidx=1, step=0.1):
+    """Tiga update berturut-turut untuk objek di BOX; semua (track_id, classidx) yang dipicu."""
+    fired = []
+    for i in range(tracker.vote_frames):
+        fired += tracker.update(dets(classidx), now=start + i * step)
+    return fired
+
+
+def test_fires_once_per_object():
+    tracker = VotingTracker(vote_frames=3)
+    assert vote(tracker, 0.0) == [(1, 1)]
+    # Objek yang sama terus terlihat: tidak memicu lagi
+    assert tracker.update(dets(), now=0.3) == []
+
+
+def test_item_dropped_at_same_position_fires_again():
+    tracker = VotingTracker(vote_frames=3, max_age=1.5)
+    assert vote(tracker, 0.0) == [(1, 1)]
+    # Tidak ada update selama chute diam (motion gate / idle), lalu item baru di posisi yang sama
+    fired = vote(tracker, 10.0, classidx=2)
+    assert fired == [(2, 2)]
+
+
+def test_track_survives_short_gap():
+    tracker = VotingTracker(vote_frames=3, max_age=1.5)
+    assert vote(tracker, 0.0) == [(1, 1)]
+    # Jeda singkat di bawah max_age: masih objek yang sama
+    assert tracker.update(dets(), now=1.0) == []
+    assert [t.id for t in tracker.tracks] == [1]
+
+
+def test_missed_updates_still_expire_tracks():
+    tracker = VotingTracker(vote_frames=3, max_missed=2, max_age=100.0)
+    vote(tracker, 0.0)
+    for i in range(3):
+        tracker.update(empty_detections(), now=0.3 + i * 0.01)
+    assert tracker.tracks == []
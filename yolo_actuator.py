@@ -0,0 +1,8 @@
+# ========== POLICY ANTRIAN TERBATAS ==========
+#
+# Dipakai bersama oleh yolo_servo.ServoSequencer (antrian servo),
+# yolo_pipeline.StageQueue dan yolo_shm.CaptureProcess: apa yang terjadi
+# jika antrian penuh.
+
+POLICY_LATEST = 'latest'    # antrian penuh -> permintaan terlama diganti yang terbaru
+POLICY_DROP = 'drop'        # antrian penuh -> permintaan baru dibuang
@@ -0,0 +1,271 @@
+import os
+import time
+import threading
+from collections import deque
+
+# ========== KONTROL ADAPTIF: KAPAN INFERENCE DAN PADA IMGSZ BERAPA ==========
+
+MODE_ACTIVE = 'active'      # ada objek / track masih di-vote -> inference secepatnya
+MODE_IDLE = 'idle'          # chute kosong -> inference jarang
+
+THERMAL_ZONE = '/sys/class/thermal/thermal_zone0/temp'
+THROTTLED_FILE = '/sys/devices/platform/soc/soc:firmware/get_throttled'
+
+
+def read_cpu_temp(path=THERMAL_ZONE):
+    """Suhu CPU dalam derajat C, atau None jika tidak tersedia (bukan Linux / Pi)."""
+    try:
+        with open(path) as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        return None
+
+
+def read_firmware_throttled(path=THROTTLED_FILE):
+    """True jika firmware Pi sedang menurunkan clock (bit 1-3 get_throttled), None jika tidak tersedia."""
+    try:
+        with open(path) as f:
+            return bool(int(f.read().strip(), 16) & 0xE)
+    except (OSError, ValueError):
+        return None
+
+
+def imgsz_steps(imgsz, min_imgsz, step=32):
+    """[imgsz, imgsz - 32, ...] sampai min_imgsz (tetap kelipatan stride model)."""
+    return list(range(imgsz, max(min_imgsz, step) - 1, -step)) or [imgsz]
+
+
+class AdaptiveController:
+    """
+    Mengatur jeda antar inference dan imgsz berdasarkan aktivitas scene,
+    latensi inference, pemakaian CPU dan suhu.
+
+      active  objek terlihat atau track belum selesai di-vote (sampai `hold`
+              detik setelahnya): jeda `active_interval` (0 = setiap frame)
+      idle    jeda `idle_interval`, diperpanjang sampai 4x jika pemakaian
+              CPU proses melewati `cpu_budget`
+      panas   suhu >= `thermal_limit` atau firmware Pi throttling: imgsz
+              terkecil dan jeda idle minimal `throttle_interval`
+
+    imgsz turun satu langkah jika EWMA latensi inference > `target_latency`
+    (atau CPU di atas budget saat active) dan naik lagi jika perkiraan
+    latensi ukuran berikutnya < 90% target, paling cepat setiap `cooldown`
+    detik. Setiap keputusan dicatat
+    di `decisions` dan ikut di stats() / metrics JSON.
+    """
+
+    def __init__(self, sizes, target_latency=0.15, cpu_budget=0.75, active_interval=0.0, idle_interval=0.5,
+                 hold=2.0, thermal_limit=75.0, throttle_interval=2.0, cooldown=3.0, sample_period=1.0):
+        self.sizes = sorted(set(sizes), reverse=True)
+        self.target_latency = target_latency
+        self.cpu_budget = cpu_budget
+        self.active_interval = active_interval
+        self.idle_interval = idle_interval
+        self.hold = hold
+        self.thermal_limit = thermal_limit
+        self.throttle_interval = throttle_interval
+        self.cooldown = cooldown
+        self.sample_period = sample_period
+
+        self._lock = threading.Lock()
+        self._size_idx = 0
+        self._latency_ewma = None
+        self._load_interval = 0.0
+        self._t0 = time.monotonic()
+        self._last_infer = -1e9
+        self._last_active = -1e9
+        self._last_size_change = self._t0
+        self._last_mode_t = self._t0
+        self._throttled_since = None
+        self._cpu_t = time.process_time()
+        self._wall_t = self._t0
+        self._ncpu = os.cpu_count() or 1
+
+        self.mode = MODE_IDLE
+        self.throttled = False
+        self.cpu = 0.0
+        self.temp = read_cpu_temp()
+        self.decisions = deque(maxlen=100)
+
+        # Statistik
+        self.scheduled = 0
+        self.skipped = 0
+        self.gated = 0
+        self.mode_switches = 0
+        self.time_in_mode = {MODE_ACTIVE: 0.0, MODE_IDLE: 0.0}
+        self.time_throttled = 0.0
+
+    @property
+    def imgsz(self):
+        return self.sizes[self._size_idx]
+
+    @property
+    def interval(self):
+        """Jeda minimum antar inference untuk mode sekarang (detik)."""
+        if self.mode == MODE_ACTIVE:
+            return self.active_interval
+        interval = max(self.idle_interval, self._load_interval)
+        return max(interval, self.throttle_interval) if self.throttled else interval
+
+    def should_infer(self, now=None, gate=True):
+        """
+        True jika frame ini perlu di-inference (dipanggil sekali per frame).
+        `gate` = hasil filter sebelumnya (motion gate); frame yang ditolak
+        gate tidak memakai slot inference dan dihitung sebagai `gated`.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._sample(now)
+            self._set_mode(now, MODE_ACTIVE if now - self._last_active < self.hold else MODE_IDLE)
+            if not gate:
+                self.gated += 1
+                return False
+            if now - self._last_infer >= self.interval:
+                self._last_infer = now
+                self.scheduled += 1
+                return True
+            self.skipped += 1
+            return False
+
+    def record(self, seconds, active, now=None):
+        """Laporkan durasi inference dan apakah ada objek / track yang masih di-vote."""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._latency_ewma is None:
+                self._latency_ewma = seconds
+            else:
+                self._latency_ewma += 0.2 * (seconds - self._latency_ewma)
+            if active:
+                self._last_active = now
+                self._set_mode(now, MODE_ACTIVE)
+            self._adjust_size(now)
+
+    # ---------- keputusan ----------
+
+    def _decide(self, now, reason):
+        entry = {
+            't': round(now - self._t0, 2),
+            'reason': reason,
+            'mode': self.mode,
+            'imgsz': self.imgsz,
+            'interval_ms': round(self.interval * 1000.0, 1),
+            'infer_ms': round(self._latency_ewma * 1000.0, 1) if self._latency_ewma is not None else None,
+            'cpu_pct': round(self.cpu * 100.0, 1),
+            'temp_c': self.temp,
+        }
+        self.decisions.append(entry)
+        return entry
+
+    def _set_mode(self, now, mode):
+        if mode == self.mode:
+            return
+        self.time_in_mode[self.mode] += now - self._last_mode_t
+        self._last_mode_t = now
+        self.mode = mode
+        self.mode_switches += 1
+        self._decide(now, f'mode {mode}')
+
+    def _sample(self, now):
+        """CPU proses, suhu dan status throttling, paling sering setiap sample_period."""
+        dt = now - self._wall_t
+        if dt < self.sample_period:
+            return
+        cpu_now = time.process_time()
+        self.cpu = (cpu_now - self._cpu_t) / dt / self._ncpu
+        self._cpu_t, self._wall_t = cpu_now, now
+
+        self.temp = read_cpu_temp()
+        firmware = read_firmware_throttled()
+        hot = self.temp is not None and self.temp >= self.thermal_limit
+        # Hysteresis 5 C supaya tidak bolak-balik di sekitar batas
+        cooled = self.temp is None or self.temp < self.thermal_limit - 5.0
+        throttled = hot or bool(firmware) or (self.throttled and not cooled)
+        if throttled != self.throttled:
+            if throttled:
+                self._throttled_since = now
+            else:
+                self.time_throttled += now - self._throttled_since
+            self.throttled = throttled
+            print(f"ADAPTIVE: {'thermal throttling' if throttled else 'temperature back to normal'} "
+                  f"({self.temp if self.temp is not None else '?'} C)")
+            self._decide(now, 'thermal' if throttled else 'cooled')
+            self._adjust_size(now)
+
+        # Budget CPU hanya memperpanjang jeda idle; saat active akurasi sortir didahulukan
+        if self.cpu > self.cpu_budget:
+            longer = min(max(self._load_interval, self.idle_interval) * 1.5, 4.0 * self.idle_interval)
+            if longer != self._load_interval:
+                self._load_interval = longer
+                self._decide(now, 'cpu budget')
+        elif self._load_interval and self.cpu < 0.8 * self.cpu_budget:
+            self._load_interval = self._load_interval / 1.5
+            if self._load_interval <= self.idle_interval:
+                self._load_interval = 0.0
+            self._decide(now, 'cpu headroom')
+
+    def _adjust_size(self, now):
+        idx = self._size_idx
+        if self.throttled:
+            idx, reason = len(self.sizes) - 1, 'thermal'
+        elif self._latency_ewma is None or now - self._last_size_change < self.cooldown:
+            return
+        elif self._latency_ewma > self.target_latency:
+            idx, reason = min(idx + 1, len(self.sizes) - 1), 'latency'
+        elif self.mode == MODE_ACTIVE and self.cpu > self.cpu_budget:
+            idx, reason = min(idx + 1, len(self.sizes) - 1), 'cpu budget'
+        elif idx > 0 and self.cpu < 0.8 * self.cpu_budget and \
+                self._latency_ewma * (self.sizes[idx - 1] / self.imgsz) ** 2 < 0.9 * self.target_latency:
+            # Latensi kira-kira sebanding jumlah pixel; naik hanya jika ukuran berikutnya masih di bawah target
+            idx, reason = idx - 1, 'headroom'
+        else:
+            return
+        if idx == self._size_idx:
+            return
+        old = self.imgsz
+        self._size_idx = idx
+        self._last_size_change = now
+        entry = self._decide(now, reason)
+        # Latensi lama tidak berlaku untuk ukuran baru
+        self._latency_ewma = None
+        print(f"ADAPTIVE: imgsz {old} -> {self.imgsz} ({reason}, infer {entry['infer_ms']} ms, cpu {entry['cpu_pct']}%)")
+
+    # ---------- laporan ----------
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            time_in_mode = dict(self.time_in_mode)
+            time_in_mode[self.mode] += now - self._last_mode_t
+            time_throttled = self.time_throttled + (now - self._throttled_since if self.throttled else 0.0)
+            return {
+                'mode': self.mode,
+                'imgsz': self.imgsz,
+                'interval_ms': round(self.interval * 1000.0, 1),
+                'throttled': self.throttled,
+                'infer_ewma_ms': round(self._latency_ewma * 1000.0, 1) if self._latency_ewma is not None else None,
+                'cpu_pct': round(self.cpu * 100.0, 1),
+                'temp_c': self.temp,
+                'scheduled': self.scheduled,
+                'skipped': self.skipped,
+                'gated': self.gated,
+                'mode_switches': self.mode_switches,
+                'time_in_mode_s': {mode: round(s, 1) for mode, s in time_in_mode.items()},
+                'time_throttled_s': round(time_throttled, 1),
+                'decisions': list(self.decisions),
+            }
+
+    def log_line(self):
+        s = self.stats()
+        temp = f"{s['temp_c']:.1f} C" if s['temp_c'] is not None else 'n/a'
+        infer = f"{s['infer_ewma_ms']:.1f} ms" if s['infer_ewma_ms'] is not None else 'n/a'
+        return (f"ADAPTIVE {s['mode']}{' (throttled)' if s['throttled'] else ''} | imgsz {s['imgsz']} | "
+                f"interval {s['interval_ms']:.0f} ms | infer {infer} | cpu {s['cpu_pct']:.0f}% | temp {temp}")
+
+    def summary(self):
+        s = self.stats()
+        total = s['scheduled'] + s['skipped'] + s['gated']
+        pct = 100.0 * s['skipped'] / total if total else 0.0
+        gated = f", {s['gated']} skipped by the motion gate" if s['gated'] else ''
+        return (f"{s['scheduled']} inferences run, {s['skipped']} frames skipped ({pct:.1f}%){gated}, "
+                f"active {s['time_in_mode_s'][MODE_ACTIVE]:.0f}s / idle {s['time_in_mode_s'][MODE_IDLE]:.0f}s, "
+                f"throttled {s['time_throttled_s']:.0f}s, final imgsz {s['imgsz']}")
@@ -0,0 +1,404 @@
+import os
+import abc
+import ast
+import glob
+import time
+import hashlib
+
+import cv2
+import numpy as np
+
+from yolo_postprocess import Detections, empty_detections, extract_detections
+from yolo_preprocess import Letterbox
+
+# ========== BACKEND INFERENCE ==========
+#
+# Semua backend punya interface yang sama:
+#   backend.names                          -> {class_id: nama}
+#   backend.infer(image, min_thresh, ...)  -> Detections (koordinat `image`)
+#   backend.infer_batch(images, min_thresh)-> list of Detections
+#   backend.dynamic_imgsz                  -> True jika infer(..., imgsz=N) benar-benar
+#                                             menjalankan model pada ukuran N
+#   backend.batching                       -> True jika infer_batch lebih cepat dari
+#                                             infer satu per satu (satu panggilan model)
+#
+# 'ultralytics' memakai YOLO() seperti sebelumnya. 'onnx', 'ncnn' dan
+# 'openvino' memuat model hasil export Ultralytics langsung, dengan
+# preprocessing (letterbox + normalisasi) dan NMS sendiri, tanpa overhead
+# objek Results.
+#
+# Dengan `cache_dir`, hasil optimasi model disimpan dan dipakai ulang saat
+# start berikutnya (backend.cache_path / backend.cache_hit), supaya tidak
+# mengulang langkah yang mahal di Pi:
+#   onnx              -> graph yang sudah dioptimasi ONNX Runtime (tanpa
+#                        optimasi graph ulang saat load)
+#   openvino          -> blob hasil compile (CACHE_DIR OpenVINO, tanpa
+#                        compile ulang)
+#   ultralytics, ncnn -> tidak ada (Ultralytics sudah fuse Conv+BN sendiri
+#                        saat load; format NCNN sudah final)
+# cache_dir=CACHE_AUTO menaruh cache di folder model_cache di sebelah file
+# model, bukan di direktori kerja.
+#
+# 'server' tidak memuat model sendiri: `model_path` adalah alamat
+# yolo_server.py ('http://127.0.0.1:8765' atau 'unix:///tmp/yolo.sock').
+
+BACKENDS = ['ultralytics', 'onnx', 'ncnn', 'openvino', 'server']
+CACHE_AUTO = 'auto'
+
+
+def load_backend(name, model_path, imgsz=320, cache_dir=None):
+    """Buat backend berdasarkan nama (lihat BACKENDS)."""
+    if cache_dir == CACHE_AUTO:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(os.path.normpath(model_path))), 'model_cache')
+    if name == 'ultralytics':
+        return UltralyticsBackend(model_path, imgsz)
+    if name == 'onnx':
+        return OnnxBackend(model_path, imgsz, cache_dir)
+    if name == 'ncnn':
+        return NcnnBackend(model_path, imgsz)
+    if name == 'openvino':
+        return OpenVinoBackend(model_path, imgsz, cache_dir)
+    if name == 'server':
+        return RemoteBackend(model_path, imgsz)
+    raise ValueError(f'Unknown backend: {name} (choose from {", ".join(BACKENDS)})')
+
+
+def warmup_backend(backend, runs=3, imgsz=None):
+    """
+    Jalankan `runs` inference dummy pada ukuran input model (atau `imgsz`,
+    untuk ukuran lain yang dipakai kontrol adaptif), supaya alokasi memory,
+    setup predictor dan kernel selection terjadi sebelum frame pertama dari
+    kamera. Mengembalikan durasi tiap run (detik).
+    """
+    size = imgsz or backend.imgsz
+    dummy = np.full((size, size, 3), 114, dtype=np.uint8)
+    times = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        backend.infer(dummy, 0.99, imgsz=size)
+        times.append(time.perf_counter() - t)
+    return times
+
+
+def _cache_path(cache_dir, model_path, suffix):
+    """Path file cache untuk model ini; berubah jika file model berubah."""
+    st = os.stat(model_path)
+    key = f'{os.path.abspath(model_path)}:{st.st_size}:{st.st_mtime_ns}'
+    digest = hashlib.sha1(key.encode()).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(os.path.normpath(model_path)))[0]
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, f'{stem}-{digest}{suffix}')
+
+
+class ClassNames(dict):
+    """Dict class names; id yang tidak ada di metadata tetap punya nama."""
+
+    def __missing__(self, key):
+        return f'class{key}'
+
+
+def _load_metadata_names(model_dir):
+    """Baca class names dari metadata.yaml hasil export Ultralytics (jika ada)."""
+    path = os.path.join(model_dir, 'metadata.yaml')
+    if not os.path.exists(path):
+        return None
+    try:
+        import yaml
+        with open(path) as f:
+            meta = yaml.safe_load(f)
+        return {int(k): v for k, v in meta.get('names', {}).items()}
+    except Exception as e:
+        print(f'WARNING: Gagal membaca {path}: {e}')
+        return None
+
+
+def decode_yolo_output(pred, min_thresh, iou_thresh=0.45, max_det=300):
+    """
+    Decode output mentah YOLOv8/YOLO11 (4 + nc, N) atau (1, 4 + nc, N):
+    cx, cy, w, h + skor per kelas. Filter skor, lalu NMS per kelas.
+    """
+    pred = np.asarray(pred)
+    if pred.ndim == 3:
+        pred = pred[0]
+    pred = pred.T                           # (N, 4 + nc)
+
+    scores_all = pred[:, 4:]
+    classes = scores_all.argmax(axis=1)
+    scores = scores_all[np.arange(len(classes)), classes]
+    keep = scores > min_thresh
+    if not keep.any():
+        return empty_detections()
+
+    xywh = pred[keep, :4]
+    scores = scores[keep].astype(np.float32)
+    classes = classes[keep].astype(np.int32)
+
+    boxes = np.empty_like(xywh, dtype=np.float32)
+    boxes[:, 0] = xywh[:, 0] - xywh[:, 2] / 2
+    boxes[:, 1] = xywh[:, 1] - xywh[:, 3] / 2
+    boxes[:, 2] = xywh[:, 0] + xywh[:, 2] / 2
+    boxes[:, 3] = xywh[:, 1] + xywh[:, 3] / 2
+
+    # NMS per kelas: geser box tiap kelas supaya tidak saling overlap
+    offset = classes[:, None].astype(np.float32) * 4096.0
+    nms_boxes = boxes + offset
+    nms_xywh = np.concatenate([nms_boxes[:, :2], nms_boxes[:, 2:] - nms_boxes[:, :2]], axis=1)
+    idx = cv2.dnn.NMSBoxes(nms_xywh.tolist(), scores.tolist(), min_thresh, iou_thresh, top_k=max_det)
+    idx = np.array(idx, dtype=np.int64).reshape(-1)[:max_det]
+
+    return Detections(boxes[idx], scores[idx], classes[idx])
+
+
+# ---------- Ultralytics (default) ----------
+
+class UltralyticsBackend:
+    """YOLO() dari Ultralytics, path yang sudah ada sebelumnya."""
+
+    dynamic_imgsz = True
+    batching = True
+
+    def __init__(self, model_path, imgsz=320):
+        from ultralytics import YOLO
+        self.imgsz = imgsz
+        self.cache_path = None
+        self.cache_hit = False
+        self.model = YOLO(model_path, task='detect')
+        self.names = self.model.names
+
+    def infer(self, image, min_thresh, iou_thresh=0.45, max_det=300, imgsz=None):
+        results = self.model(image, imgsz=imgsz or self.imgsz, conf=min_thresh, iou=iou_thresh, max_det=max_det, verbose=False)
+        return extract_detections(results[0], min_thresh)
+
+    def infer_batch(self, images, min_thresh, iou_thresh=0.45, max_det=300, imgsz=None):
+        results = self.model(images, imgsz=imgsz or self.imgsz, conf=min_thresh, iou=iou_thresh, max_det=max_det, verbose=False)
+        return [extract_detections(r, min_thresh) for r in results]
+
+
+# ---------- Backend native (preprocessing + NMS sendiri) ----------
+
+class _NativeBackend(abc.ABC):
+    """
+    Bagian bersama backend native: letterbox, blob NCHW float32, decode.
+
+    infer_batch hanya menjadi satu panggilan model jika `batching` True
+    (ONNX yang di-export dengan batch dinamis); selain itu gambar dijalankan
+    satu per satu.
+    """
+
+    # Model hasil export punya ukuran input tetap; argumen imgsz dari infer() diabaikan
+    dynamic_imgsz = False
+    batching = False
+
+    def __init__(self, imgsz):
+        self.names = ClassNames()
+        self.cache_path = None
+        self.cache_hit = False
+        self._set_imgsz(imgsz)
+
+    def _set_imgsz(self, imgsz):
+        self.imgsz = imgsz
+        self._letterbox = Letterbox(imgsz)
+        self._blob = np.empty((1, 3, imgsz, imgsz), dtype=np.float32)
+        # Satu letterbox per posisi batch: padding / skala tiap gambar disimpan sendiri
+        self._batch_letterboxes = []
+
+    @staticmethod
+    def _fill_blob(image, out):
+        """BGR uint8 imgsz x imgsz -> RGB CHW float32 0..1 ke `out` (3, imgsz, imgsz)."""
+        for c in range(3):
+            np.multiply(image[:, :, 2 - c], 1.0 / 255.0, out=out[c], casting='unsafe')
+
+    def _to_blob(self, image):
+        """Satu gambar -> blob NCHW (1, 3, imgsz, imgsz) (buffer dipakai ulang)."""
+        self._fill_blob(image, self._blob[0])
+        return self._blob[:1]
+
+    @abc.abstractmethod
+    def _run(self, blob):
+        """Blob NCHW float32 -> output mentah model (N, 4 + nc, anchors)."""
+
+    def infer(self, image, min_thresh, iou_thresh=0.45, max_det=300, imgsz=None):
+        h, w = image.shape[:2]
+        needs_letterbox = (h, w) != (self.imgsz, self.imgsz)
+        model_input = self._letterbox(image) if needs_letterbox else image
+
+        pred = self._run(self._to_blob(model_input))
+        dets = decode_yolo_output(pred, min_thresh, iou_thresh, max_det)
+        if needs_letterbox and len(dets.confs):
+            dets = dets._replace(boxes=self._letterbox.scale_boxes(dets.boxes))
+        return dets
+
+    def infer_batch(self, images, min_thresh, iou_thresh=0.45, max_det=300, imgsz=None):
+        if not self.batching or len(images) <= 1:
+            return [self.infer(img, min_thresh, iou_thresh, max_det) for img in images]
+
+        n = len(images)
+        if len(self._blob) < n:
+            self._blob = np.empty((n, 3, self.imgsz, self.imgsz), dtype=np.float32)
+        while len(self._batch_letterboxes) < n:
+            self._batch_letterboxes.append(Letterbox(self.imgsz))
+        letterboxes = []
+        for i, image in enumerate(images):
+            lb = self._batch_letterboxes[i] if image.shape[:2] != (self.imgsz, self.imgsz) else None
+            self._fill_blob(lb(image) if lb is not None else image, self._blob[i])
+            letterboxes.append(lb)
+
+        preds = self._run(self._blob[:n])
+        results = []
+        for pred, lb in zip(preds, letterboxes):
+            dets = decode_yolo_output(pred, min_thresh, iou_thresh, max_det)
+            if lb is not None and len(dets.confs):
+                dets = dets._replace(boxes=lb.scale_boxes(dets.boxes))
+            results.append(dets)
+        return results
+
+
+class OnnxBackend(_NativeBackend):
+    """ONNX Runtime (CPUExecutionProvider) untuk model hasil `yolo export format=onnx`."""
+
+    def __init__(self, model_path, imgsz=320, cache_dir=None):
+        super().__init__(imgsz)
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError('Backend onnx membutuhkan paket onnxruntime (pip install onnxruntime)')
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        load_path = model_path
+        if cache_dir:
+            # Graph hasil optimasi disimpan sekali; start berikutnya tidak perlu optimasi ulang
+            self.cache_path = _cache_path(cache_dir, model_path, '.ort.onnx')
+            if os.path.exists(self.cache_path):
+                load_path = self.cache_path
+                self.cache_hit = True
+                opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            else:
+                opts.optimized_model_filepath = self.cache_path
+        self.session = ort.InferenceSession(load_path, opts, providers=['CPUExecutionProvider'])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+
+        # Dimensi statis berupa int, dimensi dinamis berupa nama (str) atau None
+        batch, _, h, w = model_input.shape
+        if isinstance(h, int) and isinstance(w, int):
+            if h != w:
+                raise RuntimeError(f'Input model ONNX {h}x{w} tidak persegi; export ulang dengan imgsz tunggal')
+            if h != imgsz:
+                print(f'WARNING: Model ONNX di-export dengan imgsz {h}, --imgsz {imgsz} diabaikan')
+                self._set_imgsz(h)
+        self.batching = not isinstance(batch, int)
+
+        # Ultralytics menyimpan names sebagai string dict di metadata ONNX
+        meta = self.session.get_modelmeta().custom_metadata_map
+        if 'names' in meta:
+            self.names = ClassNames({int(k): v for k, v in ast.literal_eval(meta['names']).items()})
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class NcnnBackend(_NativeBackend):
+    """NCNN untuk folder hasil `yolo export format=ncnn` (model.ncnn.param/.bin)."""
+
+    def __init__(self, model_path, imgsz=320):
+        super().__init__(imgsz)
+        try:
+            import ncnn
+        except ImportError:
+            raise RuntimeError('Backend ncnn membutuhkan paket ncnn (pip install ncnn)')
+
+        self.net = ncnn.Net()
+        self.net.opt.use_vulkan_compute = False
+        self.net.opt.num_threads = os.cpu_count() or 4
+        param = glob.glob(os.path.join(model_path, '*.param'))
+        weights = glob.glob(os.path.join(model_path, '*.bin'))
+        if not param or not weights:
+            raise RuntimeError(f'File .param/.bin NCNN tidak ditemukan di {model_path}')
+        self.net.load_param(param[0])
+        self.net.load_model(weights[0])
+        self._ncnn = ncnn
+        self.names = ClassNames(_load_metadata_names(model_path) or {})
+
+    def _run(self, blob):
+        ncnn = self._ncnn
+        mat_in = ncnn.Mat(blob[0])
+        with self.net.create_extractor() as ex:
+            ex.input(self.net.input_names()[0], mat_in)
+            _, mat_out = ex.extract(self.net.output_names()[0])
+        return np.array(mat_out)
+
+
+class OpenVinoBackend(_NativeBackend):
+    """OpenVINO (device CPU) untuk folder hasil `yolo export format=openvino`."""
+
+    def __init__(self, model_path, imgsz=320, cache_dir=None):
+        super().__init__(imgsz)
+        try:
+            import openvino as ov
+        except ImportError:
+            raise RuntimeError('Backend openvino membutuhkan paket openvino (pip install openvino)')
+
+        xml = model_path
+        if os.path.isdir(model_path):
+            found = glob.glob(os.path.join(model_path, '*.xml'))
+            if not found:
+                raise RuntimeError(f'File .xml OpenVINO tidak ditemukan di {model_path}')
+            xml = found[0]
+        core = ov.Core()
+        if cache_dir:
+            # OpenVINO menyimpan blob hasil compile di CACHE_DIR dan memakainya ulang sendiri
+            os.makedirs(cache_dir, exist_ok=True)
+            before = set(os.listdir(cache_dir))
+            core.set_property({'CACHE_DIR': cache_dir})
+            self.cache_path = cache_dir
+        self.compiled = core.compile_model(xml, 'CPU')
+        if cache_dir:
+            self.cache_hit = bool(before) and not (set(os.listdir(cache_dir)) - before)
+        self.output = self.compiled.output(0)
+        self.names = ClassNames(_load_metadata_names(os.path.dirname(xml)) or {})
+
+    def _run(self, blob):
+        return self.compiled(blob)[self.output]
+
+
+# ---------- Backend remote (model di yolo_server.py) ----------
+
+class RemoteBackend:
+    """
+    Kirim frame ke server inference lokal (yolo_server.py). Model tetap di
+    RAM server dan dipakai bersama oleh beberapa proses; request yang datang
+    bersamaan di-batch oleh server.
+    """
+
+    # Ukuran input ditentukan oleh server; argumen imgsz dari infer() diabaikan
+    dynamic_imgsz = False
+    batching = True
+
+    def __init__(self, address, imgsz=320):
+        from yolo_client import YoloClient
+        self.client = YoloClient(address)
+        try:
+            info = self.client.info()
+        except OSError as e:
+            raise RuntimeError(f'Server inference di {address} tidak bisa dihubungi: {e}')
+        self.names = ClassNames(info['names'])
+        self.imgsz = info.get('imgsz', imgsz)
+        self.cache_path = None
+        self.cache_hit = False
+        self._pool = None
+
+    def infer(self, image, min_thresh, iou_thresh=0.45, max_det=300, imgsz=None):
+        dets = self.client.detect(image, min_thresh)
+        if len(dets.confs) > max_det:
+            dets = Detections(dets.boxes[:max_det], dets.confs[:max_det], dets.classes[:max_det])
+        return dets
+
+    def infer_batch(self, images, min_thresh, iou_thresh=0.45, max_det=300, imgsz=None):
+        # Request paralel supaya server bisa menjalankannya sebagai satu batch
+        if len(images) <= 1:
+            return [self.infer(img, min_thresh, iou_thresh, max_det) for img in images]
+        if self._pool is None:
+            from concurrent.futures import ThreadPoolExecutor
+            self._pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix='remote-infer')
+        return list(self._pool.map(lambda img: self.infer(img, min_thresh, iou_thresh, max_det), images))
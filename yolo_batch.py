@@ -0,0 +1,83 @@
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+# ========== DECODE GAMBAR DI THREAD POOL ==========
+
+def iter_image_batches(paths, batch_size, workers=4, prefetch=2):
+    """
+    Yield (batch_paths, batch_images) dari daftar file gambar.
+
+    cv2.imread dijalankan di thread pool dan selalu berjalan di depan model
+    (maksimal batch_size * prefetch gambar antri), jadi decode JPEG overlap
+    dengan inference. File yang gagal dibaca dilewati dengan warning.
+    """
+    paths = iter(paths)
+    pending = deque()
+    max_pending = max(batch_size * prefetch, batch_size)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+
+        def fill():
+            while len(pending) < max_pending:
+                path = next(paths, None)
+                if path is None:
+                    return
+                pending.append((path, pool.submit(cv2.imread, path)))
+
+        fill()
+        while pending:
+            batch_paths, batch_images = [], []
+            while pending and len(batch_paths) < batch_size:
+                path, future = pending.popleft()
+                img = future.result()
+                if img is None:
+                    print(f'WARNING: Gagal membaca gambar {path}, dilewati.')
+                    continue
+                batch_paths.append(path)
+                batch_images.append(img)
+            fill()
+            if batch_paths:
+                yield batch_paths, batch_images
+
+
+# ========== MODE BATCH HEADLESS ==========
+
+def run_folder_batch(model, paths, labels, min_thresh, output_path, batch_size=8, workers=4):
+    """
+    Inference semua gambar di `paths` secara batch tanpa display
+    (`model` adalah backend dari yolo_backend.load_backend).
+
+    Hasil per gambar langsung di-stream ke `output_path` (JSON Lines), satu
+    baris per gambar. Mengembalikan jumlah gambar yang diproses.
+    """
+    n_images = 0
+    n_objects = 0
+    t_start = time.perf_counter()
+
+    with open(output_path, 'w') as out:
+        for batch_paths, batch_images in iter_image_batches(paths, batch_size, workers):
+            results = model.infer_batch(batch_images, min_thresh)
+
+            for path, dets in zip(batch_paths, results):
+                record = {
+                    'file': path,
+                    'detections': [
+                        {'class': labels[c], 'conf': round(conf, 4), 'box': [round(v, 1) for v in box]}
+                        for box, conf, c in zip(dets.boxes.tolist(), dets.confs.tolist(), dets.classes.tolist())
+                    ],
+                }
+                out.write(json.dumps(record) + '\n')
+                n_objects += len(record['detections'])
+
+            n_images += len(batch_paths)
+            print(f'  {n_images}/{len(paths)} images processed')
+
+    elapsed = time.perf_counter() - t_start
+    rate = n_images / elapsed if elapsed > 0 else 0.0
+    print(f'Batch selesai: {n_images} images, {n_objects} objects in {elapsed:.1f}s ({rate:.2f} images/sec)')
+    print(f'Results saved to: {output_path}')
+    return n_images
@@ -0,0 +1,287 @@
+"""
+YOLO Pipeline Benchmark
+Replays a video, an image folder or synthetic frames through the same
+capture -> preprocess -> inference -> postprocess -> actuation path as
+yolo_detect.py (ServoSequencer with servo and audio simulated), for every combination of
+--imgsz, --backend and --skip, and writes the results to a JSON file.
+Every configuration runs in its own child process, so its peak RSS is
+its own (model load included) and not the peak of an earlier run.
+
+Example:
+    python yolo_benchmark.py --model my_model_ncnn_model --source synthetic \\
+        --backend ultralytics,ncnn --imgsz 256,320 --skip none,motion,every2
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import itertools
+import platform
+import resource
+import multiprocessing as mp
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from yolo_backend import BACKENDS, load_backend
+from yolo_preprocess import Letterbox
+import yolo_servo
+from yolo_servo import ServoSequencer, load_servo_config
+from yolo_tracker import VotingTracker
+from yolo_metrics import StageTimer
+from yolo_motion import MotionGate
+
+def skip_list(value):
+    """--skip 'none,motion,every2' -> ['none', 'motion', 'every2']; ditolak jika ada nama yang salah."""
+    skips = [s.strip() for s in value.split(',') if s.strip()]
+    for name in skips:
+        if name in ('none', 'motion'):
+            continue
+        if not name.startswith('every') or not name[5:].isdigit() or int(name[5:]) < 1:
+            raise argparse.ArgumentTypeError(f'invalid skip policy {name!r} (use none, motion or everyN with N >= 1)')
+    if not skips:
+        raise argparse.ArgumentTypeError('no skip policy given')
+    return skips
+
+
+# Parse arguments
+parser = argparse.ArgumentParser(description='YOLO Pipeline Benchmark')
+parser.add_argument('--model', required=True, help='Path to model (file or exported model folder)')
+parser.add_argument('--source', default='synthetic', help='Video file, image folder, or "synthetic" (default: synthetic)')
+parser.add_argument('--resolution', default='640x480', help='Synthetic frame size WxH (default: 640x480)')
+parser.add_argument('--backend', default='ultralytics', help=f'Comma-separated backends to compare ({", ".join(BACKENDS)})')
+parser.add_argument('--imgsz', default='320', help='Comma-separated model input sizes (default: 320)')
+parser.add_argument('--skip', default=['none'], type=skip_list, help='Comma-separated skip policies: none, motion, everyN (e.g. every2) (default: none)')
+parser.add_argument('--frames', type=int, default=300, help='Frames measured per configuration (default: 300)')
+parser.add_argument('--warmup', type=int, default=10, help='Unmeasured warm-up inferences per configuration (default: 10)')
+parser.add_argument('--thresh', type=float, default=0.5, help='Confidence threshold (default: 0.5)')
+parser.add_argument('--servo-config', default=None, help='JSON file with servo duty cycle / timing overrides, as for yolo_detect.py')
+parser.add_argument('--no-servo-overlap', action='store_true', help='Finish each servo sequence before the bin turns for the next item')
+parser.add_argument('--output', default='benchmark_results.json', help='Results file (default: benchmark_results.json)')
+
+args = parser.parse_args()
+
+# Servo selalu disimulasikan (tanpa init_hardware), juga di Pi: urutan dan durasinya sama
+# dengan yolo_detect.py tapi tidak ada pin yang digerakkan
+yolo_servo.GPIO_AVAILABLE = False
+if args.servo_config:
+    load_servo_config(args.servo_config)
+
+img_ext_list = ['.jpg','.JPG','.jpeg','.JPEG','.png','.PNG','.bmp','.BMP']
+SERVO_CLASSES = ['non-organic', 'organic', 'b3']
+
+
+# ========== SUMBER FRAME ==========
+
+def synthetic_frames(width, height, seed=0):
+    """
+    Frame sintetis: latar statis dengan noise sensor ringan, dan sebuah
+    'objek' yang sesekali jatuh melewati frame (supaya motion gate dan
+    tracker ikut teruji).
+    """
+    rng = np.random.default_rng(seed)
+    background = rng.integers(60, 120, size=(height, width, 3), dtype=np.uint8)
+    frame = np.empty_like(background)
+    period = 90
+    i = 0
+    while True:
+        np.copyto(frame, background)
+        phase = i % period
+        if phase < 30:
+            y = int(phase / 30 * (height - 80))
+            x = width // 2 - 40
+            cv2.rectangle(frame, (x, y), (x + 80, y + 80), (40, 160, 220), cv2.FILLED)
+        yield frame
+        i += 1
+
+
+def source_frames(source):
+    """Generator frame dari video / folder, diulang terus jika habis."""
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, '*')) if os.path.splitext(p)[1] in img_ext_list)
+        if not paths:
+            raise RuntimeError(f'No images found in {source}')
+        images = [cv2.imread(p) for p in paths]
+        images = [img for img in images if img is not None]
+        for img in itertools.cycle(images):
+            yield img
+    else:
+        while True:
+            cap = cv2.VideoCapture(source)
+            if not cap.isOpened():
+                raise RuntimeError(f'Cannot open video {source}')
+            while True:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                yield frame
+            cap.release()
+
+
+def make_frames():
+    if args.source == 'synthetic':
+        w, h = map(int, args.resolution.split('x'))
+        return synthetic_frames(w, h)
+    return source_frames(args.source)
+
+
+# ========== SATU KONFIGURASI ==========
+
+def make_skip_policy(name):
+    """Kembalikan (fungsi should_infer(frame, frame_idx), motion_gate atau None)."""
+    if name == 'none':
+        return (lambda frame, idx: True), None
+    if name == 'motion':
+        gate = MotionGate()
+        return (lambda frame, idx: gate.should_infer(frame)), gate
+    if name.startswith('every'):
+        n = int(name[5:])
+        return (lambda frame, idx: idx % n == 0), None
+    raise ValueError(f'Unknown skip policy: {name}')
+
+
+def peak_rss_mb():
+    # ru_maxrss: KB di Linux, byte di macOS. Puncak seumur proses, jadi hanya
+    # bermakna per konfigurasi karena setiap konfigurasi punya proses sendiri.
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == 'darwin' else rss / 1024
+
+
+def run_config(model, backend_name, imgsz, skip_name):
+    labels = model.names
+    letterbox = Letterbox(imgsz)
+    tracker = VotingTracker()
+    should_infer, gate = make_skip_policy(skip_name)
+
+    actuator = ServoSequencer(maxsize=1, overlap=not args.no_servo_overlap).start()
+    metrics = StageTimer(window=max(args.frames, 1))
+    frames = make_frames()
+
+    # Warm-up (tidak diukur)
+    for _ in range(args.warmup):
+        model.infer(letterbox(next(frames)), args.thresh)
+
+    inferences = 0
+    objects = 0
+    t_begin = time.perf_counter()
+    for idx in range(args.frames):
+        t = time.perf_counter()
+        frame = next(frames)
+        t = metrics.mark('capture', t)
+
+        if not should_infer(frame, idx):
+            continue
+        model_input = letterbox(frame)
+        t = metrics.mark('preprocess', t)
+
+        dets = model.infer(model_input, args.thresh)
+        t = metrics.mark('inference', t)
+
+        dets = dets._replace(boxes=letterbox.scale_boxes(dets.boxes))
+        t = metrics.mark('postprocess', t)
+
+        for track_id, classidx in tracker.update(dets):
+            if labels[classidx] in SERVO_CLASSES:
+                actuator.submit(labels[classidx])
+        metrics.mark('actuation', t)
+
+        inferences += 1
+        objects += len(dets.confs)
+    elapsed = time.perf_counter() - t_begin
+    # Gerakan yang sudah dijadwalkan diselesaikan (tidak ikut diukur)
+    actuator.stop(timeout=30.0)
+
+    result = {
+        'backend': backend_name,
+        'imgsz': imgsz,
+        'skip': skip_name,
+        'frames': args.frames,
+        'inferences': inferences,
+        'objects': objects,
+        'elapsed_s': round(elapsed, 3),
+        'fps': round(args.frames / elapsed, 2) if elapsed > 0 else 0.0,
+        'inferences_per_s': round(inferences / elapsed, 2) if elapsed > 0 else 0.0,
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+        'stages': metrics.summary(),
+        'actuator': actuator.stats(),
+    }
+    if gate is not None:
+        result['motion_gate'] = gate.stats()
+    return result
+
+
+def config_main(conn, backend_name, imgsz, skip_name):
+    """Isi proses anak: load model, jalankan satu konfigurasi, kirim hasilnya."""
+    try:
+        t0 = time.perf_counter()
+        model = load_backend(backend_name, args.model, imgsz=imgsz)
+        load_s = time.perf_counter() - t0
+        result = run_config(model, backend_name, imgsz, skip_name)
+        result['load_s'] = round(load_s, 3)
+        conn.send(('ok', result))
+    except Exception as e:
+        conn.send(('error', f'{type(e).__name__}: {e}'))
+    finally:
+        conn.close()
+
+
+def run_isolated(backend_name, imgsz, skip_name):
+    """Jalankan config_main di proses baru; (status, hasil atau pesan error)."""
+    # fork: script ini tidak di-import ulang di proses anak (tidak ada __main__ guard)
+    ctx = mp.get_context('fork')
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=config_main, args=(child_conn, backend_name, imgsz, skip_name))
+    proc.start()
+    child_conn.close()
+    try:
+        reply = parent_conn.recv()
+    except EOFError:
+        reply = None
+    proc.join()
+    if reply is None:
+        return 'error', f'benchmark process exited with code {proc.exitcode}'
+    return reply
+
+
+# ========== MAIN ==========
+
+backends = [b.strip() for b in args.backend.split(',') if b.strip()]
+sizes = [int(s) for s in args.imgsz.split(',') if s.strip()]
+skips = args.skip
+
+for b in backends:
+    if b not in BACKENDS:
+        print(f'ERROR: Unknown backend {b}. Choose from {", ".join(BACKENDS)}')
+        sys.exit(1)
+
+results = []
+for backend_name, imgsz in itertools.product(backends, sizes):
+    print(f'{backend_name} backend (imgsz {imgsz}):')
+    for skip_name in skips:
+        print(f'  Running skip={skip_name} for {args.frames} frames...')
+        status, result = run_isolated(backend_name, imgsz, skip_name)
+        if status != 'ok':
+            print(f'  SKIPPED: {result}')
+            continue
+        results.append(result)
+        inf = result['stages'].get('inference', {})
+        print(f"  {result['fps']:.1f} FPS, {result['inferences_per_s']:.1f} inferences/s, "
+              f"inference p50/p95/p99 {inf.get('p50_ms', 0):.1f}/{inf.get('p95_ms', 0):.1f}/{inf.get('p99_ms', 0):.1f} ms, "
+              f"load {result['load_s']:.1f}s, peak RSS {result['peak_rss_mb']:.0f} MB")
+
+report = {
+    'created': datetime.now().isoformat(timespec='seconds'),
+    'model': args.model,
+    'source': args.source,
+    'platform': platform.platform(),
+    'machine': platform.machine(),
+    'cpu_count': os.cpu_count(),
+    'results': results,
+}
+with open(args.output, 'w') as f:
+    json.dump(report, f, indent=2)
+print(f'\nBenchmark results saved to {args.output}')
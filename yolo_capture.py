@@ -0,0 +1,179 @@
+import os
+import time
+import threading
+
+import cv2
+
+# ========== CAPTURE THREAD (FRAME TERBARU SAJA) ==========
+
+class LatestFrameReader:
+    """
+    Membaca frame kamera di thread terpisah dan hanya menyimpan frame terbaru.
+
+    Frame lama yang belum sempat diambil loop inference akan ditimpa
+    (dihitung di frames_dropped), sehingga inference selalu memproses
+    kondisi terkini dan buffer driver tidak menumpuk frame basi.
+    """
+
+    def __init__(self, cap, max_failures=10, name='capture'):
+        self.cap = cap
+        self.max_failures = max_failures
+
+        self._cond = threading.Condition()
+        self._frame = None
+        self._seq = 0           # nomor frame terakhir dari kamera
+        self._taken_seq = 0     # nomor frame terakhir yang diambil read()
+        self._running = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+        # Statistik
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.read_failures = 0
+
+    def start(self):
+        """Mulai thread capture. Mengembalikan self agar bisa di-chain."""
+        # Minta driver hanya menyimpan 1 frame (tidak semua backend mendukung)
+        try:
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        except Exception:
+            pass
+        self._running = True
+        self._thread.start()
+        return self
+
+    def _run(self):
+        consecutive_failures = 0
+        while self._running:
+            try:
+                ret, frame = self.cap.read()
+            except Exception as e:
+                print(f"ERROR capture thread: {e}")
+                ret, frame = False, None
+
+            if not ret or frame is None:
+                consecutive_failures += 1
+                self.read_failures += 1
+                if consecutive_failures >= self.max_failures:
+                    print('CRITICAL: Capture thread berhenti, terlalu banyak frame gagal dibaca.')
+                    break
+                time.sleep(0.01)
+                continue
+
+            consecutive_failures = 0
+            with self._cond:
+                # Frame sebelumnya belum diambil -> dibuang
+                if self._seq != self._taken_seq:
+                    self.frames_dropped += 1
+                self._frame = frame
+                self._seq += 1
+                self.frames_read += 1
+                self._cond.notify_all()
+
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def read(self, timeout=2.0):
+        """
+        Ambil frame terbaru yang belum pernah diambil.
+
+        Returns:
+            (ret, frame) seperti cv2.VideoCapture.read(). ret False jika
+            kamera berhenti atau tidak ada frame baru dalam `timeout` detik.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq != self._taken_seq or not self._running, timeout)
+            if self._seq == self._taken_seq:
+                return False, None
+            self._taken_seq = self._seq
+            return True, self._frame
+
+    def stop(self):
+        """Hentikan thread capture (tidak me-release kamera)."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout=1.0)
+
+    def stats(self):
+        return {
+            'frames_read': self.frames_read,
+            'frames_dropped': self.frames_dropped,
+            'read_failures': self.read_failures,
+        }
+
+
+# ========== SUMBER FRAME PER KAMERA (MODE MULTI-KAMERA) ==========
+
+class CameraSource:
+    """
+    Satu sumber frame: 'usbN', 'picameraN' atau file video.
+
+    Kamera USB dibaca lewat LatestFrameReader (selalu frame terbaru), file
+    video dibaca berurutan. read() mengembalikan (ret, frame BGR) seperti
+    cv2.VideoCapture.read().
+
+    threaded=False membaca kamera USB langsung di thread pemanggil (dipakai
+    oleh proses capture yolo_shm, yang memang hanya membaca kamera).
+    """
+
+    def __init__(self, source, resolution=None, threaded=True):
+        self.name = source
+        self._cap = None
+        self._reader = None
+        self._picam = None
+
+        if source.startswith('usb'):
+            self._cap = cv2.VideoCapture(int(source[3:]), cv2.CAP_V4L2)
+            if resolution:
+                self._cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
+                self._cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
+            if not self._cap.isOpened():
+                raise RuntimeError(f'Cannot open camera {source}')
+            if threaded:
+                self._reader = LatestFrameReader(self._cap, name=f'capture-{source}').start()
+            self.live = True
+        elif source.startswith('picamera'):
+            from picamera2 import Picamera2
+            self._picam = Picamera2(int(source[8:] or 0))
+            size = tuple(resolution) if resolution else (640, 480)
+            self._picam.configure(self._picam.create_video_configuration(main={"format": 'XRGB8888', "size": size}))
+            self._picam.start()
+            self.live = True
+        elif os.path.isfile(source):
+            self._cap = cv2.VideoCapture(source)
+            if not self._cap.isOpened():
+                raise RuntimeError(f'Cannot open video {source}')
+            self.live = False
+        else:
+            raise ValueError(f'Unsupported source: {source} (use usbN, picameraN or a video file)')
+
+    def read(self, out=None):
+        """
+        (ret, frame). Dengan `out` (array BGR uint8 berukuran sama) frame
+        ditulis langsung ke `out` jika sumbernya mendukung: cap.read(out)
+        dan cvtColor(dst=out) tanpa array perantara.
+        """
+        if self._reader is not None:
+            ret, frame = self._reader.read()
+        elif self._picam is not None:
+            # XRGB8888 -> BGR langsung ke buffer tujuan (capture_array sudah berupa salinan)
+            frame = self._picam.capture_array()
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR) if out is None else cv2.cvtColor(frame, cv2.COLOR_BGRA2BGR, dst=out)
+            ret = True
+        else:
+            ret, frame = self._cap.read() if out is None else self._cap.read(out)
+        return ret, frame
+
+    def release(self):
+        if self._reader is not None:
+            self._reader.stop()
+        if self._cap is not None:
+            self._cap.release()
+        if self._picam is not None:
+            self._picam.stop()
+
+    def stats(self):
+        return self._reader.stats() if self._reader is not None else {}
@@ -0,0 +1,126 @@
+import json
+import socket
+import threading
+import http.client
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from yolo_postprocess import decode_detections
+
+# ========== CLIENT UNTUK yolo_server.py ==========
+#
+# Alamat: 'http://127.0.0.1:8765' (localhost HTTP) atau 'unix:///tmp/yolo.sock'.
+#
+#   client = YoloClient('unix:///tmp/yolo.sock')
+#   dets = client.detect(frame, thresh=0.5)     # -> Detections (koordinat frame)
+#   client.names                                # {class_id: nama}
+#
+# Hanya butuh NumPy (cv2 hanya untuk encoding='jpg'). Aman dipakai dari
+# beberapa thread: setiap thread memakai koneksi keep-alive sendiri, dan
+# request yang datang bersamaan di-batch oleh server.
+
+DEFAULT_ADDRESS = 'http://127.0.0.1:8765'
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection lewat Unix domain socket."""
+
+    def __init__(self, path, timeout=None):
+        super().__init__('localhost', timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+class YoloClient:
+    """Client tipis untuk server inference lokal (lihat yolo_server.py)."""
+
+    def __init__(self, address=DEFAULT_ADDRESS, timeout=10.0):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+        self._names = None
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.address.startswith('unix://'):
+                conn = _UnixHTTPConnection(self.address[len('unix://'):], timeout=self.timeout)
+            else:
+                url = urlsplit(self.address)
+                conn = http.client.HTTPConnection(url.hostname or '127.0.0.1', url.port or 8765, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method, path, body=None, headers=None):
+        # Satu kali coba ulang: koneksi keep-alive bisa sudah ditutup server
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                data = resp.read()
+                break
+            except (ConnectionError, http.client.HTTPException, OSError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+        if resp.status != 200:
+            raise RuntimeError(f'Server error {resp.status}: {data[:200].decode(errors="replace")}')
+        return data
+
+    def info(self):
+        """{'backend', 'model', 'imgsz', 'names'} dari server."""
+        info = json.loads(self._request('GET', '/info'))
+        info['names'] = {int(k): v for k, v in info['names'].items()}
+        return info
+
+    @property
+    def names(self):
+        if self._names is None:
+            self._names = self.info()['names']
+        return self._names
+
+    def stats(self):
+        """Statistik batching server."""
+        return json.loads(self._request('GET', '/stats'))
+
+    def detect(self, image, thresh=0.5, encoding='raw', quality=90):
+        """
+        Deteksi pada `image` (BGR uint8). encoding 'raw' mengirim pixel apa
+        adanya (paling cepat di mesin yang sama), 'jpg' mengirim JPEG
+        (lebih kecil). Mengembalikan Detections dalam koordinat `image`.
+        """
+        if encoding == 'raw':
+            image = np.ascontiguousarray(image, dtype=np.uint8)
+            h, w = image.shape[:2]
+            c = image.shape[2] if image.ndim == 3 else 1
+            body = image.tobytes()
+            headers = {'Content-Type': 'application/octet-stream', 'X-Shape': f'{h},{w},{c}'}
+        elif encoding == 'jpg':
+            import cv2
+            ok, buf = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+            if not ok:
+                raise RuntimeError('imencode failed')
+            body = buf.tobytes()
+            headers = {'Content-Type': 'image/jpeg'}
+        else:
+            raise ValueError(f'Unknown encoding: {encoding}')
+        return self.detect_encoded(body, thresh, headers)
+
+    def detect_encoded(self, body, thresh=0.5, headers=None):
+        """Deteksi pada gambar yang sudah ter-encode (mis. isi file JPEG)."""
+        headers = headers or {'Content-Type': 'image/jpeg'}
+        return decode_detections(self._request('POST', f'/detect?thresh={thresh}', body, headers))
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
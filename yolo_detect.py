@@ -4,14 +4,29 @@ import argparse
 import glob
 import time
 import atexit
+import itertools
 import threading
 
+startup_t0 = time.perf_counter()
+
 import cv2
 import numpy as np
-from ultralytics import YOLO
+from yolo_backend import BACKENDS, CACHE_AUTO, load_backend, warmup_backend
 
 # Import servo functions only
-from yolo_servo import jalankan_servo, cleanup_servo
+from yolo_servo import ServoSequencer, cleanup_servo, init_hardware, load_servo_config
+from yolo_capture import LatestFrameReader
+from yolo_shm import CaptureProcess
+from yolo_postprocess import empty_detections, filter_detections, draw_detections
+from yolo_preprocess import Letterbox, parse_roi
+from yolo_batch import run_folder_batch
+from yolo_tracker import VotingTracker
+from yolo_runtime import SignalControl, StartupTimer
+from yolo_metrics import StageTimer, RingBuffer
+from yolo_writer import VideoRecorder, EventClipRecorder
+from yolo_motion import MotionGate
+from yolo_adaptive import AdaptiveController, imgsz_steps
+from yolo_pipeline import Pipeline, POLICY_BLOCK, POLICY_LATEST, parse_stage_policies
 
 # Define and parse user input arguments
 parser = argparse.ArgumentParser()
@@ -25,30 +40,109 @@ parser.add_argument('--thresh', help='Minimum confidence threshold for displayin
 parser.add_argument('--resolution', help='Resolution in WxH to display inference results at (example: "640x480"), \
                     otherwise, match source resolution',
                     default=None)
+parser.add_argument('--imgsz', help='Model input size in pixels; frames are letterboxed to imgsz x imgsz (default: 320)',
+                    default=320, type=int)
+parser.add_argument('--batch', help='Image folder only: run headless batch inference with this batch size and write results to --output (example: "8")',
+                    default=0, type=int)
+parser.add_argument('--workers', help='Number of image decoding threads for --batch mode (default: 4)',
+                    default=4, type=int)
+parser.add_argument('--output', help='Output file for --batch mode results, one JSON line per image (default: "detections.jsonl")',
+                    default='detections.jsonl')
+parser.add_argument('--servo-policy', help='What to do with new detections while the servo is busy: "latest" (newest classification wins) or "drop" (default: latest)',
+                    default='latest', choices=['latest', 'drop'])
+parser.add_argument('--servo-config', help='JSON file overriding servo duty cycles and timings (example: {"WAKTU_BUKA_TUTUP": 2.5})',
+                    default=None)
+parser.add_argument('--no-servo-overlap', help='Do not start the next bin rotation until the previous lid sequence has fully finished',
+                    action='store_true')
+parser.add_argument('--vote-frames', help='Number of frames an object must be tracked with a stable label before the servo fires (default: 3)',
+                    default=3, type=int)
+parser.add_argument('--headless', help='Run without a display: no imshow/waitKey, frames are only annotated when recording or on a SIGUSR1 snapshot. Stop with SIGINT/SIGTERM.',
+                    action='store_true')
+parser.add_argument('--metrics-interval', help='Print per-stage latency p50/p95/p99 every N seconds (default: 0 = off)',
+                    default=0, type=float)
+parser.add_argument('--metrics-json', help='Write per-stage latency summary to this JSON file at exit (example: "metrics.json")',
+                    default=None)
+parser.add_argument('--motion-gate', help='Only run the model when the scene changes (frame differencing), or on the heartbeat',
+                    action='store_true')
+parser.add_argument('--motion-thresh', help='Fraction of changed pixels that counts as motion for --motion-gate (default: 0.01)',
+                    default=0.01, type=float)
+parser.add_argument('--motion-heartbeat', help='Run the model at least every N seconds even without motion (default: 5.0)',
+                    default=5.0, type=float)
+parser.add_argument('--motion-hold', help='Keep running the model for N seconds after the last motion (default: 2.0)',
+                    default=2.0, type=float)
+parser.add_argument('--adaptive', help='Adapt inference cadence and imgsz: every frame while an object is present or being voted on, less often when idle, above the CPU budget or when the Pi is hot (video and camera sources)',
+                    action='store_true')
+parser.add_argument('--target-latency-ms', help='Inference latency --adaptive aims for; imgsz steps down above it (default: 150)',
+                    default=150.0, type=float)
+parser.add_argument('--cpu-budget', help='Share of all CPU cores this process may use before --adaptive backs off (default: 0.75)',
+                    default=0.75, type=float)
+parser.add_argument('--idle-interval', help='Seconds between inferences while no object is present with --adaptive (default: 0.5)',
+                    default=0.5, type=float)
+parser.add_argument('--min-imgsz', help='Smallest imgsz --adaptive may step down to, ultralytics backend only (default: 224)',
+                    default=224, type=int)
+parser.add_argument('--thermal-limit', help='CPU temperature in C at which --adaptive switches to the smallest imgsz and backs off when idle (default: 75)',
+                    default=75.0, type=float)
+parser.add_argument('--roi', help='Region the model looks at, in source-frame pixels or 0-1 fractions: rectangle "x1,y1,x2,y2" or polygon "x1,y1;x2,y2;x3,y3;..."',
+                    default=None)
+parser.add_argument('--backend', help='Inference engine: ultralytics, onnx (.onnx file), ncnn or openvino (exported model folder), or server (--model is the yolo_server.py address, e.g. unix:///tmp/yolo.sock) (default: ultralytics)',
+                    default='ultralytics', choices=BACKENDS)
+parser.add_argument('--model-cache', help='Folder for the optimized ONNX graph / compiled OpenVINO blob, so the next start skips graph optimization / compilation. "auto" = a model_cache folder next to the model, empty string disables (default: auto)',
+                    default=CACHE_AUTO)
+parser.add_argument('--warmup', help='Dummy inferences at --imgsz before the camera loop starts (default: 3)',
+                    default=3, type=int)
+parser.add_argument('--pipeline', help='Run capture, preprocess, inference, postprocess/actuation and render/record on separate threads with bounded queues in between (video and camera sources)',
+                    action='store_true')
+parser.add_argument('--pipeline-queue', help='Queue size in front of each pipeline stage (default: 1)',
+                    default=1, type=int)
+parser.add_argument('--pipeline-policy', help='Per-stage queue policy when full, e.g. "inference=latest,postprocess=block" (latest, drop or block; stages: preprocess, inference, postprocess, render, display). Default: latest for live cameras (postprocess=block), block for video files',
+                    default=None)
+parser.add_argument('--capture-process', help='Read the camera or video in a separate process; frames reach inference through a shared-memory ring without pickling or copying (video and camera sources)',
+                    action='store_true')
+parser.add_argument('--shm-slots', help='Frame slots in the shared-memory ring of --capture-process (default: 0 = enough for the in-flight frames)',
+                    default=0, type=int)
 parser.add_argument('--record', help='Record results from video or webcam and save it as "demo1.avi". Must specify --resolution argument to record.',
                     action='store_true')
+parser.add_argument('--record-fps', help='Frame rate of the recorded file; frames are placed by capture time so it plays at true speed (default: 15)',
+                    default=15.0, type=float)
+parser.add_argument('--record-segment-seconds', help='Start a new recording file every N seconds (default: 0 = one file)',
+                    default=0, type=float)
+parser.add_argument('--record-segment-mb', help='Start a new recording file once it reaches N megabytes (default: 0 = no limit)',
+                    default=0, type=float)
+parser.add_argument('--clips', help='Save short clips around every servo trigger (and low-confidence detections) to this folder, e.g. "clips"',
+                    default=None)
+parser.add_argument('--clip-pre', help='Seconds of footage kept before an event (default: 3.0)',
+                    default=3.0, type=float)
+parser.add_argument('--clip-post', help='Seconds of footage recorded after an event (default: 2.0)',
+                    default=2.0, type=float)
+parser.add_argument('--clip-fps', help='Frame rate of the clip ring and clip files (default: 10)',
+                    default=10.0, type=float)
+parser.add_argument('--clip-low-conf', help='Also save a clip when a detection is below this confidence (default: 0 = off)',
+                    default=0.0, type=float)
 
 args = parser.parse_args()
 
+# Startup phases are logged as they finish (STARTUP: <phase> <duration>)
+startup = StartupTimer(startup_t0)
+startup.mark('imports_and_args')
+
 # Parse user inputs
 model_path = args.model
 img_source = args.source
 min_thresh = args.thresh
 user_res = args.resolution
 record = args.record
+imgsz = args.imgsz
+batch_size = args.batch
+headless = args.headless
 
-# async servo
-def servo_async(label):
-    Thread(target=jalankan_servo, args=(label,), daemon=True).start()
-
-# Check if model file exists and is valid
-if (not os.path.exists(model_path)):
-    print('ERROR: Model path is invalid or model was not found. Make sure the model filename was entered correctly.')
-    sys.exit(1)
-
-# Load the model into memory and get labemap
-model = YOLO(model_path, task='detect')
-labels = model.names
+# Parse region of interest (drop zone above the sorting flap)
+roi = None
+if args.roi:
+    try:
+        roi = parse_roi(args.roi)
+    except ValueError as e:
+        print(f'Invalid --roi: {e}')
+        sys.exit(1)
 
 # Parse input to determine if image source is a file, folder, video, or USB camera
 img_ext_list = ['.jpg','.JPG','.jpeg','.JPEG','.png','.PNG','.bmp','.BMP']
@@ -93,6 +187,43 @@ if user_res:
         print('Resolution must be in the form WIDTHxHEIGHT, e.g. 640x480')
         sys.exit(1)
 
+# Check if model file exists and is valid
+if args.backend != 'server' and (not os.path.exists(model_path)):
+    print('ERROR: Model path is invalid or model was not found. Make sure the model filename was entered correctly.')
+    sys.exit(1)
+
+# Capture process: forked now, before any other thread exists, so the camera opens while the model loads
+capture_proc = None
+if args.capture_process and source_type in ['video', 'usb', 'picamera']:
+    # Slots cover every frame that can be in flight: queued and in-progress pipeline items plus the one being captured
+    shm_slots = args.shm_slots or (6 * args.pipeline_queue + 8 if args.pipeline else 4)
+    capture_proc = CaptureProcess(img_source, (resW, resH) if user_res else None, slots=shm_slots,
+                                  policy=POLICY_BLOCK if source_type == 'video' else POLICY_LATEST).start()
+elif args.capture_process:
+    print('Note: --capture-process only applies to video and camera sources.')
+
+# Bring up GPIO, audio and servo home position in the background while the model loads
+# (not needed for headless folder batch mode)
+hardware_phases = {}
+hardware_thread = None
+if not (batch_size > 0 and os.path.isdir(img_source)):
+    hardware_thread = threading.Thread(target=lambda: hardware_phases.update(init_hardware()),
+                                       name='hardware-init', daemon=True)
+    hardware_thread.start()
+
+# Load the model into memory and get labemap
+model = load_backend(args.backend, model_path, imgsz=imgsz, cache_dir=args.model_cache or None)
+labels = model.names
+startup.mark('model_load')
+if model.cache_path:
+    print(f"STARTUP: model cache {'hit' if model.cache_hit else 'created'}: {model.cache_path}")
+
+# Warm up the model so the first real item is not sorted late
+if args.warmup > 0:
+    warmup_times = warmup_backend(model, args.warmup)
+    startup.mark('warmup')
+    print(f'STARTUP: warmup runs {", ".join(f"{t * 1000:.0f}" for t in warmup_times)} ms')
+
 # Check if recording is valid and set up recording
 recorder = None
 if record:
@@ -104,9 +235,15 @@ if record:
         sys.exit(1)
 
     # Set up recording
+    # Background writer thread: frames are dropped (and counted) instead of stalling inference
     record_name = 'demo1.avi'
-    record_fps = 30
-    recorder = cv2.VideoWriter(record_name, cv2.VideoWriter_fourcc(*'MJPG'), record_fps, (resW,resH))
+    recorder = VideoRecorder(record_name, fps=args.record_fps, fourcc='MJPG', frame_size=(resW,resH),
+                             segment_seconds=args.record_segment_seconds, segment_mb=args.record_segment_mb)
+
+# Pre/post-event clips: compressed ring of the last seconds, flushed on sort events
+clips = None
+if args.clips:
+    clips = EventClipRecorder(args.clips, pre_seconds=args.clip_pre, post_seconds=args.clip_post, fps=args.clip_fps)
 
 # Load or initialize image source
 if source_type == 'image':
@@ -118,6 +255,14 @@ elif source_type == 'folder':
         _, file_ext = os.path.splitext(file)
         if file_ext in img_ext_list:
             imgs_list.append(file)
+elif capture_proc is not None:
+    try:
+        capture_proc.open()
+    except RuntimeError as e:
+        print(f'ERROR: {e}')
+        sys.exit(1)
+    ring = capture_proc.ring
+    print(f'Capture process: {ring.slots} shared frame slots of {ring.shape[1]}x{ring.shape[0]} ({ring.nbytes / 1e6:.1f} MB)')
 elif source_type == 'video' or source_type == 'usb':
 
     if source_type == 'video':
@@ -133,121 +278,289 @@ elif source_type == 'video' or source_type == 'usb':
         ret = cap.set(3, resW)
         ret = cap.set(4, resH)
 
+    # USB camera: baca frame di background, loop inference selalu ambil frame terbaru
+    if source_type == 'usb':
+        reader = LatestFrameReader(cap).start()
+
 elif source_type == 'picamera':
     from picamera2 import Picamera2
     cap = Picamera2()
     cap.configure(cap.create_video_configuration(main={"format": 'XRGB8888', "size": (resW, resH)}))
     cap.start()
 
+startup.mark('source_open')
+
+# Headless batch mode for image folders: decode ahead of the model, stream results to disk
+if source_type == 'folder' and batch_size > 0:
+    print(f'Batch mode: {len(imgs_list)} images, batch size {batch_size}, {args.workers} decode workers')
+    run_folder_batch(model, sorted(imgs_list), labels, min_thresh, args.output,
+                     batch_size=batch_size, workers=args.workers)
+    sys.exit(0)
+
 # Set bounding box colors (using the Tableu 10 color scheme)
 bbox_colors = [(164,120,87), (68,148,228), (93,97,209), (178,182,133), (88,159,106), 
               (96,202,231), (159,124,168), (169,162,241), (98,118,150), (172,176,184)]
 
+# Letterbox buffers for model input (allocated once, reused). With --pipeline a few are kept in
+# rotation so a frame's buffer and scale factors stay valid until its boxes are mapped back.
+pipelined = args.pipeline and source_type in ['video', 'usb', 'picamera']
+if args.pipeline and not pipelined:
+    print('Note: --pipeline only applies to video and camera sources, running sequentially.')
+letterboxes = {}
+
+def next_letterbox(size):
+    if size not in letterboxes:
+        letterboxes[size] = itertools.cycle([Letterbox(size) for _ in range(2 * args.pipeline_queue + 3 if pipelined else 1)])
+    return next(letterboxes[size])
+
+# Adaptive cadence / imgsz (replaces inferring on every frame)
+controller = None
+if args.adaptive and source_type in ['video', 'usb', 'picamera']:
+    # Exported models have a fixed input size; only the cadence adapts for them
+    sizes = imgsz_steps(imgsz, args.min_imgsz) if model.dynamic_imgsz else [imgsz]
+    controller = AdaptiveController(sizes, target_latency=args.target_latency_ms / 1000.0, cpu_budget=args.cpu_budget,
+                                    idle_interval=args.idle_interval, thermal_limit=args.thermal_limit)
+    print(f"Adaptive inference: imgsz {', '.join(str(s) for s in controller.sizes)}, target {args.target_latency_ms:.0f} ms, "
+          f"CPU budget {args.cpu_budget * 100:.0f}%, idle interval {args.idle_interval}s")
+    # Warm the smaller sizes too, so the first inference after a downshift is not a cold one
+    if args.warmup > 0 and len(controller.sizes) > 1:
+        warmup_times = [warmup_backend(model, 1, imgsz=size)[0] for size in controller.sizes[1:]]
+        startup.mark('warmup_adaptive')
+        print(f"STARTUP: adaptive sizes warmed up in {sum(warmup_times):.1f}s")
+elif args.adaptive:
+    print('Note: --adaptive only applies to video and camera sources.')
+
+# Queue policy in front of each stage: live cameras keep the newest frame, video files lose nothing
+if source_type == 'video':
+    default_policies = {stage: POLICY_BLOCK for stage in ['preprocess', 'inference', 'postprocess', 'render', 'display']}
+else:
+    default_policies = {'preprocess': POLICY_LATEST, 'inference': POLICY_LATEST, 'postprocess': POLICY_BLOCK,
+                        'render': POLICY_LATEST, 'display': POLICY_LATEST}
+try:
+    stage_policies = parse_stage_policies(args.pipeline_policy, default_policies)
+except ValueError as e:
+    print(f'Invalid --pipeline-policy: {e}')
+    sys.exit(1)
+
 # Initialize control and status variables
 avg_frame_rate = 0
-frame_rate_buffer = []
 fps_avg_len = 200
+frame_rate_buffer = RingBuffer(fps_avg_len)
 img_count = 0
+t_last_output = 0.0
 
 # Register cleanup to run on exit
 atexit.register(cleanup_servo)
 
-# Begin inference loop
-try:
-    while True:
-
-        t_start = time.perf_counter()
-
-        # Load frame from image source
-        if source_type == 'image' or source_type == 'folder': # If source is image or image folder, load the image using its filename
-            if img_count >= len(imgs_list):
-                print('All images have been processed. Exiting program.')
-                break
-            img_filename = imgs_list[img_count]
-            frame = cv2.imread(img_filename)
-            img_count = img_count + 1
-        
-        elif source_type == 'video': # If source is a video, load next frame from video file
-            ret, frame = cap.read()
-            if not ret:
-                print('Reached end of the video file. Exiting program.')
-                break
-        
-        elif source_type == 'usb': # If source is a USB camera, grab frame from camera
-            ret, frame = cap.read()
-            if (frame is None) or (not ret):
-                print('Unable to read frames from the camera. This indicates the camera is disconnected or not working. Exiting program.')
-                break
-
-        elif source_type == 'picamera': # If source is a Picamera, grab frames using picamera interface
-            frame_bgra = cap.capture_array()
-            frame = cv2.cvtColor(np.copy(frame_bgra), cv2.COLOR_BGRA2BGR)
-            if (frame is None):
-                print('Unable to read frames from the Picamera. This indicates the camera is disconnected or not working. Exiting program.')
-                break
-
-        small_frame = cv2.resize(frame, (416, 416))
-
-        # Resize frame to desired display resolution
-        if resize == True and frame is not None:
-            frame = cv2.resize(frame,(resW,resH))
-
-        # Run inference on frame
-        # results = model(frame, imgsz=320, verbose=False)
-        results = model(small_frame, imgsz=320, verbose=False)
-
-        # Extract results
-        detections = results[0].boxes
-
-        # Initialize variable for basic object counting example
-        object_count = 0
-
-        # Go through each detection and get bbox coords, confidence, and class
-        for i in range(len(detections)):
-
-            # Get bounding box coordinates
-            xyxy_tensor = detections[i].xyxy.cpu()
-            xyxy = xyxy_tensor.numpy().squeeze()
-            xmin, ymin, xmax, ymax = xyxy.astype(int)
-
-            # Get bounding box class ID and name
-            classidx = int(detections[i].cls.item())
+# Hardware init ran in parallel with model load; only the remaining wait is on the critical path
+if hardware_thread is not None:
+    hardware_thread.join()
+    startup.mark('hardware_wait')
+    for phase, seconds in hardware_phases.items():
+        startup.record(f'hardware_{phase} (parallel)', seconds)
+
+# Servo timings from configuration (optional)
+if args.servo_config:
+    load_servo_config(args.servo_config)
+
+# Single servo scheduler thread running timed, non-blocking sequences; the inference loop only enqueues labels
+actuator = ServoSequencer(maxsize=1, policy=args.servo_policy, overlap=not args.no_servo_overlap).start()
+
+# Tracker: fire the servo once per physical item, after its label is stable
+tracker = VotingTracker(vote_frames=args.vote_frames)
+
+# Quit (SIGINT/SIGTERM) and snapshot (SIGUSR1) via signals, needed when there is no window
+control = SignalControl().install()
+if headless:
+    print('Headless mode: stop with Ctrl+C / SIGTERM, save a snapshot with SIGUSR1.')
+
+# Motion gate: skip model calls while the chute is static
+motion_gate = None
+if args.motion_gate:
+    motion_gate = MotionGate(sensitivity=args.motion_thresh, heartbeat=args.motion_heartbeat, hold=args.motion_hold)
+dets = empty_detections()
+
+# Per-stage latency (capture, preprocess, inference, postprocess, actuation, render, record, display)
+metrics = StageTimer()
+
+# ---------- Per-frame stages (called in order, or each on its own thread with --pipeline) ----------
+
+def capture_frame():
+    """Next frame from the source as a per-frame dict, or None when the source is exhausted."""
+    global img_count
+    t_start = time.perf_counter()
+
+    # Load frame from image source
+    if source_type == 'image' or source_type == 'folder': # If source is image or image folder, load the image using its filename
+        if img_count >= len(imgs_list):
+            print('All images have been processed. Exiting program.')
+            return None
+        img_filename = imgs_list[img_count]
+        frame = cv2.imread(img_filename)
+        img_count = img_count + 1
+
+    elif capture_proc is not None: # Capture process: the frame is a view of its shared-memory slot, no copy
+        got = capture_proc.read()
+        if got is None:
+            print('Capture process stopped (end of the video file or camera not delivering frames). Exiting program.')
+            return None
+        slot, frame, _ = got
+        metrics.mark('capture', t_start)
+        return {'t_start': t_start, 'frame': frame, 'slot': slot}
+
+    elif source_type == 'video': # If source is a video, load next frame from video file
+        ret, frame = cap.read()
+        if not ret:
+            print('Reached end of the video file. Exiting program.')
+            return None
+
+    elif source_type == 'usb': # If source is a USB camera, take the newest frame from the capture thread
+        ret, frame = reader.read()
+        if (frame is None) or (not ret):
+            print('Unable to read frames from the camera. This indicates the camera is disconnected or not working. Exiting program.')
+            return None
+
+    elif source_type == 'picamera': # If source is a Picamera, grab frames using picamera interface
+        frame_bgra = cap.capture_array()
+        frame = cv2.cvtColor(np.copy(frame_bgra), cv2.COLOR_BGRA2BGR)
+        if (frame is None):
+            print('Unable to read frames from the Picamera. This indicates the camera is disconnected or not working. Exiting program.')
+            return None
+    metrics.mark('capture', t_start)
+    return {'t_start': t_start, 'frame': frame}
+
+
+def release_frame(item):
+    """Hand the item's shared-memory slot back to the capture process (no-op without --capture-process)."""
+    slot = item.pop('slot', None)
+    if slot is not None:
+        capture_proc.release(slot)
+
+
+def preprocess_frame(item):
+    t = time.perf_counter()
+    frame = item['frame']
+
+    # Crop to the region of interest (a view, no copy); the model and motion gate only see this
+    src_h, src_w = frame.shape[:2]
+    roi_frame = roi.crop(frame) if roi is not None else frame
+
+    # Motion gate (sees every frame), then adaptive cadence: static scene / not due -> keep the last
+    # detections, skip the model. The controller only uses up a slot when the model really runs
+    motion = motion_gate is None or motion_gate.should_infer(roi_frame)
+    run_inference = controller.should_infer(gate=motion) if controller is not None else motion
+
+    # Letterbox straight to model input size (aspect ratio preserved)
+    if run_inference:
+        item['imgsz'] = controller.imgsz if controller is not None else imgsz
+        item['letterbox'] = next_letterbox(item['imgsz'])
+        item['model_input'] = item['letterbox'](roi_frame)
+
+    # Resize frame to desired display resolution (skip if camera already delivers it)
+    if resize == True and frame is not None and (frame.shape[1], frame.shape[0]) != (resW, resH):
+        frame = cv2.resize(frame,(resW,resH))
+        release_frame(item)  # letterbox and motion gate are done with the source frame
+    item.update(frame=frame, src_w=src_w, src_h=src_h, run_inference=run_inference)
+    metrics.mark('preprocess', t)
+    return item
+
+
+def infer_frame(item):
+    if item['run_inference']:
+        # Run inference on frame (boxes, confs, classes above min_thresh as NumPy arrays)
+        t = time.perf_counter()
+        item['dets'] = model.infer(item['model_input'], min_thresh, imgsz=item['imgsz'])
+        if 'first_inference' not in startup.phases:
+            startup.mark('first_inference')
+            print(f'STARTUP: time to first inference {startup.total():.2f}s')
+        item['infer_s'] = metrics.mark('inference', t) - t
+    return item
+
+
+def postprocess_frame(item):
+    global dets
+    if item['run_inference']:
+        t = time.perf_counter()
+        frame, src_w, src_h = item['frame'], item['src_w'], item['src_h']
+        new_dets = item['dets']
+
+        # Map boxes from letterbox space back to display coordinates
+        boxes = item['letterbox'].scale_boxes(new_dets.boxes)
+        if roi is not None:
+            boxes = roi.to_frame(boxes)
+            new_dets = filter_detections(new_dets._replace(boxes=boxes), roi.contains(boxes))
+            boxes = new_dets.boxes
+        if (frame.shape[1], frame.shape[0]) != (src_w, src_h):
+            boxes = boxes * np.array([frame.shape[1] / src_w, frame.shape[0] / src_h] * 2, dtype=np.float32)
+        dets = new_dets._replace(boxes=boxes)
+        t = metrics.mark('postprocess', t)
+
+        # Uncertain detection: keep the footage for review
+        if clips is not None and args.clip_low_conf > 0:
+            low = dets.confs < args.clip_low_conf
+            if low.any():
+                clips.trigger('lowconf_' + labels[int(dets.classes[low][0])])
+
+        # Jalankan servo untuk kategori yang valid, sekali per objek yang labelnya stabil
+        for track_id, classidx in tracker.update(dets):
             classname = labels[classidx]
+            if classname in ['non-organic', 'organic', 'b3']:
+                actuator.submit(classname)
+                if clips is not None:
+                    clips.trigger(classname)
+        metrics.mark('actuation', t)
 
-            # Get bounding box confidence
-            conf = detections[i].conf.item()
+        # Object in view or still being voted on -> the controller keeps inferring on every frame
+        if controller is not None:
+            controller.record(item['infer_s'], len(dets.confs) > 0 or tracker.voting)
 
-            # Draw box if confidence threshold is high enough
-            if conf > min_thresh:
+    # Frames skipped by the motion gate keep showing the last detections
+    item['dets'] = dets
+    return item
 
-                color = bbox_colors[classidx % 10]
-                cv2.rectangle(frame, (xmin,ymin), (xmax,ymax), color, 2)
 
-                label = f'{classname}: {int(conf*100)}%'
-                labelSize, baseLine = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-                label_ymin = max(ymin, labelSize[1] + 10)
-                cv2.rectangle(frame, (xmin, label_ymin-labelSize[1]-10), (xmin+labelSize[0], label_ymin+baseLine-10), color, cv2.FILLED)
-                cv2.putText(frame, label, (xmin, label_ymin-7), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+def render_frame(item):
+    # Only build the annotated frame if something will consume it
+    snapshot = headless and control.take_snapshot()
+    if not headless or recorder is not None or clips is not None or snapshot:
+        t = time.perf_counter()
+        frame = item['frame']
 
-                # Basic example: count the number of objects in the image
-                object_count = object_count + 1
-
-                # Jalankan servo untuk kategori yang valid (no cleanup here)
-                if classname in ['non-organic', 'organic', 'b3']:
-                    try:
-                        servo_async(classname)
-                    except Exception as e:
-                        print("Servo runtime error (caught):", e)
+        # Draw boxes and count the number of objects in the image
+        object_count = draw_detections(frame, item['dets'], labels, bbox_colors)
+        if roi is not None:
+            roi.draw(frame, frame.shape[1] / item['src_w'], frame.shape[0] / item['src_h'])
 
         # Calculate and draw framerate (if using video, USB, or Picamera source)
         if source_type in ['video', 'usb', 'picamera']:
             cv2.putText(frame, f'FPS: {avg_frame_rate:0.2f}', (10,20), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2)
+        cv2.putText(frame, f'Number of objects: {object_count}', (10,40), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2)
+        t = metrics.mark('render', t)
+
+        # The writer threads keep the frame after this item is done; a shared-memory slot is reused by then
+        if (recorder is not None or clips is not None) and 'slot' in item:
+            frame = frame.copy()
+        if recorder is not None:
+            recorder.write(frame, item['t_start'])
+        if clips is not None:
+            clips.add_frame(frame, item['t_start'])
+        if snapshot:
+            cv2.imwrite('capture.png',frame)
+            print('Snapshot saved to capture.png')
+        if recorder is not None or clips is not None or snapshot:
+            metrics.mark('record', t)
+    return item
+
+
+def display_frame(item):
+    """Show the frame and handle keys (main thread). Returns False when the user quits."""
+    global avg_frame_rate, t_last_output
+    if not headless:
+        t = time.perf_counter()
+        frame = item['frame']
 
         # Display detection results
-        cv2.putText(frame, f'Number of objects: {object_count}', (10,40), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2)
         cv2.imshow('YOLO detection results',frame)
-        if recorder is not None:
-            recorder.write(frame)
 
         # Key handling
         if source_type in ['image','folder']:
@@ -256,44 +569,131 @@ try:
             key = cv2.waitKey(5)
 
         if key == ord('q') or key == ord('Q'):
-            break
+            return False
         elif key == ord('s') or key == ord('S'):
             cv2.waitKey()
         elif key == ord('p') or key == ord('P'):
             cv2.imwrite('capture.png',frame)
+        metrics.mark('display', t)
+
+    if metrics.maybe_log(args.metrics_interval) and controller is not None:
+        print(controller.log_line())
 
-        # Calculate FPS for this frame
-        t_stop = time.perf_counter()
-        frame_rate_calc = float(1/(t_stop - t_start)) if (t_stop - t_start) > 0 else 0.0
+    # Calculate FPS for this frame (output rate when the stages overlap)
+    t_stop = time.perf_counter()
+    elapsed = t_stop - (t_last_output if pipelined else item['t_start'])
+    t_last_output = t_stop
+    frame_rate_calc = float(1/elapsed) if elapsed > 0 else 0.0
 
-        # Append FPS result to frame_rate_buffer (for finding average FPS over multiple frames)
-        if len(frame_rate_buffer) >= fps_avg_len:
-            frame_rate_buffer.pop(0)
-        frame_rate_buffer.append(frame_rate_calc)
+    # Append FPS result to frame_rate_buffer and read the running average (O(1))
+    frame_rate_buffer.append(frame_rate_calc)
+    avg_frame_rate = frame_rate_buffer.mean()
+    return True
 
-        # Calculate average FPS for past frames
-        avg_frame_rate = np.mean(frame_rate_buffer) if frame_rate_buffer else 0.0
+
+# Begin inference loop
+pipeline = None
+try:
+    if pipelined:
+        # Capture, preprocess, inference, postprocess/actuation and render/record each on their own
+        # thread with bounded queues in between; display stays on the main thread
+        print(f'Pipeline mode: queue size {args.pipeline_queue}, policies ' +
+              ', '.join(f'{stage}={policy}' for stage, policy in stage_policies.items()))
+        pipeline = (Pipeline(on_drop=release_frame)
+                    .source('capture', capture_frame)
+                    .add('preprocess', preprocess_frame, args.pipeline_queue, stage_policies['preprocess'])
+                    .add('inference', infer_frame, args.pipeline_queue, stage_policies['inference'])
+                    .add('postprocess', postprocess_frame, args.pipeline_queue, stage_policies['postprocess'])
+                    .add('render', render_frame, args.pipeline_queue, stage_policies['render'])
+                    .start(args.pipeline_queue, stage_policies['display']))
+        t_last_output = time.perf_counter()
+        while not control.stop.is_set():
+            item = pipeline.get(timeout=0.5)
+            if item is None:
+                if pipeline.finished:
+                    break
+                continue
+            running = display_frame(item)
+            release_frame(item)
+            if not running:
+                break
+    else:
+        while not control.stop.is_set():
+            item = capture_frame()
+            if item is None:
+                break
+            item = render_frame(postprocess_frame(infer_frame(preprocess_frame(item))))
+            running = display_frame(item)
+            release_frame(item)
+            if not running:
+                break
 
 finally:
     # Clean up resources ONCE
+    if pipeline is not None:
+        pipeline.stop()
+        for stage, s in pipeline.stats().items():
+            print(f"Pipeline {stage}: {s['put']} queued, {s['dropped']} dropped ({s['policy']}), blocked {s['blocked_s']:.2f}s")
     print(f'Average pipeline FPS: {avg_frame_rate:.2f}')
     try:
-        if source_type in ['video','usb']:
-            cap.release()
-        elif source_type == 'picamera':
-            cap.stop()
+        if capture_proc is not None:
+            capture_proc.stop()
+            s = capture_proc.stats()
+            print(f"Capture process: {s['frames_read']} frames read, {s['frames_dropped']} stale frames dropped")
+        else:
+            if source_type == 'usb':
+                reader.stop()
+                print(f'Capture: {reader.frames_read} frames read, {reader.frames_dropped} stale frames dropped')
+            if source_type in ['video','usb']:
+                cap.release()
+            elif source_type == 'picamera':
+                cap.stop()
     except Exception:
         pass
 
     if recorder is not None:
         try:
-            recorder.release()
+            recorder.close()
+            print(f'Recording: {recorder.summary()}')
         except Exception:
             pass
+    if clips is not None:
+        clips.close()
+        print(f'Event clips: {clips.summary()}')
+
+    stats = actuator.stats()
+    print(f"Servo: {stats['executed']} sequences run, {stats['dropped']} requests coalesced/dropped")
+    if 'items_per_minute' in stats:
+        print(f"Sorter throughput: {stats['items_per_minute']:.1f} items/minute")
+    if motion_gate is not None:
+        print(f'Motion gate: {motion_gate.summary()}')
+    if controller is not None:
+        print(f'Adaptive: {controller.summary()}')
+    actuator.stop(timeout=10.0)
+
+    if args.metrics_interval > 0:
+        print(metrics.log_line())
+    if args.metrics_json:
+        try:
+            extra = {'avg_fps': round(float(avg_frame_rate), 3), 'actuator': stats}
+            if motion_gate is not None:
+                extra['motion_gate'] = motion_gate.stats()
+            if controller is not None:
+                extra['adaptive'] = controller.stats()
+            if capture_proc is not None:
+                extra['capture'] = capture_proc.stats()
+            elif source_type == 'usb':
+                extra['capture'] = reader.stats()
+            if pipeline is not None:
+                extra['pipeline'] = pipeline.stats()
+            metrics.dump_json(args.metrics_json, extra)
+        except Exception as e:
+            print('Metrics dump error:', e)
 
     try:
         cleanup_servo()
     except Exception as e:
         print('Cleanup servo error:', e)
 
-    cv2.destroyAllWindows()
\ No newline at end of file
+    if not headless:
+        cv2.destroyAllWindows()
\ No newline at end of file
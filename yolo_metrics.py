@@ -0,0 +1,136 @@
+import json
+import time
+
+import numpy as np
+
+# ========== RING BUFFER STATISTIK (O(1) PER SAMPLE) ==========
+
+class RingBuffer:
+    """
+    Window bergulir berukuran tetap di atas array NumPy yang dialokasikan sekali.
+
+    append() dan mean() O(1) berkat running sum (dihitung ulang penuh setiap
+    kali buffer berputar untuk membuang drift floating point). Juga menyimpan
+    EWMA dan menyediakan percentile atas isi window.
+    """
+
+    def __init__(self, size, ewma_alpha=0.1):
+        self.size = size
+        self.ewma_alpha = ewma_alpha
+        self._data = np.zeros(size, dtype=np.float64)
+        self._idx = 0
+        self._count = 0
+        self._sum = 0.0
+        self.ewma = None
+        self.total = 0      # jumlah sample sejak awal (bukan hanya di window)
+
+    def append(self, value):
+        value = float(value)
+        if self._count == self.size:
+            self._sum -= self._data[self._idx]
+        else:
+            self._count += 1
+        self._data[self._idx] = value
+        self._sum += value
+        self._idx += 1
+        if self._idx == self.size:
+            self._idx = 0
+            self._sum = float(self._data.sum())
+        self.total += 1
+        self.ewma = value if self.ewma is None else self.ewma + self.ewma_alpha * (value - self.ewma)
+
+    def __len__(self):
+        return self._count
+
+    def mean(self):
+        return self._sum / self._count if self._count else 0.0
+
+    def values(self):
+        """View isi window (urutan tidak dijamin kronologis)."""
+        return self._data[:self._count]
+
+    def percentile(self, q):
+        """Percentile (skalar atau list) atas isi window."""
+        if not self._count:
+            return 0.0 if np.isscalar(q) else [0.0] * len(q)
+        return np.percentile(self.values(), q)
+
+
+# ========== LATENSI PER STAGE ==========
+
+# Urutan stage di log / JSON
+PIPELINE_STAGES = ['capture', 'preprocess', 'inference', 'postprocess', 'actuation', 'render', 'record', 'display']
+
+
+class StageTimer:
+    """
+    Mencatat latensi setiap stage loop inference dalam window bergulir
+    dan meringkasnya sebagai p50/p95/p99 (milidetik).
+
+    Pemakaian di loop: t = metrics.mark('capture', t) — mencatat waktu sejak
+    `t` untuk stage tersebut dan mengembalikan timestamp sekarang.
+    """
+
+    def __init__(self, window=500, stages=PIPELINE_STAGES):
+        self.window = window
+        self._samples = {stage: RingBuffer(window) for stage in stages}
+        self._last_log = time.monotonic()
+        self._started = time.time()
+
+    def record(self, stage, seconds):
+        if stage not in self._samples:
+            self._samples[stage] = RingBuffer(self.window)
+        self._samples[stage].append(seconds)
+
+    def mark(self, stage, t_prev):
+        """Catat waktu sejak t_prev untuk `stage`, kembalikan perf_counter() sekarang."""
+        now = time.perf_counter()
+        self.record(stage, now - t_prev)
+        return now
+
+    def summary(self):
+        """{stage: {count, mean_ms, p50_ms, p95_ms, p99_ms}} untuk stage yang punya data."""
+        out = {}
+        for stage, samples in self._samples.items():
+            if not len(samples):
+                continue
+            p50, p95, p99 = samples.percentile([50, 95, 99])
+            out[stage] = {
+                'count': samples.total,
+                'mean_ms': round(samples.mean() * 1000.0, 3),
+                'ewma_ms': round(samples.ewma * 1000.0, 3),
+                'p50_ms': round(float(p50) * 1000.0, 3),
+                'p95_ms': round(float(p95) * 1000.0, 3),
+                'p99_ms': round(float(p99) * 1000.0, 3),
+            }
+        return out
+
+    def log_line(self):
+        parts = [f"{stage} {s['p50_ms']:.1f}/{s['p95_ms']:.1f}/{s['p99_ms']:.1f}"
+                 for stage, s in self.summary().items()]
+        return 'LATENCY ms p50/p95/p99 | ' + ' | '.join(parts)
+
+    def maybe_log(self, interval):
+        """Print log_line() setiap `interval` detik (0 = tidak pernah). True jika baru saja print."""
+        if interval <= 0:
+            return False
+        now = time.monotonic()
+        if now - self._last_log >= interval:
+            self._last_log = now
+            print(self.log_line())
+            return True
+        return False
+
+    def dump_json(self, path, extra=None):
+        """Tulis ringkasan (plus data tambahan, mis. statistik capture/servo) ke file JSON."""
+        data = {
+            'started': self._started,
+            'duration_s': round(time.time() - self._started, 3),
+            'window': self.window,
+            'stages': self.summary(),
+        }
+        if extra:
+            data.update(extra)
+        with open(path, 'w') as f:
+            json.dump(data, f, indent=2)
+        print(f'Latency metrics saved to {path}')
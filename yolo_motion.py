@@ -0,0 +1,92 @@
+import time
+
+import cv2
+import numpy as np
+
+# ========== MOTION GATE (SKIP INFERENCE SAAT SCENE DIAM) ==========
+
+class MotionGate:
+    """
+    Frame differencing murah pada salinan grayscale kecil untuk memutuskan
+    apakah detector perlu dijalankan.
+
+    Inference dijalankan jika:
+      - fraksi pixel yang berubah >= `sensitivity`, atau
+      - masih dalam `hold` detik setelah gerakan terakhir (objek yang baru
+        jatuh dan diam tetap sempat di-vote oleh tracker), atau
+      - sudah `heartbeat` detik sejak inference terakhir.
+    """
+
+    def __init__(self, sensitivity=0.01, pixel_delta=25, heartbeat=5.0, hold=2.0, width=160):
+        self.sensitivity = sensitivity
+        self.pixel_delta = pixel_delta
+        self.heartbeat = heartbeat
+        self.hold = hold
+        self.width = width
+
+        self._prev = None
+        self._small = None
+        self._size = None
+        self._last_motion = 0.0
+        self._last_infer = 0.0
+
+        # Statistik per run
+        self.frames_checked = 0
+        self.inferences = 0
+        self.skipped = 0
+        self.heartbeats = 0
+        self.last_motion_ratio = 0.0
+
+    def _gray_small(self, frame):
+        h, w = frame.shape[:2]
+        if self._size is None:
+            self._size = (self.width, max(1, int(round(h * self.width / w))))
+        self._small = cv2.resize(frame, self._size, dst=self._small, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(self._small, cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def should_infer(self, frame, now=None):
+        """True jika detector perlu dijalankan untuk frame ini."""
+        now = time.monotonic() if now is None else now
+        self.frames_checked += 1
+
+        gray = self._gray_small(frame)
+        if self._prev is None:
+            motion = True
+            self.last_motion_ratio = 1.0
+        else:
+            diff = cv2.absdiff(gray, self._prev)
+            self.last_motion_ratio = np.count_nonzero(diff > self.pixel_delta) / diff.size
+            motion = self.last_motion_ratio >= self.sensitivity
+        self._prev = gray
+
+        if motion:
+            self._last_motion = now
+
+        if motion or now - self._last_motion < self.hold:
+            run = True
+        elif now - self._last_infer >= self.heartbeat:
+            run = True
+            self.heartbeats += 1
+        else:
+            run = False
+
+        if run:
+            self._last_infer = now
+            self.inferences += 1
+        else:
+            self.skipped += 1
+        return run
+
+    def stats(self):
+        return {
+            'frames_checked': self.frames_checked,
+            'inferences': self.inferences,
+            'skipped': self.skipped,
+            'heartbeats': self.heartbeats,
+        }
+
+    def summary(self):
+        pct = 100.0 * self.skipped / self.frames_checked if self.frames_checked else 0.0
+        return (f"{self.inferences} inferences, {self.skipped} skipped ({pct:.1f}%), "
+                f"{self.heartbeats} heartbeats")
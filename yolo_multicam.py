@@ -0,0 +1,264 @@
+"""
+YOLO Multi-Camera Sorter
+One process, one model in RAM, several cameras (e.g. two chutes per Pi).
+Frames from all cameras are interleaved into the shared model (or sent as
+one batch with --batch-sources); results are routed to each camera's own
+tracker, servo pair and latency metrics.
+
+Example:
+    python yolo_multicam.py --model my_model_ncnn_model --backend ncnn \\
+        --source usb0 --servo-pins 15,16 --source usb1 --servo-pins 18,22 --headless
+
+Pins 11/13 (SERVO_BIN_PIN/SERVO_LID_PIN) are the default servo pair; giving
+them for a source reuses that pair.
+"""
+
+import sys
+import json
+import time
+import argparse
+import threading
+
+import cv2
+
+from yolo_backend import BACKENDS, CACHE_AUTO, load_backend, warmup_backend
+from yolo_servo import SERVO_BIN_PIN, SERVO_LID_PIN, ServoSequencer, cleanup_servo, init_hardware, init_servo_pair, load_servo_config
+from yolo_capture import CameraSource
+from yolo_postprocess import draw_detections
+from yolo_preprocess import Letterbox
+from yolo_tracker import VotingTracker
+from yolo_runtime import SignalControl, StartupTimer
+from yolo_metrics import StageTimer, RingBuffer
+
+startup_t0 = time.perf_counter()
+
+# Parse arguments
+parser = argparse.ArgumentParser(description='YOLO Multi-Camera Sorter')
+parser.add_argument('--model', required=True, help='Path to model (file or exported model folder)')
+parser.add_argument('--source', action='append', required=True,
+                    help='Camera or video source (usb0, picamera0, video file). Repeat for each chute.')
+parser.add_argument('--servo-pins', action='append', default=[],
+                    help='BOARD pins "bin,lid" of the servo pair for the source at the same position. '
+                         'The first source defaults to the pins in yolo_servo.py; sources without pins only detect.')
+parser.add_argument('--backend', default='ultralytics', choices=BACKENDS, help='Inference engine (default: ultralytics)')
+parser.add_argument('--imgsz', default=320, type=int, help='Model input size (default: 320)')
+parser.add_argument('--thresh', default=0.5, type=float, help='Confidence threshold (default: 0.5)')
+parser.add_argument('--resolution', default=None, help='Camera resolution WxH (example: "640x480")')
+parser.add_argument('--batch-sources', action='store_true',
+                    help='Run the frames of all cameras through the model in one batch instead of one after another')
+parser.add_argument('--vote-frames', default=3, type=int, help='Stable-label inferences before the servo fires (default: 3)')
+parser.add_argument('--servo-policy', default='latest', choices=['latest', 'drop'],
+                    help='When a servo is busy: keep only the latest request or drop new ones (default: latest)')
+parser.add_argument('--servo-config', default=None, help='JSON file with servo duty cycles / timings')
+parser.add_argument('--no-servo-overlap', action='store_true', help='Do not overlap bin rotation with the lid sequence')
+parser.add_argument('--model-cache', default=CACHE_AUTO,
+                    help='Folder for the optimized ONNX graph / compiled OpenVINO blob ("auto" = next to the model, empty string disables)')
+parser.add_argument('--warmup', default=3, type=int, help='Dummy inferences before the camera loop starts (default: 3)')
+parser.add_argument('--headless', action='store_true', help='No windows; stop with SIGINT/SIGTERM')
+parser.add_argument('--metrics-interval', default=0.0, type=float,
+                    help='Print per-camera latency p50/p95/p99 every N seconds (default: 0 = off)')
+parser.add_argument('--metrics-json', default=None, help='Write per-camera latency and servo stats to this JSON file at exit')
+
+args = parser.parse_args()
+startup = StartupTimer(startup_t0)
+startup.mark('imports_and_args')
+
+SERVO_CLASSES = ['non-organic', 'organic', 'b3']
+bbox_colors = [(164,120,87), (68,148,228), (93,97,209), (178,182,133), (88,159,106),
+               (96,202,231), (159,124,168), (169,162,241), (98,118,150), (172,176,184)]
+
+resolution = None
+if args.resolution:
+    try:
+        resolution = tuple(int(v) for v in args.resolution.split('x'))
+    except ValueError:
+        print('Resolution must be in the form WIDTHxHEIGHT, e.g. 640x480')
+        sys.exit(1)
+
+try:
+    servo_pins = [tuple(int(p) for p in pins.split(',')) for pins in args.servo_pins]
+except ValueError:
+    print('--servo-pins must be "bin,lid", e.g. 15,16')
+    sys.exit(1)
+if any(len(pins) != 2 for pins in servo_pins) or len(servo_pins) > len(args.source):
+    print('Give one --servo-pins "bin,lid" per --source (at most one per source)')
+    sys.exit(1)
+
+# GPIO, audio and servo home position in parallel with model load
+hardware_phases = {}
+hardware_thread = threading.Thread(target=lambda: hardware_phases.update(init_hardware()),
+                                   name='hardware-init', daemon=True)
+hardware_thread.start()
+
+# One model shared by all cameras
+model = load_backend(args.backend, args.model, imgsz=args.imgsz, cache_dir=args.model_cache or None)
+labels = model.names
+startup.mark('model_load')
+if args.warmup > 0:
+    warmup_backend(model, args.warmup)
+    startup.mark('warmup')
+
+# Open every source
+sources = []
+try:
+    for source in args.source:
+        sources.append(CameraSource(source, resolution))
+except Exception as e:
+    print(f'ERROR: {e}')
+    for src in sources:
+        src.release()
+    sys.exit(1)
+startup.mark('source_open')
+
+hardware_thread.join()
+startup.mark('hardware_wait')
+for phase, seconds in hardware_phases.items():
+    startup.record(f'hardware_{phase} (parallel)', seconds)
+if args.servo_config:
+    load_servo_config(args.servo_config)
+
+# Per-camera state: own letterbox buffer, tracker, servo pair, metrics and FPS
+cams = []
+for i, src in enumerate(sources):
+    actuator = None
+    # The first source without --servo-pins gets the default pair, through the same claim check
+    pins = servo_pins[i] if i < len(servo_pins) else (SERVO_BIN_PIN, SERVO_LID_PIN) if i == 0 else None
+    if pins is not None:
+        try:
+            bin_servo, lid_servo = init_servo_pair(f'cam{i}', *pins)
+        except RuntimeError as e:
+            # A chute whose servo cannot move must not run silently
+            print(f'ERROR: {e}')
+            for cam in cams:
+                if cam['actuator'] is not None:
+                    cam['actuator'].stop(timeout=1.0)
+            for src in sources:
+                src.release()
+            cleanup_servo()
+            sys.exit(1)
+        actuator = ServoSequencer(maxsize=1, policy=args.servo_policy, overlap=not args.no_servo_overlap,
+                                  name=f'servo-cam{i}', bin_servo=bin_servo, lid_servo=lid_servo).start()
+    else:
+        print(f'WARNING: No --servo-pins for {src.name}, detections only.')
+
+    cams.append({
+        'name': src.name,
+        'source': src,
+        'letterbox': Letterbox(args.imgsz),
+        'tracker': VotingTracker(vote_frames=args.vote_frames),
+        'actuator': actuator,
+        'metrics': StageTimer(),
+        'fps': RingBuffer(200),
+        'last_output': None,
+        'active': True,
+    })
+print(f"Multi-camera: {len(cams)} sources sharing one {args.backend} model "
+      f"({'batched' if args.batch_sources else 'interleaved'} inference)")
+
+control = SignalControl().install()
+last_log = time.monotonic()
+
+# Begin inference loop
+try:
+    while not control.stop.is_set():
+
+        # 1. Capture + letterbox the newest frame of every camera
+        batch = []
+        for cam in cams:
+            if not cam['active']:
+                continue
+            t = time.perf_counter()
+            ret, frame = cam['source'].read()
+            if not ret or frame is None:
+                print(f"{cam['name']}: no more frames, source stopped.")
+                cam['active'] = False
+                continue
+            t = cam['metrics'].mark('capture', t)
+            model_input = cam['letterbox'](frame)
+            cam['metrics'].mark('preprocess', t)
+            batch.append((cam, frame, model_input))
+        if not batch:
+            break
+
+        # 2. Inference on the shared model: one batch call, or one camera after another
+        if args.batch_sources and len(batch) > 1:
+            t = time.perf_counter()
+            results = model.infer_batch([model_input for _, _, model_input in batch], args.thresh)
+            elapsed = time.perf_counter() - t
+            for cam, _, _ in batch:
+                cam['metrics'].record('inference', elapsed)
+        else:
+            results = []
+            for cam, _, model_input in batch:
+                t = time.perf_counter()
+                results.append(model.infer(model_input, args.thresh))
+                cam['metrics'].mark('inference', t)
+
+        # 3. Route every result to its own camera's tracker, servo and display
+        for (cam, frame, _), dets in zip(batch, results):
+            metrics = cam['metrics']
+            t = time.perf_counter()
+            dets = dets._replace(boxes=cam['letterbox'].scale_boxes(dets.boxes))
+            t = metrics.mark('postprocess', t)
+
+            for track_id, classidx in cam['tracker'].update(dets):
+                classname = labels[classidx]
+                if classname in SERVO_CLASSES:
+                    print(f">>> {cam['name']}: {classname.upper()} (track {track_id})")
+                    if cam['actuator'] is not None:
+                        cam['actuator'].submit(classname)
+            t = metrics.mark('actuation', t)
+
+            now = time.perf_counter()
+            if cam['last_output'] is not None:
+                cam['fps'].append(1.0 / max(now - cam['last_output'], 1e-6))
+            cam['last_output'] = now
+
+            if not args.headless:
+                object_count = draw_detections(frame, dets, labels, bbox_colors)
+                cv2.putText(frame, f"{cam['name']} FPS: {cam['fps'].mean():0.2f}", (10,20), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2)
+                cv2.putText(frame, f'Number of objects: {object_count}', (10,40), cv2.FONT_HERSHEY_SIMPLEX, .7, (0,255,255), 2)
+                cv2.imshow(f"YOLO {cam['name']}", frame)
+                metrics.mark('render', t)
+
+        if not args.headless:
+            key = cv2.waitKey(1)
+            if key == ord('q') or key == ord('Q'):
+                break
+
+        if args.metrics_interval > 0 and time.monotonic() - last_log >= args.metrics_interval:
+            last_log = time.monotonic()
+            for cam in cams:
+                print(f"[{cam['name']}] {cam['metrics'].log_line()}")
+
+finally:
+    report = {'backend': args.backend, 'batch_sources': args.batch_sources, 'sources': {}}
+    for cam in cams:
+        cam['source'].release()
+        entry = {
+            'avg_fps': round(cam['fps'].mean(), 3),
+            'stages': cam['metrics'].summary(),
+            'capture': cam['source'].stats(),
+        }
+        line = f"{cam['name']}: {entry['avg_fps']:.2f} FPS"
+        if cam['actuator'] is not None:
+            entry['actuator'] = cam['actuator'].stats()
+            line += f", {entry['actuator']['executed']} servo sequences"
+            cam['actuator'].stop(timeout=10.0)
+        print(line)
+        report['sources'][cam['name']] = entry
+
+    if args.metrics_json:
+        try:
+            with open(args.metrics_json, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f'Latency metrics saved to {args.metrics_json}')
+        except Exception as e:
+            print('Metrics dump error:', e)
+
+    try:
+        cleanup_servo()
+    except Exception as e:
+        print('Cleanup servo error:', e)
+    if not args.headless:
+        cv2.destroyAllWindows()
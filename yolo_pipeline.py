@@ -0,0 +1,234 @@
+import time
+import threading
+from collections import deque
+
+from yolo_actuator import POLICY_LATEST, POLICY_DROP
+
+# ========== PIPELINE BERTAHAP (SATU THREAD PER STAGE) ==========
+
+POLICY_BLOCK = 'block'      # antrian penuh -> producer menunggu (tidak ada item yang hilang)
+STAGE_POLICIES = [POLICY_LATEST, POLICY_DROP, POLICY_BLOCK]
+
+
+def parse_stage_policies(text, defaults):
+    """
+    Parse --pipeline-policy "inference=latest,postprocess=block" di atas
+    dict default {stage: policy}. Stage yang tidak disebut memakai default.
+    """
+    policies = dict(defaults)
+    if not text:
+        return policies
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        stage, _, policy = part.partition('=')
+        stage, policy = stage.strip(), policy.strip()
+        if stage not in policies:
+            raise ValueError(f'Unknown stage "{stage}" (choose from {", ".join(policies)})')
+        if policy not in STAGE_POLICIES:
+            raise ValueError(f'Unknown policy "{policy}" (choose from {", ".join(STAGE_POLICIES)})')
+        policies[stage] = policy
+    return policies
+
+
+class StageQueue:
+    """
+    Antrian terbatas di depan sebuah stage.
+
+    Jika penuh, policy menentukan perilaku put():
+    'latest' = item terlama dibuang (consumer selalu dapat data terbaru),
+    'drop' = item baru dibuang, 'block' = producer menunggu.
+
+    on_drop(item) dipanggil untuk setiap item yang dibuang (mis. untuk
+    mengembalikan slot shared memory), di luar lock antrian.
+    """
+
+    def __init__(self, maxsize=1, policy=POLICY_LATEST, on_drop=None):
+        if policy not in STAGE_POLICIES:
+            raise ValueError(f'Unknown stage policy: {policy}')
+        self.maxsize = maxsize
+        self.policy = policy
+        self.on_drop = on_drop
+
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Statistik
+        self.put_count = 0
+        self.dropped = 0
+        self.blocked_time = 0.0
+
+    def put(self, item):
+        """Masukkan item. False jika item dibuang atau antrian sudah ditutup."""
+        dropped = None
+        with self._cond:
+            if not self._closed and len(self._items) >= self.maxsize:
+                if self.policy == POLICY_BLOCK:
+                    t0 = time.perf_counter()
+                    self._cond.wait_for(lambda: len(self._items) < self.maxsize or self._closed)
+                    self.blocked_time += time.perf_counter() - t0
+                elif self.policy == POLICY_DROP:
+                    self.dropped += 1
+                    dropped = item
+                else:
+                    dropped = self._items.popleft()
+                    self.dropped += 1
+            if self._closed:
+                dropped = item
+            elif dropped is not item:
+                self._items.append(item)
+                self.put_count += 1
+                self._cond.notify_all()
+        if dropped is not None and self.on_drop is not None:
+            self.on_drop(dropped)
+        return dropped is not item
+
+    def get(self, timeout=None):
+        """Item berikutnya, atau None jika timeout / antrian ditutup dan kosong."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+    def close(self, discard=False):
+        """Tutup antrian; item yang tersisa masih bisa diambil kecuali `discard`."""
+        with self._cond:
+            self._closed = True
+            discarded = list(self._items) if discard else []
+            if discard:
+                self._items.clear()
+            self._cond.notify_all()
+        if self.on_drop is not None:
+            for item in discarded:
+                self.on_drop(item)
+
+    @property
+    def finished(self):
+        """True jika antrian ditutup dan sudah kosong."""
+        return self._closed and not self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def stats(self):
+        return {
+            'policy': self.policy,
+            'put': self.put_count,
+            'dropped': self.dropped,
+            'depth': len(self._items),
+            'blocked_s': round(self.blocked_time, 3),
+        }
+
+
+class Pipeline:
+    """
+    Rantai stage yang masing-masing berjalan di thread sendiri, dihubungkan
+    oleh StageQueue:
+
+        source() -> [q] -> stage(item) -> [q] -> stage(item) -> [output]
+
+    Selama stage melepas GIL (OpenCV, NumPy, runtime inference), stage-stage
+    berjalan overlap dan throughput mendekati stage paling lambat, bukan
+    jumlah semua stage.
+
+    source() mengembalikan item baru, atau None jika sumber habis. Stage
+    menerima item dan mengembalikan item untuk stage berikutnya (None =
+    buang item). Hasil stage terakhir diambil lewat get(), biasanya di main
+    thread (cv2.imshow harus di main thread). Jika sebuah stage error,
+    seluruh pipeline dihentikan dan error disimpan di `error`. on_drop(item)
+    dipanggil untuk item yang dibuang antrian mana pun.
+    """
+
+    def __init__(self, on_drop=None):
+        self.on_drop = on_drop
+        self._source = None
+        self._stages = []
+        self._threads = []
+        self._stop = threading.Event()
+        self.output = None
+        self.error = None
+
+    def source(self, name, fn):
+        self._source = (name, fn)
+        return self
+
+    def add(self, name, fn, maxsize=1, policy=POLICY_LATEST):
+        """Tambah stage `name` dengan antrian input berukuran `maxsize`."""
+        self._stages.append((name, fn, StageQueue(maxsize, policy, self.on_drop)))
+        return self
+
+    def start(self, out_maxsize=1, out_policy=POLICY_LATEST):
+        self.output = StageQueue(out_maxsize, out_policy, self.on_drop)
+        queues = [q for _, _, q in self._stages] + [self.output]
+
+        name, fn = self._source
+        self._threads.append(threading.Thread(target=self._run_source, args=(name, fn, queues[0]),
+                                              name=f'stage-{name}', daemon=True))
+        for (name, fn, q_in), q_out in zip(self._stages, queues[1:]):
+            self._threads.append(threading.Thread(target=self._run_stage, args=(name, fn, q_in, q_out),
+                                                  name=f'stage-{name}', daemon=True))
+        for t in self._threads:
+            t.start()
+        return self
+
+    def _fail(self, name, e):
+        print(f'ERROR: Pipeline stage {name} gagal: {type(e).__name__}: {e}')
+        self.error = e
+        self.stop()
+
+    def _run_source(self, name, fn, q_out):
+        try:
+            while not self._stop.is_set():
+                item = fn()
+                if item is None:
+                    break
+                q_out.put(item)
+        except Exception as e:
+            self._fail(name, e)
+        finally:
+            q_out.close()
+
+    def _run_stage(self, name, fn, q_in, q_out):
+        try:
+            while not self._stop.is_set():
+                item = q_in.get()
+                if item is None:
+                    break
+                item = fn(item)
+                if item is not None:
+                    q_out.put(item)
+        except Exception as e:
+            self._fail(name, e)
+        finally:
+            q_out.close()
+
+    def get(self, timeout=None):
+        """Item berikutnya dari stage terakhir, atau None (timeout / pipeline selesai)."""
+        return self.output.get(timeout)
+
+    @property
+    def finished(self):
+        return self.output.finished
+
+    def stop(self, timeout=2.0):
+        """Hentikan semua stage; item yang masih antri dibuang."""
+        self._stop.set()
+        for _, _, q in self._stages:
+            q.close(discard=True)
+        if self.output is not None:
+            self.output.close(discard=True)
+        current = threading.current_thread()
+        for t in self._threads:
+            if t is not current and t.is_alive():
+                t.join(timeout)
+
+    def stats(self):
+        """{stage: statistik antrian input}, plus 'output'."""
+        out = {name: q.stats() for name, _, q in self._stages}
+        if self.output is not None:
+            out['output'] = self.output.stats()
+        return out
@@ -0,0 +1,93 @@
+import struct
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# ========== HASIL DETEKSI (ARRAY KOMPAK) ==========
+
+# boxes: (N, 4) float32 xyxy, confs: (N,) float32, classes: (N,) int32
+Detections = namedtuple('Detections', ['boxes', 'confs', 'classes'])
+
+
+def empty_detections():
+    """Detections kosong (N = 0)."""
+    return Detections(np.zeros((0, 4), dtype=np.float32),
+                      np.zeros((0,), dtype=np.float32),
+                      np.zeros((0,), dtype=np.int32))
+
+
+def extract_detections(result, min_thresh):
+    """
+    Ambil semua deteksi dari satu hasil Ultralytics dalam satu kali transfer.
+
+    `boxes.data` (N x 6: xyxy, conf, cls) dipindah ke NumPy sekali saja,
+    lalu difilter dengan mask `conf > min_thresh`, jadi tidak ada tensor
+    kecil / sinkronisasi device per box.
+    """
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return empty_detections()
+
+    data = boxes.data.cpu().numpy()
+    keep = data[:, 4] > min_thresh
+    data = data[keep]
+
+    return Detections(data[:, :4].astype(np.float32),
+                      data[:, 4].astype(np.float32),
+                      data[:, 5].astype(np.int32))
+
+
+def best_detection(dets):
+    """Index deteksi dengan confidence tertinggi, atau None jika kosong."""
+    if len(dets.confs) == 0:
+        return None
+    return int(np.argmax(dets.confs))
+
+
+def filter_detections(dets, mask):
+    """Detections baru yang hanya berisi baris dengan mask True."""
+    return Detections(dets.boxes[mask], dets.confs[mask], dets.classes[mask])
+
+
+# ========== FORMAT BINER (SERVER / CLIENT INFERENCE) ==========
+
+# uint32 N, lalu boxes float32 (N x 4), confs float32 (N), classes int32 (N), little-endian
+_COUNT = struct.Struct('<I')
+
+
+def encode_detections(dets):
+    """Serialisasi Detections ke bytes (16 + 4 + 4 byte per deteksi, plus header 4 byte)."""
+    return b''.join([_COUNT.pack(len(dets.confs)),
+                     np.ascontiguousarray(dets.boxes, dtype='<f4').tobytes(),
+                     np.ascontiguousarray(dets.confs, dtype='<f4').tobytes(),
+                     np.ascontiguousarray(dets.classes, dtype='<i4').tobytes()])
+
+
+def decode_detections(buf):
+    """Kebalikan encode_detections()."""
+    (n,) = _COUNT.unpack_from(buf, 0)
+    offset = _COUNT.size
+    boxes = np.frombuffer(buf, dtype='<f4', count=n * 4, offset=offset).reshape(n, 4)
+    offset += n * 16
+    confs = np.frombuffer(buf, dtype='<f4', count=n, offset=offset)
+    offset += n * 4
+    classes = np.frombuffer(buf, dtype='<i4', count=n, offset=offset)
+    return Detections(boxes.astype(np.float32), confs.astype(np.float32), classes.astype(np.int32))
+
+
+# ========== GAMBAR BOUNDING BOX ==========
+
+def draw_detections(frame, dets, labels, bbox_colors):
+    """Gambar box + label untuk setiap deteksi. Mengembalikan jumlah objek."""
+    for (xmin, ymin, xmax, ymax), conf, classidx in zip(dets.boxes.astype(np.int32).tolist(), dets.confs.tolist(), dets.classes.tolist()):
+        color = bbox_colors[classidx % 10]
+        cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), color, 2)
+
+        label = f'{labels[classidx]}: {int(conf*100)}%'
+        labelSize, baseLine = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1) # Get font size
+        label_ymin = max(ymin, labelSize[1] + 10) # Make sure not to draw label too close to top of window
+        cv2.rectangle(frame, (xmin, label_ymin-labelSize[1]-10), (xmin+labelSize[0], label_ymin+baseLine-10), color, cv2.FILLED)
+        cv2.putText(frame, label, (xmin, label_ymin-7), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
+
+    return len(dets.confs)
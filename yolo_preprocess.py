@@ -0,0 +1,140 @@
+import cv2
+import numpy as np
+
+# ========== LETTERBOX KE UKURAN INPUT MODEL ==========
+
+class Letterbox:
+    """
+    Resize frame sekali saja ke input model (imgsz x imgsz) dengan rasio
+    aspek dipertahankan, ke dalam buffer yang dialokasikan sekali.
+
+    Padding hanya diisi ulang jika ukuran frame sumber berubah. Box hasil
+    inference (dalam koordinat buffer) dipetakan kembali secara analitik
+    lewat scale_boxes().
+    """
+
+    def __init__(self, imgsz, pad_value=114):
+        self.imgsz = imgsz
+        self.pad_value = pad_value
+        self.buffer = np.full((imgsz, imgsz, 3), pad_value, dtype=np.uint8)
+
+        self._src_shape = None
+        self._view = None
+        self.scale = 1.0
+        self.pad_left = 0
+        self.pad_top = 0
+        self.new_size = (imgsz, imgsz)
+
+    def _configure(self, h, w):
+        r = min(self.imgsz / h, self.imgsz / w)
+        new_w, new_h = int(round(w * r)), int(round(h * r))
+        self.pad_left = (self.imgsz - new_w) // 2
+        self.pad_top = (self.imgsz - new_h) // 2
+        self.scale = r
+        self.new_size = (new_w, new_h)
+
+        self.buffer[:] = self.pad_value
+        self._view = self.buffer[self.pad_top:self.pad_top + new_h, self.pad_left:self.pad_left + new_w]
+        self._src_shape = (h, w)
+
+    def __call__(self, frame):
+        """Letterbox frame ke buffer internal dan kembalikan buffer tersebut."""
+        h, w = frame.shape[:2]
+        if (h, w) != self._src_shape:
+            self._configure(h, w)
+
+        out = cv2.resize(frame, self.new_size, dst=self._view, interpolation=cv2.INTER_LINEAR)
+        if out is not self._view:
+            # Fallback bila binding OpenCV tidak menulis langsung ke view
+            self._view[...] = out
+        return self.buffer
+
+    def scale_boxes(self, boxes, out_w=None, out_h=None):
+        """
+        Petakan box xyxy dari koordinat buffer ke koordinat frame sumber,
+        atau ke ukuran display (out_w x out_h) jika diberikan.
+        """
+        src_h, src_w = self._src_shape
+        out_w = out_w or src_w
+        out_h = out_h or src_h
+        sx = out_w / (src_w * self.scale)
+        sy = out_h / (src_h * self.scale)
+
+        mapped = np.empty(boxes.shape, dtype=np.float32)
+        mapped[:, 0::2] = np.clip((boxes[:, 0::2] - self.pad_left) * sx, 0, out_w - 1)
+        mapped[:, 1::2] = np.clip((boxes[:, 1::2] - self.pad_top) * sy, 0, out_h - 1)
+        return mapped
+
+
+# ========== REGION OF INTEREST (DROP ZONE) ==========
+
+def parse_roi(text):
+    """
+    Parse --roi. Persegi: "x1,y1,x2,y2". Poligon: "x1,y1;x2,y2;x3,y3;...".
+    Nilai <= 1.0 semua dianggap fraksi dari ukuran frame, selain itu pixel.
+    """
+    if ';' in text:
+        points = [tuple(float(v) for v in p.split(',')) for p in text.split(';') if p.strip()]
+        if len(points) < 3 or any(len(p) != 2 for p in points):
+            raise ValueError('ROI polygon needs at least 3 "x,y" points separated by ";"')
+        return RegionOfInterest(points, polygon=True)
+
+    values = [float(v) for v in text.split(',')]
+    if len(values) != 4:
+        raise ValueError('ROI rectangle must be "x1,y1,x2,y2"')
+    x1, y1, x2, y2 = values
+    return RegionOfInterest([(x1, y1), (x2, y1), (x2, y2), (x1, y2)], polygon=False)
+
+
+class RegionOfInterest:
+    """
+    Area yang dilihat model. Frame di-crop ke bounding rect ROI (view, tanpa
+    copy) sebelum preprocessing; box hasil deteksi dikembalikan ke koordinat
+    frame penuh dengan to_frame(). Untuk ROI poligon, deteksi yang titik
+    tengahnya di luar poligon dibuang lewat contains().
+    """
+
+    def __init__(self, points, polygon=False):
+        self.points = np.array(points, dtype=np.float32)
+        self.polygon = polygon
+        self.normalized = bool((self.points <= 1.0).all())
+
+        self._frame_shape = None
+        self._pixel_points = None
+        self.x0 = self.y0 = self.x1 = self.y1 = 0
+
+    def _configure(self, h, w):
+        pts = self.points * np.array([w, h], dtype=np.float32) if self.normalized else self.points.copy()
+        pts[:, 0] = np.clip(pts[:, 0], 0, w)
+        pts[:, 1] = np.clip(pts[:, 1], 0, h)
+        self._pixel_points = pts
+        self.x0, self.y0 = int(pts[:, 0].min()), int(pts[:, 1].min())
+        self.x1, self.y1 = int(np.ceil(pts[:, 0].max())), int(np.ceil(pts[:, 1].max()))
+        if self.x1 <= self.x0 or self.y1 <= self.y0:
+            raise ValueError(f'ROI is empty for a {w}x{h} frame')
+        self._frame_shape = (h, w)
+
+    def crop(self, frame):
+        """View frame[y0:y1, x0:x1] (tanpa copy)."""
+        h, w = frame.shape[:2]
+        if (h, w) != self._frame_shape:
+            self._configure(h, w)
+        return frame[self.y0:self.y1, self.x0:self.x1]
+
+    def to_frame(self, boxes):
+        """Geser box xyxy dari koordinat crop ke koordinat frame penuh."""
+        return boxes + np.array([self.x0, self.y0, self.x0, self.y0], dtype=boxes.dtype)
+
+    def contains(self, boxes):
+        """Mask boolean: titik tengah box (koordinat frame penuh) ada di dalam ROI."""
+        if not self.polygon or len(boxes) == 0:
+            return np.ones(len(boxes), dtype=bool)
+        centers = np.stack([(boxes[:, 0] + boxes[:, 2]) / 2, (boxes[:, 1] + boxes[:, 3]) / 2], axis=1)
+        contour = self._pixel_points.reshape(-1, 1, 2)
+        return np.array([cv2.pointPolygonTest(contour, (float(cx), float(cy)), False) >= 0
+                         for cx, cy in centers], dtype=bool)
+
+    def draw(self, frame, scale_x=1.0, scale_y=1.0, color=(0, 255, 0)):
+        """Gambar outline ROI (untuk display/recording)."""
+        pts = (self._pixel_points * np.array([scale_x, scale_y], dtype=np.float32)).astype(np.int32)
+        cv2.polylines(frame, [pts.reshape(-1, 1, 2)], True, color, 1)
@@ -0,0 +1,66 @@
+import time
+import signal
+import threading
+
+# ========== KONTROL LEWAT SIGNAL (MODE HEADLESS) ==========
+
+class SignalControl:
+    """
+    Pengganti tombol keyboard saat tidak ada display.
+
+    SIGINT / SIGTERM -> stop (loop keluar dengan bersih, cleanup tetap jalan)
+    SIGUSR1          -> snapshot (simpan frame beranotasi berikutnya)
+    """
+
+    def __init__(self):
+        self.stop = threading.Event()
+        self.snapshot = threading.Event()
+
+    def install(self):
+        signal.signal(signal.SIGINT, self._on_stop)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        if hasattr(signal, 'SIGUSR1'):
+            signal.signal(signal.SIGUSR1, self._on_snapshot)
+        return self
+
+    def _on_stop(self, signum, frame):
+        if self.stop.is_set():
+            # Signal kedua: keluar paksa
+            raise KeyboardInterrupt
+        print(f'\nSTATUS: Signal {signum} diterima, menghentikan program...')
+        self.stop.set()
+
+    def _on_snapshot(self, signum, frame):
+        self.snapshot.set()
+
+    def take_snapshot(self):
+        """True sekali setelah SIGUSR1 diterima."""
+        if self.snapshot.is_set():
+            self.snapshot.clear()
+            return True
+        return False
+
+
+# ========== TIMING FASE STARTUP ==========
+
+class StartupTimer:
+    """Catat durasi tiap fase startup dan total waktu sejak `t0` (perf_counter)."""
+
+    def __init__(self, t0=None):
+        self.t0 = time.perf_counter() if t0 is None else t0
+        self._last = self.t0
+        self.phases = {}
+
+    def mark(self, name):
+        """Akhiri fase `name` (dihitung sejak mark sebelumnya) dan print."""
+        now = time.perf_counter()
+        self.record(name, now - self._last)
+        self._last = now
+
+    def record(self, name, seconds):
+        """Catat fase yang diukur di tempat lain (mis. thread paralel)."""
+        self.phases[name] = round(seconds, 3)
+        print(f'STARTUP: {name} {seconds:.2f}s (t+{time.perf_counter() - self.t0:.2f}s)')
+
+    def total(self):
+        return time.perf_counter() - self.t0
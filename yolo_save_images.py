@@ -8,14 +8,16 @@ import os
 import sys
 import time
 import cv2
-import numpy as np
-from ultralytics import YOLO
 import argparse
+from yolo_postprocess import extract_detections, draw_detections
+from yolo_runtime import SignalControl
+from yolo_writer import ImageWriterPool, DetectionLog, iter_detection_log
+from yolo_metrics import RingBuffer
 from datetime import datetime
 
 # Parse arguments
 parser = argparse.ArgumentParser(description='YOLO Detection - Save as Images')
-parser.add_argument('--model', required=True, help='Path to YOLO model (e.g., yolo11n.pt)')
+parser.add_argument('--model', default=None, help='Path to YOLO model (e.g., yolo11n.pt)')
 parser.add_argument('--camera', type=int, default=1, help='Camera index (default: 1)')
 parser.add_argument('--interval', type=float, default=1.0, help='Capture interval in seconds (default: 1.0)')
 parser.add_argument('--resolution', default='320x320', help='Resolution WxH (default: 320x320)')
@@ -23,8 +25,15 @@ parser.add_argument('--output-folder', default=None, help='Output folder (defaul
 parser.add_argument('--thresh', type=float, default=0.5, help='Confidence threshold (default: 0.5)')
 parser.add_argument('--max-frames', type=int, default=0, help='Maximum frames to capture (0 = unlimited)')
 parser.add_argument('--save-original', action='store_true', help='Also save original frame without detection boxes')
+parser.add_argument('--format', default='jpg', choices=['jpg', 'png', 'webp'], help='Output image format (default: jpg)')
+parser.add_argument('--jpeg-quality', type=int, default=90, help='JPEG/WebP quality 0-100 (default: 90)')
+parser.add_argument('--writer-threads', type=int, default=2, help='Background image encoder/writer threads (default: 2)')
+parser.add_argument('--server', default=None, help='Send frames to a running yolo_server.py at this address (e.g. unix:///tmp/yolo.sock) instead of loading --model here')
+parser.add_argument('--writer-queue', type=int, default=8, help='Max images waiting to be written before capture blocks (default: 8)')
 
 args = parser.parse_args()
+if not args.model and not args.server:
+    parser.error('either --model or --server is required')
 
 # Configuration
 MODEL_PATH = args.model
@@ -53,7 +62,7 @@ if SAVE_ORIGINAL:
 print(f"\n{'='*70}")
 print(f"YOLO Detection - Save as Images")
 print(f"{'='*70}")
-print(f"Model: {MODEL_PATH}")
+print(f"Model: {MODEL_PATH or args.server}")
 print(f"Camera Index: {CAMERA_INDEX}")
 print(f"Resolution: {resW}x{resH}")
 print(f"Interval: {CAPTURE_INTERVAL}s")
@@ -61,12 +70,20 @@ print(f"Confidence Threshold: {CONFIDENCE_THRESHOLD}")
 print(f"Output Folder: {OUTPUT_FOLDER}")
 print(f"Max Frames: {MAX_FRAMES if MAX_FRAMES > 0 else 'Unlimited'}")
 print(f"Save Original: {'Yes' if SAVE_ORIGINAL else 'No'}")
+print(f"Image Format: {args.format} (quality {args.jpeg_quality})")
 print(f"{'='*70}\n")
 
-# Load YOLO model
-print("Loading YOLO model...")
-model = YOLO(MODEL_PATH)
-labels = model.names
+# Load YOLO model (or connect to the inference server that already has it loaded)
+if args.server:
+    from yolo_client import YoloClient
+    print(f"Connecting to inference server {args.server}...")
+    client = YoloClient(args.server)
+    labels = client.names
+else:
+    from ultralytics import YOLO
+    print("Loading YOLO model...")
+    model = YOLO(MODEL_PATH)
+    labels = model.names
 print(f"Model loaded! Classes: {len(labels)}")
 print(f"Classes: {list(labels.values())}\n")
 
@@ -96,13 +113,26 @@ bbox_colors = [(164,120,87), (68,148,228), (93,97,209), (178,182,133), (88,159,1
 last_capture_time = 0
 frame_count = 0
 total_objects_detected = 0
-detection_summary = []
+processing_times = RingBuffer(200)
+
+# Detections of this run are streamed to a JSON Lines log (constant memory,
+# any log from an earlier run in the same folder is replaced); the
+# human-readable report is generated from it at the end
+log_file = os.path.join(OUTPUT_FOLDER, 'detections.jsonl')
+detection_log = DetectionLog(log_file)
+
+# Background encoder/writer pool (JPEG encoding off the capture loop)
+writer = ImageWriterPool(fmt=args.format, quality=args.jpeg_quality,
+                         workers=args.writer_threads, max_pending=args.writer_queue)
 
 print(f"Starting detection and saving to: {OUTPUT_FOLDER}")
-print(f"Press Ctrl+C to stop\n")
+print(f"Press Ctrl+C (or send SIGTERM) to stop\n")
+
+# SIGTERM stops the loop cleanly so the report is still written
+control = SignalControl().install()
 
 try:
-    while True:
+    while not control.stop.is_set():
         current_time = time.time()
 
         # Check if reached max frames
@@ -127,54 +157,28 @@ try:
             if frame.shape[1] != resW or frame.shape[0] != resH:
                 frame = cv2.resize(frame, (resW, resH))
 
-            # Save original frame if requested
-            original_frame = frame.copy()
+            # Save original frame if requested (copy only then, boxes are drawn on frame below)
             if SAVE_ORIGINAL:
-                original_filename = os.path.join(ORIGINAL_FOLDER, f'frame_{frame_count:04d}.jpg')
-                cv2.imwrite(original_filename, original_frame)
+                writer.submit(os.path.join(ORIGINAL_FOLDER, f'frame_{frame_count:04d}'), frame.copy())
 
             # Run YOLO inference
             print("  Running YOLO inference...")
-            results = model(frame, verbose=False)
-            detections = results[0].boxes
-
-            # Process detections
-            object_count = 0
-            detected_classes = []
-
-            for i in range(len(detections)):
-                # Get bounding box coordinates
-                xyxy_tensor = detections[i].xyxy.cpu()
-                xyxy = xyxy_tensor.numpy().squeeze()
-                xmin, ymin, xmax, ymax = xyxy.astype(int)
-
-                # Get class and confidence
-                classidx = int(detections[i].cls.item())
-                classname = labels[classidx]
-                conf = detections[i].conf.item()
-
-                # Draw if confidence is high enough
-                if conf > CONFIDENCE_THRESHOLD:
-                    color = bbox_colors[classidx % 10]
-                    cv2.rectangle(frame, (xmin, ymin), (xmax, ymax), color, 2)
-
-                    # Draw label
-                    label = f'{classname}: {int(conf*100)}%'
-                    labelSize, baseLine = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
-                    label_ymin = max(ymin, labelSize[1] + 10)
-                    cv2.rectangle(frame, (xmin, label_ymin-labelSize[1]-10),
-                                (xmin+labelSize[0], label_ymin+baseLine-10), color, cv2.FILLED)
-                    cv2.putText(frame, label, (xmin, label_ymin-7),
-                              cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 1)
-
-                    object_count += 1
-                    detected_classes.append(f"{classname} ({int(conf*100)}%)")
+            if args.server:
+                dets = client.detect(frame, CONFIDENCE_THRESHOLD)
+            else:
+                results = model(frame, verbose=False)
+                # Process detections (filtered by confidence, as NumPy arrays)
+                dets = extract_detections(results[0], CONFIDENCE_THRESHOLD)
+            object_count = draw_detections(frame, dets, labels, bbox_colors)
+            detected_classes = [f"{labels[c]} ({int(conf*100)}%)"
+                                for c, conf in zip(dets.classes.tolist(), dets.confs.tolist())]
 
             total_objects_detected += object_count
 
             # Calculate processing time
             t_stop = time.perf_counter()
             processing_time = t_stop - t_start
+            processing_times.append(processing_time)
 
             # Draw info overlay on frame
             cv2.putText(frame, f'Frame: {frame_count}', (10, 20),
@@ -189,16 +193,16 @@ try:
             cv2.putText(frame, timestamp_str, (10, resH - 10),
                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (200, 200, 200), 1)
 
-            # Save detected frame
-            output_filename = os.path.join(OUTPUT_FOLDER, f'detection_{frame_count:04d}.jpg')
-            cv2.imwrite(output_filename, frame)
+            # Save detected frame (encoded and written in the background)
+            output_filename = writer.submit(os.path.join(OUTPUT_FOLDER, f'detection_{frame_count:04d}'), frame)
 
-            # Store summary
-            detection_summary.append({
+            # Log summary
+            detection_log.write({
                 'frame': frame_count,
+                'file': output_filename,
                 'objects': object_count,
                 'classes': detected_classes,
-                'time': processing_time,
+                'time': round(processing_time, 4),
                 'timestamp': timestamp_str
             })
 
@@ -217,7 +221,11 @@ except KeyboardInterrupt:
     print("\n\nStopped by user (Ctrl+C)")
 
 finally:
-    # Save summary report
+    # Wait for queued images to reach the disk, close the detection log
+    writer.close()
+    detection_log.close()
+
+    # Save summary report (built by streaming over the detection log)
     report_file = os.path.join(OUTPUT_FOLDER, 'detection_report.txt')
     with open(report_file, 'w') as f:
         f.write("="*70 + "\n")
@@ -236,7 +244,7 @@ finally:
         f.write("Frame-by-Frame Summary\n")
         f.write("="*70 + "\n\n")
 
-        for summary in detection_summary:
+        for summary in iter_detection_log(log_file):
             f.write(f"Frame {summary['frame']:04d} - {summary['timestamp']}\n")
             f.write(f"  Objects: {summary['objects']}\n")
             if summary['classes']:
@@ -252,14 +260,19 @@ finally:
     print(f"Total objects detected: {total_objects_detected}")
     if frame_count > 0:
         print(f"Average objects per frame: {total_objects_detected/frame_count:.2f}")
+    if len(processing_times):
+        p50, p95 = processing_times.percentile([50, 95])
+        print(f"Processing time (last {len(processing_times)} frames): "
+              f"avg {processing_times.mean():.2f}s, p50 {p50:.2f}s, p95 {p95:.2f}s")
     print(f"\nResults saved to: {OUTPUT_FOLDER}")
     print(f"  - Detection images: {frame_count} files")
     if SAVE_ORIGINAL:
         print(f"  - Original images: {frame_count} files in 'original' subfolder")
+    print(f"  - Detection log: {log_file}")
     print(f"  - Report: {report_file}")
+    print(f"Image writer: {writer.summary()}")
     print(f"{'='*70}\n")
 
     cap.release()
-    cv2.destroyAllWindows()
 
     print("Done!")
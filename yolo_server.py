@@ -0,0 +1,303 @@
+"""
+YOLO Inference Server
+Keeps one model resident and serves detections to local tools (the sorter
+loop, yolo_save_images.py, offline scripts) over localhost HTTP or a Unix
+socket. Requests that arrive together are batched into one model call
+within a small latency budget (--max-wait-ms).
+
+Endpoints:
+    POST /detect?thresh=0.5[&format=json]
+         body: JPEG/PNG (Content-Type: image/jpeg, image/png) or raw BGR
+               uint8 pixels (Content-Type: application/octet-stream,
+               X-Shape: H,W,C)
+         returns the compact Detections arrays (see
+         yolo_postprocess.encode_detections), or JSON with format=json
+    GET  /info   backend, model, imgsz and class names
+    GET  /stats  request / batch statistics
+
+Example:
+    python yolo_server.py --model my_model_ncnn_model --backend ncnn --unix /tmp/yolo.sock
+    python yolo_detect.py --backend server --model unix:///tmp/yolo.sock --source usb0
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import socketserver
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+import cv2
+import numpy as np
+
+from yolo_backend import BACKENDS, CACHE_AUTO, load_backend, warmup_backend
+from yolo_postprocess import encode_detections, filter_detections
+from yolo_runtime import SignalControl
+
+# ========== BATCHING REQUEST YANG DATANG BERSAMAAN ==========
+
+class BatchingInference:
+    """
+    Satu thread model yang menggabungkan request bersamaan menjadi satu
+    panggilan infer_batch.
+
+    Request pertama di batch menunggu paling lama `max_wait` detik untuk
+    request lain (atau sampai `max_batch` terkumpul). Batch dijalankan
+    dengan threshold terendah, lalu hasil tiap request difilter dengan
+    threshold-nya sendiri.
+    """
+
+    def __init__(self, model, max_batch=8, max_wait=0.005):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+
+        self._pending = deque()
+        self._cond = threading.Condition()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='batcher', daemon=True)
+        self._thread.start()
+
+        # Statistik
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self.largest_batch = 0
+        self.infer_time = 0.0
+        self.wait_time = 0.0
+
+    def infer(self, image, thresh):
+        """Antrikan satu gambar dan tunggu hasilnya (dipanggil dari thread request)."""
+        req = {'image': image, 'thresh': thresh, 't': time.perf_counter(),
+               'done': threading.Event(), 'result': None, 'error': None}
+        with self._cond:
+            if not self._running:
+                raise RuntimeError('Server is shutting down')
+            self._pending.append(req)
+            self._cond.notify_all()
+        req['done'].wait()
+        if req['error'] is not None:
+            raise req['error']
+        return req['result']
+
+    def _next_batch(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or not self._running)
+            if not self._pending:
+                return None
+            # Tunggu teman satu batch, paling lama max_wait sejak request pertama
+            deadline = self._pending[0]['t'] + self.max_wait
+            while len(self._pending) < self.max_batch and self._running:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            n = min(len(self._pending), self.max_batch)
+            return [self._pending.popleft() for _ in range(n)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            t0 = time.perf_counter()
+            try:
+                thresh = min(req['thresh'] for req in batch)
+                if len(batch) == 1:
+                    results = [self.model.infer(batch[0]['image'], thresh)]
+                else:
+                    results = self.model.infer_batch([req['image'] for req in batch], thresh)
+                for req, dets in zip(batch, results):
+                    if req['thresh'] > thresh:
+                        dets = filter_detections(dets, dets.confs > req['thresh'])
+                    req['result'] = dets
+            except Exception as e:
+                self.errors += 1
+                for req in batch:
+                    req['error'] = e
+            finally:
+                t1 = time.perf_counter()
+                self.requests += len(batch)
+                self.batches += 1
+                self.largest_batch = max(self.largest_batch, len(batch))
+                self.infer_time += t1 - t0
+                self.wait_time += sum(t0 - req['t'] for req in batch)
+                for req in batch:
+                    req['done'].set()
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=5.0)
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'errors': self.errors,
+            'avg_batch': round(self.requests / self.batches, 2) if self.batches else 0.0,
+            'largest_batch': self.largest_batch,
+            'avg_infer_ms': round(self.infer_time / self.batches * 1000, 2) if self.batches else 0.0,
+            'avg_queue_wait_ms': round(self.wait_time / self.requests * 1000, 2) if self.requests else 0.0,
+            'pending': len(self._pending),
+        }
+
+
+# ========== HTTP ==========
+
+def decode_image(body, content_type, shape):
+    """Body request -> array BGR uint8. ValueError jika formatnya salah."""
+    if content_type.startswith('image/'):
+        image = cv2.imdecode(np.frombuffer(body, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            raise ValueError('Cannot decode image')
+        return image
+    if not shape:
+        raise ValueError('Raw frames need an X-Shape: H,W,C header')
+    try:
+        h, w, c = (int(v) for v in shape.split(','))
+    except ValueError:
+        raise ValueError(f'X-Shape must be H,W,C integers, got {shape!r}') from None
+    if h <= 0 or w <= 0:
+        raise ValueError(f'X-Shape {h},{w},{c}: height and width must be positive')
+    if c not in (1, 3, 4):
+        raise ValueError(f'X-Shape {h},{w},{c}: channels must be 1 (gray), 3 (BGR) or 4 (BGRA)')
+    if len(body) != h * w * c:
+        raise ValueError(f'Body has {len(body)} bytes, X-Shape {h},{w},{c} needs {h * w * c}')
+    image = np.frombuffer(body, dtype=np.uint8).reshape(h, w, c)
+    return image if c == 3 else cv2.cvtColor(image, cv2.COLOR_GRAY2BGR if c == 1 else cv2.COLOR_BGRA2BGR)
+
+
+class DetectHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'      # keep-alive: satu koneksi per thread client
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, code, body, content_type):
+        self.send_response(code)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, code, obj):
+        self._send(code, json.dumps(obj).encode(), 'application/json')
+
+    def do_GET(self):
+        path = urlsplit(self.path).path
+        if path == '/info':
+            self._send_json(200, self.server.info)
+        elif path == '/stats':
+            self._send_json(200, self.server.batcher.stats())
+        else:
+            self._send_json(404, {'error': f'Unknown path {path}'})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if url.path != '/detect':
+            self._send_json(404, {'error': f'Unknown path {url.path}'})
+            return
+
+        query = parse_qs(url.query)
+        try:
+            thresh = float(query.get('thresh', ['0.5'])[0])
+            image = decode_image(body, self.headers.get('Content-Type', ''), self.headers.get('X-Shape'))
+        except ValueError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+
+        try:
+            dets = self.server.batcher.infer(image, thresh)
+        except Exception as e:
+            self._send_json(500, {'error': f'{type(e).__name__}: {e}'})
+            return
+
+        if query.get('format', ['bin'])[0] == 'json':
+            self._send_json(200, {'boxes': dets.boxes.round(1).tolist(),
+                                  'confs': dets.confs.round(4).tolist(),
+                                  'classes': dets.classes.tolist()})
+        else:
+            self._send(200, encode_detections(dets), 'application/octet-stream')
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer di atas Unix domain socket."""
+
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # HTTPServer.server_bind mengharapkan (host, port)
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = 'localhost'
+        self.server_port = 0
+
+    def get_request(self):
+        request, _ = super().get_request()
+        return request, ('unix', 0)
+
+
+# ========== MAIN ==========
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='YOLO Inference Server')
+    parser.add_argument('--model', required=True, help='Path to model (file or exported model folder)')
+    parser.add_argument('--backend', default='ultralytics', choices=[b for b in BACKENDS if b != 'server'],
+                        help='Inference engine (default: ultralytics)')
+    parser.add_argument('--imgsz', default=320, type=int, help='Model input size (default: 320)')
+    parser.add_argument('--host', default='127.0.0.1', help='HTTP bind address (default: 127.0.0.1, local only)')
+    parser.add_argument('--port', default=8765, type=int, help='HTTP port (default: 8765)')
+    parser.add_argument('--unix', default=None, help='Listen on this Unix socket path instead of HTTP (e.g. /tmp/yolo.sock)')
+    parser.add_argument('--max-batch', default=8, type=int, help='Most requests run in one model call (default: 8)')
+    parser.add_argument('--max-wait-ms', default=5.0, type=float,
+                        help='How long the first request waits for others to batch with (default: 5 ms)')
+    parser.add_argument('--model-cache', default=CACHE_AUTO,
+                        help='Folder for the optimized ONNX graph / compiled OpenVINO blob ("auto" = next to the model, empty string disables)')
+    parser.add_argument('--warmup', default=3, type=int, help='Dummy inferences before serving (default: 3)')
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    model = load_backend(args.backend, args.model, imgsz=args.imgsz, cache_dir=args.model_cache or None)
+    if args.warmup > 0:
+        warmup_backend(model, args.warmup)
+    print(f'Model loaded and warmed up in {time.perf_counter() - t0:.1f}s')
+    if not model.batching and args.max_batch > 1:
+        # Engine ini menjalankan gambar satu per satu; menunggu teman batch hanya menambah latensi
+        print(f'NOTE: {args.backend} backend runs images one at a time (ONNX needs a dynamic-batch export), batching disabled')
+        args.max_batch = 1
+
+    batcher = BatchingInference(model, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000.0)
+    if args.unix:
+        if os.path.exists(args.unix):
+            os.unlink(args.unix)
+        server = UnixHTTPServer(args.unix, DetectHandler)
+        address = f'unix://{args.unix}'
+    else:
+        server = ThreadingHTTPServer((args.host, args.port), DetectHandler)
+        address = f'http://{args.host}:{args.port}'
+    server.daemon_threads = True
+    server.batcher = batcher
+    server.info = {'backend': args.backend, 'model': args.model, 'imgsz': model.imgsz,
+                   'names': {int(k): v for k, v in dict(model.names).items()}}
+
+    # SIGINT/SIGTERM -> shutdown() dari thread lain (serve_forever memblok main thread)
+    control = SignalControl().install()
+    threading.Thread(target=lambda: (control.stop.wait(), server.shutdown()), name='shutdown', daemon=True).start()
+
+    print(f'Serving {args.backend} model on {address} (max batch {args.max_batch}, max wait {args.max_wait_ms} ms)')
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        batcher.stop()
+        if args.unix and os.path.exists(args.unix):
+            os.unlink(args.unix)
+        print(f'Server stopped. {json.dumps(batcher.stats())}')
+        sys.exit(0)
@@ -1,5 +1,12 @@
+import json
 import time
+import heapq
 import atexit
+import itertools
+import threading
+from collections import deque
+
+from yolo_actuator import POLICY_LATEST, POLICY_DROP
 
 # ========== KONFIGURASI GPIO ==========
 GPIO_AVAILABLE = False
@@ -10,18 +17,12 @@ snd_organic = None
 snd_non = None
 snd_fail = None
 
+# Import saja (tanpa efek samping ke hardware). Setup GPIO, audio dan posisi
+# awal servo dilakukan eksplisit lewat init_hardware().
 try:
     import RPi.GPIO as GPIO
     GPIO_AVAILABLE = True
     print("STATUS: RPi.GPIO berhasil dimuat.")
-
-    try:
-        import pygame
-        pygame.mixer.init()
-        PYGAME_AVAILABLE = True
-        print("STATUS: Pygame Mixer berhasil diinisialisasi.")
-    except Exception as e:
-        print(f"WARNING: Audio disabled: {e}")
 except Exception:
     # If import fails we run in simulation mode
     GPIO_AVAILABLE = False
@@ -45,15 +46,40 @@ DUTY_TUTUP_TERBUKA = 11.5   # Tutup dibuka
 # ========== WAKTU GERAKAN ==========
 WAKTU_ROTASI = 1.0          # Waktu rotasi bin (detik)
 WAKTU_BUKA_TUTUP = 3.5      # Waktu tunggu tutup terbuka (detik)
+WAKTU_TUTUP = 0.7           # Gerakan tutup ke posisi tertutup (detik)
+WAKTU_TENGAH = 0.5          # Gerakan tutup ke posisi tengah (detik)
+WAKTU_BUKA = 0.8            # Gerakan tutup kembali terbuka (detik)
+JEDA_PWM = 0.05             # Jeda setelah sinyal PWM dimatikan (detik)
+
+# Nama yang boleh diubah lewat file konfigurasi (load_servo_config)
+CONFIG_KEYS = ['DUTY_ORG', 'DUTY_NON', 'DUTY_B3', 'BACK_ORG', 'BACK_NON',
+               'DUTY_TUTUP_TERTUTUP', 'DUTY_TUTUP_TENGAH', 'DUTY_TUTUP_TERBUKA',
+               'WAKTU_ROTASI', 'WAKTU_BUKA_TUTUP', 'WAKTU_TUTUP', 'WAKTU_TENGAH', 'WAKTU_BUKA', 'JEDA_PWM']
+
+
+def load_servo_config(path):
+    """Timpa duty cycle / waktu gerakan dari file JSON, mis. {"WAKTU_BUKA_TUTUP": 2.5}."""
+    with open(path) as f:
+        overrides = json.load(f)
+    for key, value in overrides.items():
+        if key not in CONFIG_KEYS:
+            print(f"WARNING: Kunci konfigurasi servo tidak dikenal: {key}")
+            continue
+        globals()[key] = float(value)
+        print(f"STATUS: Servo config {key} = {value}")
 
 # ========== STATUS ==========
-servo_sedang_jalan = False
 _gpio_cleaned = False
 
 # servo pwm object placeholders
 servo_bin = None
 servo_tutup = None
 
+# Pasangan servo tambahan (chute kedua dst. di mode multi-kamera): {nama: objek PWM}
+_extra_pwm = {}
+_extra_pins = {}    # {nama: BOARD pin}
+_default_pair_owner = None  # nama pasangan yang memakai servo_bin/servo_tutup (pin default)
+
 SOUND_B3 = 'b3.mp3'
 SOUND_ORGANIC = 'organic.mp3'
 SOUND_NON_ORGANIC = 'non-organic.mp3'
@@ -63,19 +89,45 @@ count_b3 = 0
 count_organic = 0
 count_non_organic = 0
 
-# Initialize hardware if available
-if GPIO_AVAILABLE:
+_hardware_ready = False
+_hardware_lock = threading.Lock()
+
+
+# ========== INISIALISASI HARDWARE (LAZY) ==========
+
+def init_audio():
+    """Inisialisasi pygame mixer dan preload semua suara (hanya di Pi)."""
+    global pygame, PYGAME_AVAILABLE, snd_b3, snd_organic, snd_non, snd_fail
+
+    if not GPIO_AVAILABLE:
+        return
     try:
+        import pygame
         pygame.mixer.init()
+        PYGAME_AVAILABLE = True
+        print("STATUS: Pygame Mixer berhasil diinisialisasi.")
+    except Exception as e:
+        print(f"WARNING: Audio disabled: {e}")
+        return
+
+    try:
+        snd_b3 = pygame.mixer.Sound(SOUND_B3)
+        snd_organic = pygame.mixer.Sound(SOUND_ORGANIC)
+        snd_non = pygame.mixer.Sound(SOUND_NON_ORGANIC)
+        snd_fail = pygame.mixer.Sound(SOUND_FAIL)
+        print("STATUS: Semua file audio berhasil di-preload.")
+    except Exception as e:
+        print(f"WARNING: Gagal memuat file audio: {e}")
+        PYGAME_AVAILABLE = False
 
-        try:
-            snd_b3 = pygame.mixer.Sound(SOUND_B3)
-            snd_organic = pygame.mixer.Sound(SOUND_ORGANIC)
-            snd_non = pygame.mixer.Sound(SOUND_NON_ORGANIC)
-        except Exception as e:
-            print(f"Audio gagal dimuat: {e}")
-            snd_b3 = snd_organic = snd_non = None
 
+def init_gpio():
+    """Setup pin GPIO dan objek PWM servo. Fallback ke mode simulasi jika gagal."""
+    global GPIO_AVAILABLE, servo_bin, servo_tutup
+
+    if not GPIO_AVAILABLE:
+        return
+    try:
         GPIO.setwarnings(False)
         # ensure clean start
         GPIO.cleanup()
@@ -93,16 +145,86 @@ if GPIO_AVAILABLE:
         print(f"[WARNING] GPIO init failed, switching to simulation mode: {e}")
         GPIO_AVAILABLE = False
 
-if PYGAME_AVAILABLE:
+
+def init_hardware():
+    """
+    Inisialisasi GPIO, audio dan posisi awal servo, sekali saja (idempotent).
+    Aman dijalankan di thread terpisah, paralel dengan loading model.
+    Mengembalikan dict durasi tiap fase (detik).
+    """
+    global _hardware_ready
+
+    with _hardware_lock:
+        if _hardware_ready:
+            return {}
+        phases = {}
+        t = time.perf_counter()
+        init_gpio()
+        phases['gpio'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        init_audio()
+        phases['audio'] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        init_servo()
+        phases['servo_home'] = time.perf_counter() - t
+
+        _hardware_ready = True
+        return phases
+
+
+def init_servo_pair(name, bin_pin, lid_pin):
+    """
+    Setup pasangan servo bin/tutup tambahan (chute lain) dan pindahkan bin ke
+    posisi B3. Panggil setelah init_hardware(). Mengembalikan nama
+    (bin, tutup) untuk ServoSequencer(bin_servo=..., lid_servo=...).
+
+    Pin default (SERVO_BIN_PIN, SERVO_LID_PIN) memakai servo_bin/servo_tutup
+    yang sudah dibuat init_gpio(), dan hanya boleh diklaim satu pasangan.
+    Pin yang sudah dipakai pasangan lain atau gagal di-setup -> RuntimeError
+    (chute tanpa servo tidak boleh diam-diam lolos, dua sequencer tidak
+    boleh menggerakkan pin yang sama).
+    """
+    global _default_pair_owner
+
+    if (bin_pin, lid_pin) == (SERVO_BIN_PIN, SERVO_LID_PIN):
+        if _default_pair_owner is not None:
+            raise RuntimeError(f'Servo {name}: pin default {bin_pin}/{lid_pin} sudah dipakai {_default_pair_owner}')
+        _default_pair_owner = name
+        return 'servo_bin', 'servo_tutup'
+    used = {SERVO_BIN_PIN, SERVO_LID_PIN} | set(_extra_pins.values())
+    if bin_pin == lid_pin or {bin_pin, lid_pin} & used:
+        raise RuntimeError(f'Servo {name}: pin {bin_pin}/{lid_pin} sudah dipakai (pin terpakai: '
+                           f'{", ".join(str(p) for p in sorted(used))})')
+
+    bin_name, lid_name = f'{name}_bin', f'{name}_tutup'
+    _extra_pins[bin_name], _extra_pins[lid_name] = bin_pin, lid_pin
+    if not GPIO_AVAILABLE:
+        print(f"[SIMULASI] Servo {name} (pin {bin_pin}/{lid_pin}) diinisialisasi ke posisi B3")
+        return bin_name, lid_name
     try:
-        snd_b3 = pygame.mixer.Sound(SOUND_B3)
-        snd_organic = pygame.mixer.Sound(SOUND_ORGANIC)
-        snd_non = pygame.mixer.Sound(SOUND_NON_ORGANIC)
-        snd_fail = pygame.mixer.Sound(SOUND_FAIL)
-        print("STATUS: Semua file audio berhasil di-preload.")
+        GPIO.setup(bin_pin, GPIO.OUT)
+        GPIO.setup(lid_pin, GPIO.OUT)
+        for servo_name, pin in ((bin_name, bin_pin), (lid_name, lid_pin)):
+            pwm = GPIO.PWM(pin, 50)
+            pwm.start(0)
+            _extra_pwm[servo_name] = pwm
+        _extra_pwm[bin_name].ChangeDutyCycle(DUTY_B3)
+        time.sleep(WAKTU_ROTASI)
+        _extra_pwm[bin_name].ChangeDutyCycle(0)
+        print(f"STATUS: Servo {name} (pin {bin_pin}/{lid_pin}) siap.")
     except Exception as e:
-        print(f"WARNING: Gagal memuat file audio: {e}")
-        PYGAME_AVAILABLE = False
+        for servo_name in (bin_name, lid_name):
+            pwm = _extra_pwm.pop(servo_name, None)
+            _extra_pins.pop(servo_name, None)
+            if pwm is not None:
+                try:
+                    pwm.stop()
+                except Exception:
+                    pass
+        raise RuntimeError(f'Servo {name} (pin {bin_pin}/{lid_pin}) gagal diinisialisasi: {e}') from e
+    return bin_name, lid_name
 
 
 def play_sound(sound_obj):
@@ -115,131 +237,230 @@ def play_sound(sound_obj):
     else:
         print("[SIMULASI AUDIO] Bunyi diputar")
 
-# --------- Utility: safe pwm change ---------
-
-def _pwm_safe_change(pwm_obj, duty, sleep_after):
-    """Change duty cycle safely. In simulation mode it simply sleeps and prints."""
-    try:
-        if GPIO_AVAILABLE and pwm_obj is not None:
-            pwm_obj.ChangeDutyCycle(duty)
-            time.sleep(sleep_after)
-            # do not always zero-out immediately for intermediate moves; some callers do explicit zeroing
-            pwm_obj.ChangeDutyCycle(0)
-            time.sleep(0.05)
-        else:
-            # simulation
-            print(f"[SIMULASI] PWM change to {duty} (sleep {sleep_after}s)")
-            time.sleep(sleep_after)
-    except Exception as e:
-        # don't let low-level errors bubble up and crash the program
-        print(f"[ERROR] PWM operation failed: {e}")
 
+# ========== SEQUENCER SERVO (STATE MACHINE NON-BLOCKING) ==========
 
-# ========== FUNGSI SERVO 1: PUTAR BIN ==========
-def servo1_goto(duty):
-    """Menggerakkan Servo1 (Bin) ke duty cycle tertentu."""
-    _pwm_safe_change(servo_bin, duty, WAKTU_ROTASI)
+# Posisi bin per kategori: (duty untuk pergi, duty untuk kembali ke B3)
+_BIN_MOVES = {
+    'organic': ('DUTY_ORG', 'BACK_ORG'),
+    'non-organic': ('DUTY_NON', 'BACK_NON'),
+}
 
 
-# ========== FUNGSI SERVO 2: BUKA TUTUP ==========
-def servo2_buka_tutup():
-    """
-    Menggerakkan Servo2 (Tutup) dengan urutan:
-    Tutup -> Tengah -> Tunggu -> Buka
+class ServoSequencer:
     """
-    print("Servo 2: buka/tutup sequence")
-
-    # 1. Tutup
-    _pwm_safe_change(servo_tutup, DUTY_TUTUP_TERTUTUP, 0.7)
-
-    # 2. Gerak ke Tengah (some servos prefer a short non-zero stay)
-    try:
-        if GPIO_AVAILABLE and servo_tutup is not None:
-            servo_tutup.ChangeDutyCycle(DUTY_TUTUP_TENGAH)
-            time.sleep(0.5)
-            servo_tutup.ChangeDutyCycle(0)
-    except Exception as e:
-        print(f"[ERROR] servo_tutup middle move failed: {e}")
-
-    # 3. Waktu tunggu
-    print(f"Menunggu selama {WAKTU_BUKA_TUTUP} detik...")
-    time.sleep(WAKTU_BUKA_TUTUP)
-
-    # 4. Buka
-    _pwm_safe_change(servo_tutup, DUTY_TUTUP_TERBUKA, 0.8)
-
-    print("Servo 2 sequence complete")
-
-
-# ========== FUNGSI UTAMA: JALANKAN SERVO ==========
-def jalankan_servo(jenis_sampah):
+    Urutan servo sebagai state machine berbasis waktu di SATU thread scheduler
+    (tanpa time.sleep berantai per item). Loop inference cukup memanggil
+    submit() (non-blocking); stats() dan stop() untuk laporan dan shutdown.
+
+    Servo bin dan servo tutup dijadwalkan sebagai dua resource terpisah:
+      - Item berikutnya dengan kategori SAMA tidak memutar bin sama sekali
+        (tidak kembali ke B3 lalu berputar lagi).
+      - Jika `overlap` aktif, rotasi bin untuk item berikutnya (atau kembali
+        ke B3) sudah dimulai saat tutup item sebelumnya bergerak terbuka
+        lagi (langkah terakhir urutan tutup).
+    Semua durasi diambil dari konstanta WAKTU_* (lihat load_servo_config).
     """
-    Menjalankan urutan gerakan servo sesuai jenis sampah.
 
-    Args:
-        jenis_sampah (str): 'b3', 'organic', atau 'non-organic'
-    """
-    global servo_sedang_jalan
-
-    if servo_sedang_jalan:
-        print(f"Servo sedang sibuk, lewati {jenis_sampah}")
-        return
-
-    try:
-        servo_sedang_jalan = True
+    def __init__(self, maxsize=1, policy=POLICY_LATEST, overlap=True, name='servo-sequencer',
+                 bin_servo='servo_bin', lid_servo='servo_tutup'):
+        if policy not in (POLICY_LATEST, POLICY_DROP):
+            raise ValueError(f'Unknown actuator policy: {policy}')
+        self.maxsize = maxsize
+        self.policy = policy
+        self.overlap = overlap
+        self.bin_servo = bin_servo
+        self.lid_servo = lid_servo
+
+        self._pending = deque()
+        self._events = []                   # heap (waktu, urutan, fungsi, args)
+        self._order = itertools.count()
+        self._cond = threading.Condition()
+        self._running = False
+        self._active = False                # ada item yang belum melepas servo bin
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+        self._bin_pos = 'b3'
+        self._bin_free_at = 0.0
+        self._lid_free_at = 0.0
+
+        # Statistik
+        self.submitted = 0
+        self.executed = 0
+        self.dropped = 0
+        self.errors = 0
+        self._first_start = None
+        self._last_done = None
+
+    def start(self):
+        self._running = True
+        self._thread.start()
+        return self
+
+    # ---------- API ----------
+
+    def submit(self, label):
+        """Masukkan kategori ke antrian (non-blocking). True jika diterima."""
+        if label not in ('b3', 'organic', 'non-organic'):
+            print(f"Jenis sampah tidak dikenali: {label}")
+            return False
+        with self._cond:
+            self.submitted += 1
+            if len(self._pending) >= self.maxsize:
+                self.dropped += 1
+                if self.policy == POLICY_DROP:
+                    return False
+                self._pending.popleft()
+            self._pending.append(label)
+            self._cond.notify()
+            return True
+
+    @property
+    def busy(self):
+        return self._active or bool(self._events)
+
+    @property
+    def queue_depth(self):
+        return len(self._pending)
+
+    def stop(self, timeout=None):
+        """Buang antrian, selesaikan gerakan yang sudah dijadwalkan, lalu berhenti."""
+        with self._cond:
+            self._pending.clear()
+            self._running = False
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+
+    def stats(self):
+        stats = {
+            'submitted': self.submitted,
+            'executed': self.executed,
+            'dropped': self.dropped,
+            'errors': self.errors,
+            'queue_depth': self.queue_depth,
+            'busy': self.busy,
+        }
+        if self._first_start is not None and self._last_done is not None and self._last_done > self._first_start:
+            stats['items_per_minute'] = round(self.executed * 60.0 / (self._last_done - self._first_start), 2)
+        return stats
+
+    # ---------- Scheduler ----------
+
+    def _at(self, when, fn, *args):
+        heapq.heappush(self._events, (when, next(self._order), fn, args))
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    if not self._active and self._pending and self._running:
+                        self._start_item(self._pending.popleft(), now)
+                        continue
+                    if self._events and self._events[0][0] <= now:
+                        _, _, fn, args = heapq.heappop(self._events)
+                        break
+                    if not self._running and not self._events:
+                        return
+                    self._cond.wait(self._events[0][0] - now if self._events else None)
+            try:
+                fn(*args)
+            except Exception as e:
+                self.errors += 1
+                print(f"[ERROR] Servo sequencer step failed: {e}")
+
+    # Dipanggil dengan lock dipegang: hanya menjadwalkan event
+    def _schedule_bin_move(self, duty_name, start):
+        self._at(start, self._set_duty, self.bin_servo, duty_name)
+        self._at(start + WAKTU_ROTASI, self._set_duty, self.bin_servo, None)
+        return start + WAKTU_ROTASI + JEDA_PWM
+
+    def _start_item(self, label, now):
+        self._active = True
+        if self._first_start is None:
+            self._first_start = now
+        self._at(now, self._announce, label)
+
+        # 1. Bin: kembali ke B3 (jika perlu) lalu ke posisi kategori baru
+        t = max(now, self._bin_free_at)
+        if self._bin_pos != label:
+            if self._bin_pos in _BIN_MOVES:
+                t = self._schedule_bin_move(_BIN_MOVES[self._bin_pos][1], t)
+            if label in _BIN_MOVES:
+                t = self._schedule_bin_move(_BIN_MOVES[label][0], t)
+            self._bin_pos = label
+
+        # 2. Tutup: Tutup -> Tengah -> Tunggu (PWM mati) -> Buka
+        t = max(t, self._lid_free_at)
+        self._at(t, self._set_duty, self.lid_servo, 'DUTY_TUTUP_TERTUTUP')
+        t += WAKTU_TUTUP
+        self._at(t, self._set_duty, self.lid_servo, None)
+        t += JEDA_PWM
+        self._at(t, self._set_duty, self.lid_servo, 'DUTY_TUTUP_TENGAH')
+        t += WAKTU_TENGAH
+        self._at(t, self._set_duty, self.lid_servo, None)
+        t += WAKTU_BUKA_TUTUP
+        open_at = t
+        self._at(t, self._set_duty, self.lid_servo, 'DUTY_TUTUP_TERBUKA')
+        t += WAKTU_BUKA
+        self._at(t, self._set_duty, self.lid_servo, None)
+        t += JEDA_PWM
+        self._lid_free_at = t
+        self._at(t, self._item_done, label)
+
+        # 3. Servo bin bebas lagi: saat tutup mulai terbuka (overlap) atau setelah selesai
+        self._bin_free_at = open_at if self.overlap else t
+        self._at(self._bin_free_at, self._release_bin)
+
+    def _release_bin(self):
+        with self._cond:
+            now = time.monotonic()
+            if self._pending and self._running:
+                # Item berikutnya langsung mengambil alih bin (kategori sama -> tidak berputar)
+                self._start_item(self._pending.popleft(), now)
+                return
+            self._active = False
+            if self._bin_pos in _BIN_MOVES:
+                print("Kembali ke B3...")
+                self._bin_free_at = self._schedule_bin_move(_BIN_MOVES[self._bin_pos][1], max(now, self._bin_free_at))
+                self._bin_pos = 'b3'
+            self._cond.notify_all()
+
+    # Dipanggil di thread scheduler tanpa lock: akses hardware / print
+    def _set_duty(self, servo_name, duty_name):
+        # Objek PWM dicari saat eksekusi (init_hardware bisa selesai setelah sequencer dibuat)
+        pwm_obj = _extra_pwm[servo_name] if servo_name in _extra_pwm else globals().get(servo_name)
+        duty = globals()[duty_name] if duty_name else 0
+        if GPIO_AVAILABLE and pwm_obj is not None:
+            pwm_obj.ChangeDutyCycle(duty)
+        elif GPIO_AVAILABLE:
+            print(f"[ERROR] {servo_name}: objek PWM tidak ada, servo tidak bergerak ({duty_name or 'stop'})")
+        elif duty_name:
+            print(f"[SIMULASI] {servo_name} -> {duty_name} ({duty})")
 
-        # === B3 ===
-        if jenis_sampah == 'b3':
+    def _announce(self, label):
+        if label == 'b3':
             play_sound(snd_b3)
             print("=== SAMPAH B3 TERDETEKSI ===")
-            print("Servo1 sudah di posisi default (B3), tidak bergerak.")
-            servo2_buka_tutup()
-            print("=== SELESAI ===\n")
-            count_b3 = count_b3 + 1
-
-            print("count_b3: ",count_b3)
-
-        # === ORGANIC ===
-        elif jenis_sampah == 'organic':
+        elif label == 'organic':
             play_sound(snd_organic)
             print("=== SAMPAH ORGANIK TERDETEKSI ===")
-            print("1. Memutar bin ke KANAN (organic)...")
-            servo1_goto(DUTY_ORG)
-
-            print("2. Buka/tutup bin...")
-            servo2_buka_tutup()
-
-            print("3. Kembali ke B3...")
-            servo1_goto(BACK_ORG)
-            print("=== SELESAI ===\n")
-            count_organic = count_organic + 1
-
-            print(count_organic)
-            print("count_organic: ",count_organic)
-
-        # === NON-ORGANIC ===
-        elif jenis_sampah == 'non-organic':
+        else:
             play_sound(snd_non)
             print("=== SAMPAH NON-ORGANIC TERDETEKSI ===")
-            print("1. Memutar bin ke KIRI (non-organic)...")
-            servo1_goto(DUTY_NON)
-
-            print("2. Buka/tutup bin...")
-            servo2_buka_tutup()
-
-            print("3. Kembali ke B3...")
-            servo1_goto(BACK_NON)
-            print("=== SELESAI ===\n")
-            count_non_organic = count_non_organic + 1
-
-            print(count_non_organic)
-            print("count_non_organic: ",count_non_organic)
 
+    def _item_done(self, label):
+        global count_b3, count_organic, count_non_organic
+        if label == 'b3':
+            count_b3 += 1
+        elif label == 'organic':
+            count_organic += 1
         else:
-            print(f"Jenis sampah tidak dikenali: {jenis_sampah}")
-
-    finally:
-        servo_sedang_jalan = False
+            count_non_organic += 1
+        self.executed += 1
+        self._last_done = time.monotonic()
+        print(f"=== SELESAI ({label}) === b3: {count_b3}, organic: {count_organic}, non-organic: {count_non_organic}\n")
 
 
 # ========== INISIALISASI POSISI AWAL ==========
@@ -263,7 +484,7 @@ def init_servo():
 
 def cleanup_servo():
     """Membersihkan GPIO saat program selesai. Safe to call multiple times."""
-    global _gpio_cleaned, servo_bin, servo_tutup
+    global _gpio_cleaned, servo_bin, servo_tutup, _default_pair_owner
 
     if _gpio_cleaned:
         # already cleaned
@@ -284,6 +505,14 @@ def cleanup_servo():
                 except Exception as e:
                     print(f"Error stopping servo_tutup: {e}")
                 servo_tutup = None
+            for servo_name, pwm in list(_extra_pwm.items()):
+                try:
+                    pwm.stop()
+                except Exception as e:
+                    print(f"Error stopping {servo_name}: {e}")
+            _extra_pwm.clear()
+            _extra_pins.clear()
+            _default_pair_owner = None
 
             try:
                 GPIO.cleanup()
@@ -300,7 +529,4 @@ def cleanup_servo():
 
 
 # Register cleanup on normal program exit
-atexit.register(cleanup_servo)
-
-# Auto init when imported
-init_servo()
\ No newline at end of file
+atexit.register(cleanup_servo)
\ No newline at end of file
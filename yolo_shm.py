@@ -0,0 +1,264 @@
+import time
+import queue
+import signal
+import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from yolo_actuator import POLICY_LATEST
+from yolo_pipeline import POLICY_BLOCK
+
+# ========== CAPTURE DI PROSES TERPISAH (SHARED MEMORY, TANPA COPY) ==========
+#
+# Proses capture menulis frame langsung ke slot SharedFrameRing (cap.read(out),
+# cvtColor(dst=out) untuk Picamera). Yang lewat antar proses hanya tuple kecil
+# (slot, seq, timestamp); proses inference membaca frame sebagai view NumPy di
+# slot tersebut dan mengembalikan slot dengan release() setelah selesai.
+#
+#   slot bebas --(free)--> proses capture menulis --(ready)--> proses utama
+#        ^                                                        |
+#        +---------------------- release(slot) -------------------+
+#
+# Capture, decode/konversi warna dan inference tidak lagi berbagi GIL.
+
+CAPTURE_POLICIES = [POLICY_LATEST, POLICY_BLOCK]
+
+
+class SharedFrameRing:
+    """
+    `slots` frame uint8 berukuran `shape` yang dialokasikan sekali dalam satu
+    blok SharedMemory. Tanpa `name` blok baru dibuat (dan di-unlink saat
+    close()); dengan `name` blok yang sudah ada di-attach.
+    """
+
+    def __init__(self, slots, shape, name=None):
+        self.slots = slots
+        self.shape = tuple(shape)
+        self._owner = name is None
+        size = slots * int(np.prod(self.shape))
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        self.name = self.shm.name
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf)
+
+    def __getitem__(self, idx):
+        return self.frames[idx]
+
+    @property
+    def nbytes(self):
+        return self.frames.nbytes
+
+    def close(self):
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            # Masih ada view frame yang dipegang (mis. saat shutdown); memory dilepas saat proses keluar
+            pass
+        if self._owner:
+            self.shm.unlink()
+
+
+def _take_slot(free, ready, policy, dropped):
+    """Slot bebas untuk frame berikutnya, atau None (cek stop lalu coba lagi)."""
+    try:
+        return free.get_nowait()
+    except queue.Empty:
+        pass
+    if policy == POLICY_LATEST:
+        # Semua slot terisi: ambil kembali frame terlama yang belum dibaca
+        try:
+            item = ready.get_nowait()
+        except queue.Empty:
+            item = None
+        if item is not None:
+            dropped.value += 1
+            return item[0]
+    try:
+        return free.get(timeout=0.1)
+    except queue.Empty:
+        return None
+
+
+def _capture_main(source, resolution, policy, conn, free, ready, stop, frames_read, frames_dropped, max_failures):
+    """Isi proses capture: buka sumber, handshake shape, lalu tulis frame ke ring."""
+    from yolo_capture import CameraSource
+
+    # Ctrl+C dikirim ke seluruh process group; proses utama yang menghentikan capture lewat `stop`
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    try:
+        src = CameraSource(source, resolution, threaded=False)
+        ret, first = src.read()
+        if not ret or first is None:
+            raise RuntimeError(f'No frames from {source}')
+    except Exception as e:
+        conn.send(('error', f'{type(e).__name__}: {e}'))
+        conn.close()
+        return
+
+    conn.send(('shape', first.shape))
+    try:
+        name, slots = conn.recv()
+    except EOFError:
+        src.release()
+        return
+    conn.close()
+    ring = SharedFrameRing(slots, first.shape, name=name)
+
+    seq = 0
+    failures = 0
+    try:
+        while not stop.is_set():
+            idx = _take_slot(free, ready, policy, frames_dropped)
+            if idx is None:
+                continue
+            slot = ring[idx]
+            if first is not None:
+                np.copyto(slot, first)
+                ret, frame, first = True, slot, None
+            else:
+                ret, frame = src.read(slot)
+            if not ret or frame is None:
+                free.put(idx)
+                failures += 1
+                if not src.live or failures >= max_failures:
+                    break
+                time.sleep(0.01)
+                continue
+            if frame is not slot:
+                # Sumber tidak bisa menulis ke buffer tujuan (mis. ukuran berubah)
+                np.copyto(slot, frame)
+            failures = 0
+            seq += 1
+            frames_read.value += 1
+            # perf_counter = CLOCK_MONOTONIC di Linux, sama untuk semua proses
+            ready.put((idx, seq, time.perf_counter()))
+    except Exception as e:
+        print(f'ERROR capture process: {type(e).__name__}: {e}')
+    finally:
+        ready.put(None)
+        src.release()
+        ring.close()
+
+
+class CaptureProcess:
+    """
+    Baca kamera / video di proses terpisah; frame diserahkan lewat
+    SharedFrameRing tanpa pickle atau copy.
+
+    policy 'latest' (kamera live): jika proses utama tertinggal, frame
+    terlama yang belum dibaca ditimpa dan read() selalu memberi frame
+    terbaru. policy 'block' (file video): capture menunggu slot bebas, tidak
+    ada frame yang hilang.
+
+    start() mem-fork proses capture (panggil sebelum thread lain / model
+    dibuat); open() menunggu sumber terbuka dan membuat ring sesuai ukuran
+    frame pertama. Setiap frame dari read() harus dikembalikan dengan
+    release(slot) setelah tidak dipakai lagi.
+    """
+
+    def __init__(self, source, resolution=None, slots=4, policy=POLICY_LATEST, max_failures=10):
+        if policy not in CAPTURE_POLICIES:
+            raise ValueError(f'Unknown capture policy: {policy}')
+        if slots < 2:
+            raise ValueError('A shared frame ring needs at least 2 slots')
+        self.source = source
+        self.slots = slots
+        self.policy = policy
+        self.ring = None
+
+        # fork: script utama tidak di-import ulang di proses anak (tidak ada __main__ guard).
+        # Resource tracker dimulai sebelum fork supaya proses capture memakai tracker yang sama;
+        # tracker milik proses capture sendiri akan meng-unlink ring saat proses itu keluar.
+        resource_tracker.ensure_running()
+        ctx = mp.get_context('fork')
+        self._free = ctx.Queue()
+        self._ready = ctx.Queue()
+        self._stop = ctx.Event()
+        self._frames_read = ctx.Value('Q', 0, lock=False)
+        self._frames_dropped = ctx.Value('Q', 0, lock=False)
+        self._conn, child_conn = ctx.Pipe()
+        self._proc = ctx.Process(target=_capture_main, name=f'capture-{source}', daemon=True,
+                                 args=(source, resolution, policy, child_conn, self._free, self._ready, self._stop,
+                                       self._frames_read, self._frames_dropped, max_failures))
+        self._child_conn = child_conn
+
+        # Statistik sisi pembaca
+        self.frames_taken = 0
+        self.frames_stale = 0
+
+    def start(self):
+        self._proc.start()
+        self._child_conn.close()
+        return self
+
+    def open(self, timeout=15.0):
+        """Tunggu frame pertama dan buat ring. RuntimeError jika sumber gagal dibuka."""
+        if not self._conn.poll(timeout):
+            self.stop()
+            raise RuntimeError(f'Capture process did not open {self.source} within {timeout:.0f}s')
+        try:
+            kind, value = self._conn.recv()
+        except EOFError:
+            kind, value = 'error', 'capture process exited'
+        if kind == 'error':
+            self.stop()
+            raise RuntimeError(f'Cannot open {self.source}: {value}')
+
+        self.ring = SharedFrameRing(self.slots, value)
+        for idx in range(self.slots):
+            self._free.put(idx)
+        self._conn.send((self.ring.name, self.slots))
+        self._conn.close()
+        return self
+
+    def read(self, timeout=2.0):
+        """(slot, frame, ts_capture) berikutnya, atau None jika capture berhenti / timeout."""
+        try:
+            item = self._ready.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        if self.policy == POLICY_LATEST:
+            # Lewati frame yang sudah basi, kembalikan slotnya
+            while item is not None:
+                try:
+                    newer = self._ready.get_nowait()
+                except queue.Empty:
+                    break
+                self.release(item[0])
+                self.frames_stale += 1
+                item = newer
+        if item is None:
+            return None
+        idx, _, ts = item
+        self.frames_taken += 1
+        return idx, self.ring[idx], ts
+
+    def release(self, slot):
+        """Slot boleh ditulis lagi oleh proses capture."""
+        self._free.put(slot)
+
+    def stop(self, timeout=3.0):
+        self._stop.set()
+        if self._proc.is_alive():
+            self._proc.join(timeout)
+        if self._proc.is_alive():
+            self._proc.terminate()
+            self._proc.join(1.0)
+        for q in (self._free, self._ready):
+            q.cancel_join_thread()
+            q.close()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
+
+    def stats(self):
+        return {
+            'frames_read': self._frames_read.value,
+            'frames_taken': self.frames_taken,
+            'frames_dropped': self._frames_dropped.value + self.frames_stale,
+            'slots': self.slots,
+        }
@@ -0,0 +1,130 @@
+import time
+from collections import Counter, deque
+
+import numpy as np
+
+# ========== IOU TRACKER + VOTING KELAS ==========
+
+def iou_matrix(a, b):
+    """IoU antara setiap box di a (N x 4) dan b (M x 4), format xyxy."""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    a = a[:, None, :]
+    b = b[None, :, :]
+    iw = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    ih = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    inter = iw * ih
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return inter / np.maximum(area_a + area_b - inter, 1e-6)
+
+
+class Track:
+    """Satu objek fisik yang diikuti antar frame."""
+
+    def __init__(self, track_id, box, classidx, vote_frames, now):
+        self.id = track_id
+        self.box = box
+        self.votes = deque([classidx], maxlen=vote_frames)
+        self.misses = 0
+        self.last_seen = now
+        self.fired = False
+
+    def majority(self):
+        """(classidx, jumlah vote) kelas terbanyak di window vote."""
+        return Counter(self.votes).most_common(1)[0]
+
+
+class VotingTracker:
+    """
+    Tracker IoU ringan dengan voting kelas per track.
+
+    Servo hanya dipicu sekali per objek fisik: saat sebuah track sudah
+    terlihat minimal `vote_frames` kali dan kelas mayoritasnya memegang
+    minimal `vote_ratio` dari vote. Track dihapus setelah `max_missed`
+    update berturut-turut tanpa deteksi yang cocok, atau jika tidak
+    terlihat selama `max_age` detik. Batas waktu ini yang berlaku saat
+    update jarang (motion gate, cadence idle adaptif): tanpa itu objek baru
+    yang dijatuhkan di posisi yang sama mewarisi track lama yang sudah
+    `fired` dan servo tidak dipicu.
+    """
+
+    def __init__(self, vote_frames=3, vote_ratio=0.6, iou_thresh=0.3, max_missed=5, max_age=1.5):
+        self.vote_frames = vote_frames
+        self.vote_ratio = vote_ratio
+        self.iou_thresh = iou_thresh
+        self.max_missed = max_missed
+        self.max_age = max_age
+        self.tracks = []
+        self._next_id = 1
+
+        # Statistik
+        self.fired_count = 0
+
+    def update(self, dets, now=None):
+        """
+        Update track dengan deteksi frame ini (Detections dari yolo_postprocess).
+        `now` (detik, time.monotonic) bisa diisi untuk replay / test.
+
+        Returns:
+            list of (track_id, classidx) untuk track yang baru saja stabil
+            dan harus memicu servo.
+        """
+        now = time.monotonic() if now is None else now
+        # Track yang terlalu lama tidak terlihat dibuang sebelum matching
+        self.tracks = [t for t in self.tracks if now - t.last_seen <= self.max_age]
+
+        boxes = dets.boxes
+        classes = dets.classes.tolist()
+        matched_dets = set()
+        matched_tracks = set()
+
+        # Greedy matching: pasangan IoU tertinggi dulu
+        if self.tracks and len(boxes):
+            track_boxes = np.array([t.box for t in self.tracks], dtype=np.float32)
+            ious = iou_matrix(track_boxes, boxes)
+            for flat in np.argsort(ious, axis=None)[::-1]:
+                ti, di = np.unravel_index(flat, ious.shape)
+                if ious[ti, di] < self.iou_thresh:
+                    break
+                if ti in matched_tracks or di in matched_dets:
+                    continue
+                track = self.tracks[ti]
+                track.box = boxes[di]
+                track.votes.append(classes[di])
+                track.misses = 0
+                track.last_seen = now
+                matched_tracks.add(ti)
+                matched_dets.add(di)
+
+        # Track yang tidak cocok: tambah miss, hapus jika terlalu lama hilang
+        survivors = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in matched_tracks:
+                track.misses += 1
+            if track.misses <= self.max_missed:
+                survivors.append(track)
+        self.tracks = survivors
+
+        # Deteksi yang tidak cocok: track baru
+        for di in range(len(boxes)):
+            if di not in matched_dets:
+                self.tracks.append(Track(self._next_id, boxes[di], classes[di], self.vote_frames, now))
+                self._next_id += 1
+
+        # Track yang labelnya sudah stabil dan belum pernah memicu servo
+        fired = []
+        for track in self.tracks:
+            if track.fired or len(track.votes) < self.vote_frames:
+                continue
+            classidx, count = track.majority()
+            if count >= self.vote_ratio * len(track.votes):
+                track.fired = True
+                self.fired_count += 1
+                fired.append((track.id, classidx))
+        return fired
+
+    @property
+    def voting(self):
+        """True jika masih ada track yang belum memicu servo (objek sedang di-vote)."""
+        return any(not track.fired for track in self.tracks)
@@ -0,0 +1,503 @@
+import os
+import json
+import time
+import queue
+import threading
+from collections import deque
+from datetime import datetime
+
+import cv2
+
+# ========== ASYNC IMAGE WRITER (ENCODE + TULIS DI BACKGROUND) ==========
+
+def encode_params(fmt, quality):
+    """Parameter cv2.imencode untuk format gambar output."""
+    if fmt in ('jpg', 'jpeg'):
+        return [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+    if fmt == 'webp':
+        return [cv2.IMWRITE_WEBP_QUALITY, int(quality)]
+    if fmt == 'png':
+        return [cv2.IMWRITE_PNG_COMPRESSION, 1]
+    raise ValueError(f'Unsupported image format: {fmt}')
+
+
+class ImageWriterPool:
+    """
+    Pool thread untuk encode dan menulis gambar ke disk.
+
+    submit() memindahkan kepemilikan array gambar ke pool (jangan diubah
+    lagi setelahnya). Antrian dibatasi `max_pending`; jika penuh submit()
+    menunggu (backpressure) sehingga memori tidak tumbuh tanpa batas.
+    Latensi encode dan write dicatat terpisah.
+    """
+
+    def __init__(self, fmt='jpg', quality=90, workers=2, max_pending=8):
+        self.fmt = fmt
+        self.ext = '.' + fmt
+        self.params = encode_params(fmt, quality)
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._threads = [threading.Thread(target=self._run, name=f'image-writer-{i}', daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+        # Statistik
+        self.written = 0
+        self.failed = 0
+        self.encode_time = 0.0
+        self.write_time = 0.0
+        self.encode_max = 0.0
+        self.write_max = 0.0
+        self.backpressure_time = 0.0
+
+    def submit(self, path_base, image):
+        """Antrikan gambar untuk ditulis ke `path_base` + ekstensi format. Mengembalikan path file."""
+        path = path_base + self.ext
+        t0 = time.perf_counter()
+        self._queue.put((path, image))
+        self.backpressure_time += time.perf_counter() - t0
+        return path
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            path, image = item
+            try:
+                t0 = time.perf_counter()
+                ok, buf = cv2.imencode(self.ext, image, self.params)
+                t1 = time.perf_counter()
+                if not ok:
+                    raise RuntimeError('imencode failed')
+                with open(path, 'wb') as f:
+                    f.write(buf.tobytes())
+                t2 = time.perf_counter()
+
+                with self._lock:
+                    self.written += 1
+                    self.encode_time += t1 - t0
+                    self.write_time += t2 - t1
+                    self.encode_max = max(self.encode_max, t1 - t0)
+                    self.write_max = max(self.write_max, t2 - t1)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"ERROR: Gagal menyimpan {path}: {e}")
+            finally:
+                self._queue.task_done()
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def close(self):
+        """Tunggu semua gambar selesai ditulis, lalu hentikan thread."""
+        self._queue.join()
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join()
+
+    def summary(self):
+        n = max(self.written, 1)
+        return (f"{self.written} written, {self.failed} failed | "
+                f"encode avg {self.encode_time / n * 1000:.1f} ms (max {self.encode_max * 1000:.1f}) | "
+                f"write avg {self.write_time / n * 1000:.1f} ms (max {self.write_max * 1000:.1f}) | "
+                f"backpressure {self.backpressure_time:.2f}s")
+
+
+# ========== VIDEO RECORDER (BACKGROUND, TIMESTAMP ASLI) ==========
+
+class VideoRecorder:
+    """
+    Rekam frame ke video di thread terpisah, tanpa pernah menahan loop inference.
+
+    write() memindahkan kepemilikan frame ke recorder (jangan diubah lagi
+    setelahnya) dan tidak pernah blocking: jika antrian `max_pending` penuh
+    (disk lambat), frame di-drop dan dihitung.
+
+    Container video punya FPS tetap (`fps`), jadi setiap frame ditempatkan
+    sesuai timestamp capture-nya: celah diisi dengan mengulang frame
+    sebelumnya (maksimal `max_fill` detik, mis. saat pause), frame yang
+    datang lebih cepat dari `fps` dilewati. Hasilnya diputar dengan
+    kecepatan asli berapapun FPS pipeline.
+
+    Segment baru dibuka setiap `segment_seconds` detik dan/atau setelah file
+    mencapai `segment_mb` MB (0 = tidak dirotasi). Dengan rotasi, nama file
+    menjadi <nama>_001.avi, <nama>_002.avi, ...
+    """
+
+    def __init__(self, path, fps=15.0, fourcc='MJPG', frame_size=None, max_pending=30,
+                 segment_seconds=0, segment_mb=0, max_fill=2.0):
+        self.path = path
+        self.fps = float(fps)
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.frame_size = frame_size
+        self.segment_seconds = segment_seconds
+        self.segment_bytes = int(segment_mb * 1024 * 1024)
+        self.max_fill = max_fill
+
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self._writer = None
+        self._segment_path = None
+        self._segment_opened = 0.0
+        self._timeline_start = 0.0
+        self._segment_frames = 0
+        self._last_size_check = 0
+        self._last = None
+        self.segments = []
+
+        # Statistik (received/dropped hanya diubah oleh thread pemanggil write())
+        self.received = 0
+        self.dropped = 0
+        self.written = 0
+        self.duplicated = 0
+        self.skipped = 0
+        self.failed = 0
+        self.write_time = 0.0
+        self.write_max = 0.0
+
+        self._thread = threading.Thread(target=self._run, name='video-recorder', daemon=True)
+        self._thread.start()
+
+    def write(self, frame, ts=None):
+        """Antrikan frame dengan timestamp capture `ts` (perf_counter). False jika di-drop."""
+        ts = time.perf_counter() if ts is None else ts
+        try:
+            self._queue.put_nowait((ts, frame))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.received += 1
+        return True
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            ts, frame = item
+            try:
+                t0 = time.perf_counter()
+                self._write_frame(ts, frame)
+                dt = time.perf_counter() - t0
+                with self._lock:
+                    self.write_time += dt
+                    self.write_max = max(self.write_max, dt)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"ERROR: Gagal menulis frame video: {e}")
+        self._close_segment()
+
+    def _should_rotate(self, ts):
+        if self.segment_seconds > 0 and ts - self._segment_opened >= self.segment_seconds:
+            return True
+        # Ukuran file dicek sekitar sekali per detik video, bukan per frame. Bukan modulo:
+        # _segment_frames bisa melompat (frame duplikat) dan melewati setiap kelipatan fps
+        if self.segment_bytes > 0 and self._segment_frames - self._last_size_check >= self.fps:
+            self._last_size_check = self._segment_frames
+            return os.path.getsize(self._segment_path) >= self.segment_bytes
+        return False
+
+    def _open_segment(self, ts, frame):
+        self._close_segment()
+        if self.frame_size is None:
+            self.frame_size = (frame.shape[1], frame.shape[0])
+        if self.segment_seconds > 0 or self.segment_bytes > 0:
+            stem, ext = os.path.splitext(self.path)
+            path = f'{stem}_{len(self.segments) + 1:03d}{ext}'
+        else:
+            path = self.path
+        writer = cv2.VideoWriter(path, self.fourcc, self.fps, self.frame_size)
+        if not writer.isOpened():
+            raise RuntimeError(f'Tidak bisa membuka video writer {path}')
+        self._writer = writer
+        self._segment_path = path
+        self._segment_opened = ts
+        self._timeline_start = ts
+        self._segment_frames = 0
+        self._last_size_check = 0
+        self._last = None
+        self.segments.append(path)
+
+    def _close_segment(self):
+        if self._writer is not None:
+            self._writer.release()
+            self._writer = None
+
+    def _write_frame(self, ts, frame):
+        if self.frame_size is not None and (frame.shape[1], frame.shape[0]) != self.frame_size:
+            frame = cv2.resize(frame, self.frame_size)
+        if self._writer is None or self._should_rotate(ts):
+            self._open_segment(ts, frame)
+
+        # Jumlah frame video yang sudah 'jatuh tempo' sebelum frame ini
+        due = int(round((ts - self._timeline_start) * self.fps)) - self._segment_frames
+        if due < 0:
+            # Lebih cepat dari fps: tidak ditulis, tapi jadi isi celah berikutnya
+            self._last = frame
+            with self._lock:
+                self.skipped += 1
+            return
+        max_dup = int(self.max_fill * self.fps)
+        if due > max_dup:
+            # Celah panjang (pause/stall): jangan tulis ulang frame yang sama terus-menerus
+            self._timeline_start += (due - max_dup) / self.fps
+            due = max_dup
+
+        for _ in range(due):
+            self._writer.write(self._last)
+        self._writer.write(frame)
+        self._segment_frames += due + 1
+        self._last = frame
+        with self._lock:
+            self.written += due + 1
+            self.duplicated += due
+
+    def close(self, timeout=10.0):
+        """Tulis sisa antrian, tutup file video dan hentikan thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def summary(self):
+        n = max(self.received - self.skipped, 1)
+        return (f"{self.received} frames queued, {self.dropped} dropped (queue full), "
+                f"{self.skipped} skipped, {self.duplicated} duplicated, "
+                f"{self.written} written to {len(self.segments)} segment(s) | "
+                f"write avg {self.write_time / n * 1000:.1f} ms (max {self.write_max * 1000:.1f})")
+
+
+# ========== CLIP PRE/POST EVENT (RING FRAME TERKOMPRESI) ==========
+
+class EventClipRecorder:
+    """
+    Simpan hanya footage di sekitar event (servo jalan, deteksi ragu).
+
+    add_frame() mengambil paling banyak `fps` frame per detik dan
+    memindahkan kepemilikan frame ke recorder (jangan diubah lagi
+    setelahnya). Thread background meng-encode frame ke JPEG dan menyimpannya
+    di ring memory selama `pre_seconds` detik terakhir.
+
+    trigger(label) membuka clip: isi ring ditambah frame selama
+    `post_seconds` berikutnya ditulis ke <out_dir>/<label>_<timestamp>.avi.
+    Event yang datang selama clip masih terbuka memperpanjang clip yang sama
+    (maksimal `max_clip_seconds`). Jika antrian encode penuh, frame di-drop
+    dan dihitung; event tidak pernah di-drop.
+    """
+
+    def __init__(self, out_dir, pre_seconds=3.0, post_seconds=2.0, fps=10.0, quality=70,
+                 max_pending=8, max_clip_seconds=30.0, fourcc='MJPG'):
+        self.out_dir = out_dir
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.fps = float(fps)
+        self.max_clip_seconds = max_clip_seconds
+        self.max_pending = max_pending
+        self.fourcc = cv2.VideoWriter_fourcc(*fourcc)
+        self.params = encode_params('jpg', quality)
+        os.makedirs(out_dir, exist_ok=True)
+
+        # Antrian tidak dibatasi supaya event selalu masuk; frame dibatasi lewat max_pending
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._ring = deque()
+        self._ring_bytes = 0
+        self._clip = None
+        self._last_add = None
+        self.clip_paths = []
+
+        # Statistik (frames_added/dropped/events hanya diubah oleh thread pemanggil)
+        self.frames_added = 0
+        self.dropped = 0
+        self.events = 0
+        self.clips_written = 0
+        self.failed = 0
+        self.encode_time = 0.0
+        self.encoded = 0
+
+        self._thread = threading.Thread(target=self._run, name='event-clips', daemon=True)
+        self._thread.start()
+
+    def add_frame(self, frame, ts=None):
+        """Tawarkan frame dengan timestamp capture `ts` (perf_counter). True jika diambil."""
+        ts = time.perf_counter() if ts is None else ts
+        # Toleransi 10% supaya jitter timestamp tidak membuang setiap frame kedua
+        if self._last_add is not None and ts - self._last_add < 0.9 / self.fps:
+            return False
+        if self._queue.qsize() >= self.max_pending:
+            self.dropped += 1
+            return False
+        self._queue.put(('frame', ts, frame))
+        self._last_add = ts
+        self.frames_added += 1
+        return True
+
+    def trigger(self, label, ts=None):
+        """Tandai event pada waktu `ts`; clip berisi pre_seconds sebelum dan post_seconds sesudahnya."""
+        ts = time.perf_counter() if ts is None else ts
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S_%f')[:-3]
+        self._queue.put(('event', ts, (label, stamp)))
+        self.events += 1
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            kind, ts, payload = item
+            try:
+                if kind == 'event':
+                    self._on_event(ts, *payload)
+                else:
+                    self._on_frame(ts, payload)
+            except Exception as e:
+                with self._lock:
+                    self.failed += 1
+                print(f"ERROR: Gagal memproses clip event: {e}")
+        if self._clip is not None:
+            try:
+                self._finish_clip()
+            except Exception as e:
+                print(f"ERROR: Gagal menulis clip terakhir: {e}")
+
+    def _on_frame(self, ts, frame):
+        t0 = time.perf_counter()
+        ok, buf = cv2.imencode('.jpg', frame, self.params)
+        with self._lock:
+            self.encode_time += time.perf_counter() - t0
+            self.encoded += 1
+        if not ok:
+            raise RuntimeError('imencode failed')
+
+        entry = (ts, buf)
+        self._ring.append(entry)
+        self._ring_bytes += buf.nbytes
+        while self._ring and ts - self._ring[0][0] > self.pre_seconds:
+            self._ring_bytes -= self._ring.popleft()[1].nbytes
+
+        if self._clip is not None:
+            self._clip['frames'].append(entry)
+            if ts >= self._clip['until']:
+                self._finish_clip()
+
+    def _on_event(self, ts, label, stamp):
+        if self._clip is not None:
+            clip = self._clip
+            clip['labels'].append(label)
+            clip['until'] = min(max(clip['until'], ts + self.post_seconds), clip['started'] + self.max_clip_seconds)
+            return
+        self._clip = {
+            'path': os.path.join(self.out_dir, f'{label}_{stamp}.avi'),
+            'labels': [label],
+            'frames': [e for e in self._ring if e[0] >= ts - self.pre_seconds],
+            'started': ts,
+            'until': ts + self.post_seconds,
+        }
+
+    def _finish_clip(self):
+        clip, self._clip = self._clip, None
+        frames = clip['frames']
+        if not frames:
+            return
+
+        first = cv2.imdecode(frames[0][1], cv2.IMREAD_COLOR)
+        h, w = first.shape[:2]
+        writer = cv2.VideoWriter(clip['path'], self.fourcc, self.fps, (w, h))
+        if not writer.isOpened():
+            raise RuntimeError(f"Tidak bisa membuka video writer {clip['path']}")
+
+        # Tempatkan frame sesuai timestamp supaya clip diputar dengan kecepatan asli
+        t0 = frames[0][0]
+        written = 0
+        prev = None
+        for ts, buf in frames:
+            img = first if prev is None else cv2.imdecode(buf, cv2.IMREAD_COLOR)
+            target = int(round((ts - t0) * self.fps))
+            while prev is not None and written < target:
+                writer.write(prev)
+                written += 1
+            if written <= target:
+                writer.write(img)
+                written += 1
+            prev = img
+        writer.release()
+
+        with self._lock:
+            self.clips_written += 1
+            self.clip_paths.append(clip['path'])
+        print(f"CLIP: {clip['path']} ({', '.join(clip['labels'])}, {written / self.fps:.1f}s)")
+
+    def close(self, timeout=10.0):
+        """Selesaikan clip yang masih terbuka dan hentikan thread."""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def summary(self):
+        n = max(self.encoded, 1)
+        return (f"{self.events} events, {self.clips_written} clips written, "
+                f"{self.frames_added} frames buffered, {self.dropped} dropped (queue full) | "
+                f"encode avg {self.encode_time / n * 1000:.1f} ms | ring {self._ring_bytes / 1024:.0f} KB")
+
+
+# ========== LOG DETEKSI STREAMING (JSON LINES) ==========
+
+class DetectionLog:
+    """
+    Log deteksi JSON Lines, satu objek JSON per baris. File lama di path
+    yang sama ditimpa (satu file = satu run), jadi laporan yang dibaca
+    ulang dengan iter_detection_log tidak tercampur run sebelumnya.
+
+    Setiap record langsung ditulis ke file (memori konstan) dan di-flush
+    setiap `flush_every` record atau `flush_interval` detik, jadi crash
+    hanya kehilangan sedikit record terakhir.
+    """
+
+    def __init__(self, path, flush_every=10, flush_interval=5.0):
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._file = open(path, 'w', buffering=1 << 16)
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self.records = 0
+
+    def write(self, record):
+        self._file.write(json.dumps(record) + '\n')
+        self.records += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        self._file.flush()
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+
+def iter_detection_log(path):
+    """Baca ulang log JSON Lines satu record per satu (baris rusak dilewati)."""
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Baris terakhir bisa terpotong jika program crash
+                continue